@@ -0,0 +1,186 @@
+# banco.py - configuração do engine, perfil SQLite e métricas do pool (comentários em português)
+import itertools
+import os
+import threading
+import time
+from typing import List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from banco_async import criar_engine_async
+
+
+def _env_bool(nome: str, padrao: bool) -> bool:
+    valor = os.getenv(nome)
+    if valor is None or not valor.strip():
+        return padrao
+    return valor.strip().lower() in {"1", "true", "sim", "yes", "on"}
+
+
+class MetricasPool:
+    # Acumulados desde o início do processo; a saturação é lida do pool no momento
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.espera_total = 0.0
+            self.espera_max = 0.0
+            self.timeouts = 0
+
+    def registrar(self, espera: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+
+
+metricas_pool = MetricasPool()
+
+
+class PoolMedido(QueuePool):
+    # QueuePool que mede quanto cada checkout esperou por uma conexão livre
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            metricas_pool.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        metricas_pool.registrar(time.perf_counter() - inicio)
+        return conexao
+
+
+def _eh_sqlite_em_arquivo(url: str) -> bool:
+    destino = make_url(url)
+    return destino.get_backend_name() == "sqlite" and destino.database not in (None, "", ":memory:")
+
+
+# Opções comuns aos engines sync e async. DB_POOL_PRE_PING=0 dispensa o SELECT de teste a cada
+# checkout e passa a depender de DB_POOL_RECYCLE para descartar conexões antigas.
+def opcoes_pool(url: str) -> dict:
+    opcoes = {"pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True)}
+    if make_url(url).get_backend_name() == "sqlite" and not _eh_sqlite_em_arquivo(url):
+        return opcoes  # SQLite em memória usa SingletonThreadPool, sem tamanho configurável
+    opcoes.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "-1")),
+    )
+    return opcoes
+
+
+# medir=False para engines cujas esperas não devem entrar em metricas_pool (réplicas)
+def opcoes_engine(url: str, medir: bool = True) -> dict:
+    opcoes = opcoes_pool(url)
+    if make_url(url).get_backend_name() == "sqlite":
+        opcoes["connect_args"] = {"check_same_thread": False}
+    if medir and "pool_size" in opcoes:
+        opcoes["poolclass"] = PoolMedido
+    return opcoes
+
+
+# O SQLite vem com as chaves estrangeiras desligadas em cada conexão. Sem elas o ON DELETE
+# CASCADE de itens.lista_id não roda (Lista.itens usa passive_deletes) e os itens de uma lista
+# excluída ficam órfãos, prontos para aparecer na próxima lista que reaproveitar o id.
+def ativar_chaves_estrangeiras(engine: Engine) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _ativar(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            cursor.execute("PRAGMA foreign_keys=ON")
+        finally:
+            cursor.close()
+
+
+# Perfil SQLite (SQLITE_PERFIL=0 desliga): WAL deixa leituras em paralelo a uma escrita,
+# synchronous=NORMAL só sincroniza o disco no checkpoint, busy_timeout espera o lock em vez
+# de falhar com "database is locked" e mmap_size lê as páginas via memória mapeada. As chaves
+# estrangeiras valem sempre, com ou sem o perfil.
+def aplicar_perfil_sqlite(engine: Engine, url: str) -> None:
+    ativar_chaves_estrangeiras(engine)
+    if not _eh_sqlite_em_arquivo(url) or not _env_bool("SQLITE_PERFIL", True):
+        return
+    pragmas = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}",
+        f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+    )
+
+    @event.listens_for(engine, "connect")
+    def _configurar(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def estatisticas_pool(engine: Engine) -> dict:
+    pool = engine.pool
+    dados = {
+        "checkouts": metricas_pool.checkouts,
+        "espera_total_s": round(metricas_pool.espera_total, 6),
+        "espera_max_s": round(metricas_pool.espera_max, 6),
+        "timeouts": metricas_pool.timeouts,
+    }
+    if isinstance(pool, QueuePool):
+        # max_overflow negativo = sem limite, saturação indefinida
+        capacidade = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else None
+        em_uso = pool.checkedout()
+        dados.update(
+            tamanho=pool.size(),
+            max_overflow=pool._max_overflow,
+            em_uso=em_uso,
+            livres=pool.checkedin(),
+            saturacao=round(em_uso / capacidade, 4) if capacidade else None,
+        )
+    return dados
+
+
+class RodizioReplicas:
+    # Engines das réplicas de leitura (DATABASE_REPLICA_URLS); cada sessão vai para a
+    # próxima réplica em rodízio. Sem URLs o objeto é falso e as leituras ficam no primário.
+    def __init__(self, urls: List[str], com_async: bool = False):
+        self.engines = []
+        for url in urls:
+            engine = create_engine(url, **opcoes_engine(url, medir=False))
+            aplicar_perfil_sqlite(engine, url)
+            self.engines.append(engine)
+        self._fabricas = [sessionmaker(bind=e, autocommit=False, autoflush=False) for e in self.engines]
+        self._fabricas_async = []
+        if com_async:
+            for url in urls:
+                engine_async = criar_engine_async(url, **opcoes_pool(url))
+                aplicar_perfil_sqlite(engine_async.sync_engine, url)
+                self._fabricas_async.append(async_sessionmaker(bind=engine_async, autoflush=False))
+        self._contador = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def sessao(self) -> Session:
+        return self._fabricas[next(self._contador) % len(self._fabricas)]()
+
+    def sessao_async(self) -> AsyncSession:
+        return self._fabricas_async[next(self._contador) % len(self._fabricas_async)]()
+
+    def dispose(self) -> None:
+        for engine in self.engines:
+            engine.dispose()
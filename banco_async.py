@@ -0,0 +1,43 @@
+# banco_async.py - modo opcional com AsyncEngine (DB_MODO=async) (comentários em português)
+import functools
+import inspect
+from typing import Callable
+
+from fastapi import Depends
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+# Driver async usado para cada dialeto da DATABASE_URL
+DRIVERS_ASYNC = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def url_async(url: str) -> str:
+    destino = make_url(url)
+    driver = DRIVERS_ASYNC.get(destino.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"DB_MODO=async não suporta o banco '{destino.get_backend_name()}'")
+    return destino.set(drivername=f"{destino.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def criar_engine_async(url: str, **kwargs) -> AsyncEngine:
+    return create_async_engine(url_async(url), **kwargs)
+
+
+# Converte uma rota síncrona `(…, db: Session)` em corrotina que recebe uma AsyncSession e
+# executa o mesmo corpo com AsyncSession.run_sync: o I/O do banco é feito pelo driver async
+# no event loop (via greenlet), sem ocupar uma thread do threadpool por requisição.
+# O corpo não pode bloquear em locks de thread nem devolver geradores que usem a sessão.
+def rota_async(funcao: Callable, obter_sessao: Callable) -> Callable:
+    assinatura = inspect.signature(funcao)
+    parametros = [
+        p.replace(default=Depends(obter_sessao)) if p.name == "db" else p
+        for p in assinatura.parameters.values()
+    ]
+
+    @functools.wraps(funcao)
+    async def rota(**kwargs):
+        db = kwargs.pop("db")
+        return await db.run_sync(lambda sessao: funcao(db=sessao, **kwargs))
+
+    rota.__signature__ = assinatura.replace(parameters=parametros)
+    return rota
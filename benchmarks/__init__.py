@@ -0,0 +1 @@
+# benchmarks - medições de desempenho da API (comentários em português)
@@ -0,0 +1,78 @@
+# bench_carga.py - teste de carga comparando DB_MODO=sync e DB_MODO=async
+#
+# Uso: python -m benchmarks.bench_carga [--requisicoes 2000] [--concorrencia 50,200] [--modos sync,async]
+# Sobe um `uvicorn main:app` por modo (mesmo banco semeado) e dispara GETs de leitura
+# concorrentes com httpx. Sem DATABASE_URL definida, usa um SQLite temporário.
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.comum import entrar, porta_livre, semear, subir_servidor
+
+ROTAS = ("/api/listas", "/api/listas/{id}/itens", "/api/listas/{id}/resumo", "/api/historico?limit=20")
+
+
+async def _disparar(base: str, cabecalhos: dict, ids: list, requisicoes: int, concorrencia: int) -> dict:
+    latencias, erros = [], 0
+    semaforo = asyncio.Semaphore(concorrencia)
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+
+    async with httpx.AsyncClient(base_url=base, headers=cabecalhos, limits=limites, timeout=60) as cliente:
+        async def uma(n: int):
+            nonlocal erros
+            rota = ROTAS[n % len(ROTAS)].format(id=ids[n % len(ids)])
+            async with semaforo:
+                inicio = time.perf_counter()
+                resp = await cliente.get(rota)
+                latencias.append(time.perf_counter() - inicio)
+                if resp.status_code != 200:
+                    erros += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(uma(n) for n in range(requisicoes)))
+        duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "req_s": requisicoes / duracao,
+        "p50_ms": 1000 * latencias[len(latencias) // 2],
+        "p99_ms": 1000 * latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))],
+        "erros": erros,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga de leitura: DB_MODO=sync x DB_MODO=async")
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", default="50,200")
+    parser.add_argument("--modos", default="sync,async")
+    parser.add_argument("--listas", type=int, default=200)
+    parser.add_argument("--itens", type=int, default=30)
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{tempfile.NamedTemporaryFile(suffix='.db', delete=False).name}"
+    ids = semear(url, args.listas, args.itens)
+
+    print(f"{'modo':>6} {'conc.':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'erros':>6}")
+    for modo in args.modos.split(","):
+        porta = porta_livre()
+        servidor = subir_servidor(url, porta, DB_MODO=modo)
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{porta}") as cliente:
+                cabecalhos = entrar(cliente)
+            for concorrencia in (int(c) for c in args.concorrencia.split(",")):
+                r = asyncio.run(_disparar(f"http://127.0.0.1:{porta}", cabecalhos, ids, args.requisicoes, concorrencia))
+                print(f"{modo:>6} {concorrencia:>6} {r['req_s']:>9.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['erros']:>6}")
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# bench_clonar.py - tempo e objetos Python ao clonar listas de tamanhos crescentes
+#
+# Uso: python -m benchmarks.bench_clonar [--tamanhos 10,100,1000,10000]
+# Sem DATABASE_URL definida, usa um SQLite temporário.
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+if not os.getenv("DATABASE_URL"):
+    _tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}"
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from main import Base, SessionLocal, _clonar_lista, engine  # noqa: E402
+from models import Item, Lista, Usuario  # noqa: E402
+
+
+# Dono das listas semeadas: a clonagem avança a revisão de sincronização dele
+def _dono(db) -> Usuario:
+    dono = db.query(Usuario).filter(Usuario.email == "bench@example.com").first()
+    if dono is None:
+        dono = Usuario(nome="Bench", email="bench@example.com", senha_hash="-")
+        db.add(dono)
+        db.flush()
+    return dono
+
+
+def _semear(db, tamanho: int) -> Lista:
+    lista = Lista(
+        usuario_id=_dono(db).id, nome=f"Origem {tamanho}", finalizada=True, finalizada_em=datetime.now(timezone.utc)
+    )
+    db.add(lista)
+    db.flush()
+    db.execute(
+        insert(Item.__table__),
+        [{"lista_id": lista.id, "nome": f"Item {i}", "quantidade": 1, "comprado": i % 2 == 0, "ordem": i} for i in range(tamanho)],
+    )
+    db.commit()
+    return lista
+
+
+def medir(tamanho: int, repeticoes: int = 5) -> dict:
+    carregados = {"itens": 0}
+
+    def contar(alvo, contexto):
+        carregados["itens"] += 1
+
+    event.listen(Item, "load", contar)
+    db = SessionLocal()
+    try:
+        origem = _semear(db, tamanho)
+        tempos = []
+        tracemalloc.start()
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            _clonar_lista(db, origem, resetar_compra=True, sufixo="(bench)")
+            db.commit()
+            tempos.append(time.perf_counter() - inicio)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+        event.remove(Item, "load", contar)
+    return {
+        "itens": tamanho,
+        "ms_medio": 1000 * sum(tempos) / len(tempos),
+        "objetos_item": carregados["itens"],
+        "pico_kb": pico / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da clonagem de listas (INSERT ... SELECT)")
+    parser.add_argument("--tamanhos", default="10,100,1000,10000")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    print(f"{'itens':>8} {'ms/clone':>10} {'objetos Item':>13} {'pico KB':>9}")
+    for tamanho in (int(t) for t in args.tamanhos.split(",")):
+        r = medir(tamanho, args.repeticoes)
+        print(f"{r['itens']:>8} {r['ms_medio']:>10.2f} {r['objetos_item']:>13} {r['pico_kb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
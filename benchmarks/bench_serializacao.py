@@ -0,0 +1,98 @@
+# bench_serializacao.py - GET /api/listas/{id}/itens: caminho antigo x caminho atual
+#
+# Uso: python -m benchmarks.bench_serializacao [--tamanhos 100,1000,10000] [--repeticoes 20]
+# Antigo: objetos ORM -> item_to_dict -> jsonable_encoder -> json da stdlib (JSONResponse).
+# Atual: linhas (só as colunas da resposta) -> dicts -> orjson (ORJSONResponse).
+# Mede o tempo de consulta + serialização e, separado, só a serialização. Sem DATABASE_URL
+# definida, usa um SQLite temporário.
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    _tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from consultas import itens_em_dicts  # noqa: E402
+from main import Base, SessionLocal, engine, item_to_dict  # noqa: E402
+from models import Item, Lista  # noqa: E402
+
+
+def _semear(db, tamanho: int) -> int:
+    lista = Lista(nome=f"Lista {tamanho}")
+    db.add(lista)
+    db.flush()
+    db.execute(
+        insert(Item.__table__),
+        [{"lista_id": lista.id, "nome": f"Item {i}", "quantidade": 1 + i % 5, "comprado": i % 3 == 0, "ordem": i * 1024} for i in range(tamanho)],
+    )
+    db.commit()
+    return lista.id
+
+
+def _antigo_dados(db, lista_id: int) -> list:
+    itens = db.query(Item).filter(Item.lista_id == lista_id).order_by(Item.ordem.asc(), Item.criado_em.asc()).all()
+    return [item_to_dict(i) for i in itens]
+
+
+def _antigo_corpo(dados) -> bytes:
+    return JSONResponse(jsonable_encoder(dados)).body
+
+
+def _atual_dados(db, lista_id: int) -> list:
+    return itens_em_dicts(db, Item.lista_id == lista_id)
+
+
+def _atual_corpo(dados) -> bytes:
+    return ORJSONResponse(dados).body
+
+
+def _mediana_ms(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return 1000 * statistics.median(tempos)
+
+
+def medir(tamanho: int, repeticoes: int) -> dict:
+    db = SessionLocal()
+    try:
+        lista_id = _semear(db, tamanho)
+        resultado = {}
+        for nome, dados, corpo in (("antigo", _antigo_dados, _antigo_corpo), ("atual", _atual_dados, _atual_corpo)):
+            def completo():
+                db.expunge_all()  # sem o identity map, o caminho ORM monta os objetos de novo
+                corpo(dados(db, lista_id))
+
+            prontos = dados(db, lista_id)
+            resultado[nome] = (_mediana_ms(completo, repeticoes), _mediana_ms(lambda: corpo(prontos), repeticoes))
+        return resultado
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialização de GET /api/listas/{id}/itens")
+    parser.add_argument("--tamanhos", default="100,1000,10000")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    print(f"{'itens':>7} {'antigo ms':>10} {'atual ms':>9} {'ganho':>6} | {'só JSON antigo':>14} {'só JSON atual':>13}")
+    for tamanho in (int(t) for t in args.tamanhos.split(",")):
+        r = medir(tamanho, args.repeticoes)
+        (antigo, antigo_json), (atual, atual_json) = r["antigo"], r["atual"]
+        print(f"{tamanho:>7} {antigo:>10.2f} {atual:>9.2f} {antigo / atual:>5.1f}x | {antigo_json:>14.2f} {atual_json:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
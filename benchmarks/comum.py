@@ -0,0 +1,101 @@
+# comum.py - dados sintéticos e servidor uvicorn compartilhados pelos benchmarks
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, insert, select
+
+import busca  # noqa: F401  (registra as tabelas FTS do SQLite no create_all)
+from models import Base, Item, Lista, Usuario
+
+# Linhas por executemany ao semear
+LOTE_SEMEADURA = 10_000
+# Dono das listas semeadas; os benchmarks entram com ele antes de medir
+USUARIO = {"nome": "Bench", "email": "bench@example.com", "senha": "senha-do-bench"}
+
+
+# Recria o schema e grava `listas` listas com `itens` itens cada, em lotes (executemany),
+# todas de USUARIO. Metade das listas fica finalizada (histórico), com datas decrescentes;
+# os nomes variam para a busca ter o que filtrar. Devolve os ids das listas em ordem de criação.
+def semear(url: str, listas: int, itens: int) -> list:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    agora = datetime.now(timezone.utc)
+    produtos = ("Arroz", "Feijão", "Café", "Leite", "Pão", "Ovos", "Açúcar", "Sabão")
+    # Mesmo custo do servidor: senão o primeiro login regrava o hash
+    rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    senha_hash = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds).hash(USUARIO["senha"])
+    ids = []
+    with engine.begin() as conn:
+        usuario_id = conn.execute(
+            insert(Usuario.__table__).values(nome=USUARIO["nome"], email=USUARIO["email"], senha_hash=senha_hash)
+        ).inserted_primary_key[0]
+        for inicio in range(0, listas, LOTE_SEMEADURA):
+            lote = []
+            for i in range(inicio, min(inicio + LOTE_SEMEADURA, listas)):
+                criado_em = agora - timedelta(minutes=listas - i)
+                finalizada = i % 2 == 0
+                lote.append({
+                    "usuario_id": usuario_id,
+                    "nome": f"Lista {i} {produtos[i % len(produtos)]}",
+                    "criado_em": criado_em,
+                    "finalizada": finalizada,
+                    "finalizada_em": criado_em + timedelta(hours=1) if finalizada else None,
+                })
+            conn.execute(insert(Lista.__table__), lote)
+        # Tabela recém-criada: os ids saem em ordem de inserção
+        ids = list(conn.execute(select(Lista.id).order_by(Lista.id)).scalars())
+        linhas = []
+        for lista_id in ids:
+            for j in range(itens):
+                linhas.append({
+                    "lista_id": lista_id,
+                    "nome": f"{produtos[j % len(produtos)]} {j}",
+                    "quantidade": 1 + j % 4,
+                    "comprado": j % 3 == 0,
+                    "ordem": j * 1024,
+                })
+            if len(linhas) >= LOTE_SEMEADURA:
+                conn.execute(insert(Item.__table__), linhas)
+                linhas = []
+        if linhas:
+            conn.execute(insert(Item.__table__), linhas)
+    engine.dispose()
+    return ids
+
+
+# Cabeçalho Authorization de USUARIO, via POST /auth/login em `cliente` (httpx ou TestClient)
+def entrar(cliente) -> dict:
+    resp = cliente.post("/auth/login", json={"email": USUARIO["email"], "senha": USUARIO["senha"]})
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Sobe `uvicorn main:app` numa porta livre e espera responder; `env` completa o ambiente
+def subir_servidor(url: str, porta: int, **env) -> subprocess.Popen:
+    ambiente = dict(os.environ, DATABASE_URL=url, **env)
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(porta), "--log-level", "warning"],
+        env=ambiente,
+    )
+    limite = time.monotonic() + 20
+    while time.monotonic() < limite:
+        try:
+            httpx.get(f"http://127.0.0.1:{porta}/api/version", timeout=1)
+            return processo
+        except httpx.TransportError:
+            time.sleep(0.2)
+    processo.kill()
+    raise RuntimeError("uvicorn não respondeu")
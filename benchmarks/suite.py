@@ -0,0 +1,227 @@
+# suite.py - benchmark reprodutível das rotas da API em várias escalas, com baseline em JSON
+#
+# Uso:
+#   python -m benchmarks.suite [--escalas 10,1000,100000] [--itens 10] [--requisicoes 50]
+#                              [--uvicorn] [--saida base.json] [--comparar base.json]
+# Para cada escala, semeia `N` listas com `--itens` itens cada (executemany em lotes) e
+# mede cada cenário em sequência: p50/p99, requisições por segundo e consultas SQL por
+# requisição (lidas do header Server-Timing). Por padrão chama o app no mesmo processo
+# (TestClient); com --uvicorn sobe um `uvicorn main:app` por escala.
+# --comparar aponta regressões contra um JSON gerado antes com --saida: consultas a mais
+# sempre contam, tempo só acima de --tolerancia (p50). Nesse caso o código de saída é 1.
+# Sem DATABASE_URL definida, usa um SQLite temporário.
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+if not os.getenv("DATABASE_URL"):
+    _tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}"
+
+import httpx  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from benchmarks.comum import USUARIO, entrar, porta_livre, semear, subir_servidor  # noqa: E402
+
+_SERVER_TIMING = re.compile(r'desc="(\d+) consultas"')
+
+
+class Contexto:
+    # Estado compartilhado pelos cenários de uma escala
+    def __init__(self, cliente, ids: List[int]):
+        self.cliente = cliente
+        self.ids = ids
+        self.finalizadas = ids[::2]  # semear() finaliza as listas de índice par
+        self.itens_por_lista: Dict[int, List[int]] = {}
+        self.cursor_historico: Optional[str] = None
+
+    def lista(self, n: int) -> int:
+        return self.ids[n % len(self.ids)]
+
+    def itens(self, lista_id: int) -> List[int]:
+        if lista_id not in self.itens_por_lista:
+            resp = self.cliente.get(f"/api/listas/{lista_id}/itens")
+            self.itens_por_lista[lista_id] = [i["id"] for i in resp.json()]
+        return self.itens_por_lista[lista_id]
+
+
+class Cenario(NamedTuple):
+    nome: str
+    # (contexto, n) -> (método, caminho, corpo JSON ou None)
+    requisicao: Callable
+    # Fração de --requisicoes (login paga o bcrypt inteiro a cada chamada)
+    fracao: float = 1.0
+    # Em streaming o Server-Timing sai com o primeiro byte e a contagem varia a cada execução
+    conta_consultas: bool = True
+
+
+def _historico_cursor(ctx: Contexto, n: int):
+    # Percorre o histórico página a página; recomeça ao chegar ao fim
+    caminho = "/api/historico?modo=cursor&limit=20"
+    if ctx.cursor_historico:
+        caminho += f"&cursor={ctx.cursor_historico}"
+    return "GET", caminho, None
+
+
+def _reordenar(ctx: Contexto, n: int):
+    lista_id = ctx.lista(n)
+    return "PUT", f"/api/listas/{lista_id}/itens/ordenar", {"ordem": list(reversed(ctx.itens(lista_id)))}
+
+
+# Leituras primeiro; as escritas (reordenar, duplicar) vêm depois para não alterar o que foi lido
+CENARIOS = (
+    Cenario("listas_pagina", lambda ctx, n: ("GET", "/api/listas?limit=20", None)),
+    Cenario("listas_previa", lambda ctx, n: ("GET", "/api/listas?limit=20&previa=true", None)),
+    Cenario("itens", lambda ctx, n: ("GET", f"/api/listas/{ctx.lista(n)}/itens", None)),
+    Cenario("resumo", lambda ctx, n: ("GET", f"/api/listas/{ctx.lista(n)}/resumo", None)),
+    Cenario("historico_pagina_1", lambda ctx, n: ("GET", "/api/historico?page=1", None)),
+    Cenario("historico_pagina_10", lambda ctx, n: ("GET", "/api/historico?page=10", None)),
+    Cenario("historico_cursor", _historico_cursor),
+    Cenario("historico_busca", lambda ctx, n: ("GET", "/api/historico?busca=Caf", None)),
+    Cenario("exportar_csv", lambda ctx, n: ("GET", f"/api/listas/{ctx.lista(n)}/exportar?formato=csv", None), conta_consultas=False),
+    Cenario("reordenar", _reordenar),
+    Cenario("duplicar", lambda ctx, n: ("POST", f"/api/historico/duplicar/{ctx.finalizadas[n % len(ctx.finalizadas)]}", None)),
+    Cenario("login", lambda ctx, n: ("POST", "/auth/login", {"email": USUARIO["email"], "senha": USUARIO["senha"]}), 0.1),
+)
+
+
+def _percentil(valores: List[float], fracao: float) -> float:
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))]
+
+
+def medir(ctx: Contexto, cenario: Cenario, requisicoes: int, aquecimento: int = 3) -> dict:
+    total = max(3, int(requisicoes * cenario.fracao))
+    latencias, consultas, erros = [], [], 0
+    inicio_geral = None
+    for n in range(-aquecimento, total):
+        if n == 0:
+            inicio_geral = time.perf_counter()
+        metodo, caminho, corpo = cenario.requisicao(ctx, n)
+        inicio = time.perf_counter()
+        resp = ctx.cliente.request(metodo, caminho, json=corpo)
+        resp.read()  # exportação chega em streaming
+        duracao = time.perf_counter() - inicio
+        if cenario.nome == "historico_cursor" and resp.status_code == 200:
+            ctx.cursor_historico = resp.json()["meta"].get("next_cursor")
+        if n < 0:
+            continue
+        latencias.append(duracao)
+        if resp.status_code >= 400:
+            erros += 1
+        timing = _SERVER_TIMING.search(resp.headers.get("server-timing", ""))
+        if timing and cenario.conta_consultas:
+            consultas.append(int(timing.group(1)))
+    duracao_geral = time.perf_counter() - inicio_geral
+    latencias.sort()
+    return {
+        "requisicoes": total,
+        "p50_ms": round(1000 * _percentil(latencias, 0.5), 3),
+        "p99_ms": round(1000 * _percentil(latencias, 0.99), 3),
+        "req_s": round(total / duracao_geral, 1),
+        "consultas": max(consultas) if consultas else None,
+        "erros": erros,
+    }
+
+
+def _rodar_escala(url: str, listas: int, itens: int, requisicoes: int, uvicorn: bool) -> dict:
+    servidor = None
+    if uvicorn:
+        ids = semear(url, listas, itens)
+        porta = porta_livre()
+        servidor = subir_servidor(url, porta)
+        cliente = httpx.Client(base_url=f"http://127.0.0.1:{porta}", timeout=120)
+    else:
+        import main
+        from fastapi.testclient import TestClient
+
+        main.engine.dispose()  # o schema é recriado: nada de conexões antigas no pool
+        ids = semear(url, listas, itens)
+        main.limpar_caches()
+        cliente = TestClient(main.app)
+    try:
+        cliente.headers.update(entrar(cliente))
+        ctx = Contexto(cliente, ids)
+        resultados = {}
+        for cenario in CENARIOS:
+            resultados[cenario.nome] = r = medir(ctx, cenario, requisicoes)
+            print(
+                f"{listas:>7} {cenario.nome:<20} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                f"{r['req_s']:>8.1f} {r['consultas'] if r['consultas'] is not None else '-':>9} {r['erros']:>6}",
+                flush=True,
+            )
+        return resultados
+    finally:
+        cliente.close()
+        if servidor:
+            servidor.terminate()
+            servidor.wait()
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Lista as regressões de `atual` em relação a `base` (mesmas escalas e cenários)
+def comparar(base: dict, atual: dict, tolerancia: float) -> List[str]:
+    regressoes = []
+    for escala, cenarios in atual["resultados"].items():
+        for nome, r in cenarios.items():
+            anterior = base.get("resultados", {}).get(escala, {}).get(nome)
+            if not anterior:
+                continue
+            if r["consultas"] is not None and anterior["consultas"] is not None and r["consultas"] > anterior["consultas"]:
+                regressoes.append(f"{escala} {nome}: consultas {anterior['consultas']} -> {r['consultas']}")
+            if r["p50_ms"] > anterior["p50_ms"] * (1 + tolerancia):
+                regressoes.append(f"{escala} {nome}: p50 {anterior['p50_ms']:.2f} ms -> {r['p50_ms']:.2f} ms")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das rotas da API em várias escalas")
+    parser.add_argument("--escalas", default="10,1000,100000", help="Quantidades de listas")
+    parser.add_argument("--itens", type=int, default=10, help="Itens por lista")
+    parser.add_argument("--requisicoes", type=int, default=50, help="Requisições medidas por cenário")
+    parser.add_argument("--uvicorn", action="store_true", help="Mede contra um uvicorn em vez de no processo")
+    parser.add_argument("--saida", help="Grava o resultado em JSON (baseline)")
+    parser.add_argument("--comparar", help="Baseline JSON para apontar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora aceita no p50 (fração)")
+    args = parser.parse_args()
+
+    url = os.environ["DATABASE_URL"]
+    resultado = {
+        "commit": _commit_atual(),
+        "data": datetime.now(timezone.utc).isoformat(),
+        "banco": make_url(url).get_backend_name(),
+        "modo": "uvicorn" if args.uvicorn else "processo",
+        "itens_por_lista": args.itens,
+        "requisicoes": args.requisicoes,
+        "resultados": {},
+    }
+    print(f"{'listas':>7} {'cenário':<20} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'consultas':>9} {'erros':>6}")
+    for listas in (int(e) for e in args.escalas.split(",")):
+        resultado["resultados"][str(listas)] = _rodar_escala(url, listas, args.itens, args.requisicoes, args.uvicorn)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(json.load(arquivo), resultado, args.tolerancia)
+        for linha in regressoes:
+            print(f"REGRESSÃO {linha}")
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# busca.py - backends de busca por nome de lista e de item (comentários em português)
+import os
+from typing import Optional
+
+from sqlalchemy import DDL, column, event, or_, select, table
+
+from models import Item, Lista
+
+# Tabelas FTS5 (tokenizer trigram: busca por trecho, sem diferenciar maiúsculas) mantidas
+# por triggers. A migração cria as mesmas estruturas em bancos SQLite existentes.
+DDL_FTS_LISTAS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS listas_fts USING fts5("
+    "nome, content='listas', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS listas_fts_ai AFTER INSERT ON listas BEGIN "
+    "INSERT INTO listas_fts(rowid, nome) VALUES (new.id, new.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS listas_fts_ad AFTER DELETE ON listas BEGIN "
+    "INSERT INTO listas_fts(listas_fts, rowid, nome) VALUES ('delete', old.id, old.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS listas_fts_au AFTER UPDATE OF nome ON listas BEGIN "
+    "INSERT INTO listas_fts(listas_fts, rowid, nome) VALUES ('delete', old.id, old.nome); "
+    "INSERT INTO listas_fts(rowid, nome) VALUES (new.id, new.nome); END",
+]
+DDL_FTS_ITENS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS itens_fts USING fts5("
+    "nome, content='itens', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS itens_fts_ai AFTER INSERT ON itens BEGIN "
+    "INSERT INTO itens_fts(rowid, nome) VALUES (new.id, new.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS itens_fts_ad AFTER DELETE ON itens BEGIN "
+    "INSERT INTO itens_fts(itens_fts, rowid, nome) VALUES ('delete', old.id, old.nome); END",
+    "CREATE TRIGGER IF NOT EXISTS itens_fts_au AFTER UPDATE OF nome ON itens BEGIN "
+    "INSERT INTO itens_fts(itens_fts, rowid, nome) VALUES ('delete', old.id, old.nome); "
+    "INSERT INTO itens_fts(rowid, nome) VALUES (new.id, new.nome); END",
+]
+
+# Mantém as tabelas FTS quando o schema é criado via metadata.create_all (testes/dev)
+for _tabela, _ddls, _fts in ((Lista.__table__, DDL_FTS_LISTAS, "listas_fts"), (Item.__table__, DDL_FTS_ITENS, "itens_fts")):
+    for _ddl in _ddls:
+        event.listen(_tabela, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+    event.listen(_tabela, "before_drop", DDL(f"DROP TABLE IF EXISTS {_fts}").execute_if(dialect="sqlite"))
+
+_listas_fts = table("listas_fts", column("rowid"), column("nome"))
+_itens_fts = table("itens_fts", column("rowid"), column("nome"))
+
+
+def _padrao_like(termo: str) -> str:
+    escapado = termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+
+class BuscaLike:
+    # ILIKE '%termo%' em listas.nome e itens.nome; sem índice dedicado vira varredura
+    nome = "like"
+
+    def filtro(self, termo: str):
+        padrao = _padrao_like(termo)
+        listas_com_item = select(Item.lista_id).where(Item.nome.ilike(padrao, escape="\\"))
+        return or_(Lista.nome.ilike(padrao, escape="\\"), Lista.id.in_(listas_com_item))
+
+
+class BuscaTrigramaPostgres(BuscaLike):
+    # Mesmo ILIKE, atendido pelos índices GIN gin_trgm_ops (ix_listas_nome_trgm / ix_itens_nome_trgm)
+    nome = "trigram"
+
+
+class BuscaFts5Sqlite(BuscaLike):
+    nome = "fts5"
+    # O tokenizer trigram só indexa termos com pelo menos 3 caracteres
+    tamanho_minimo = 3
+
+    def filtro(self, termo: str):
+        if len(termo) < self.tamanho_minimo:
+            return super().filtro(termo)
+        frase = '"' + termo.replace('"', '""') + '"'
+        ids_listas = select(_listas_fts.c.rowid).where(_listas_fts.c.nome.op("MATCH")(frase))
+        ids_itens = select(_itens_fts.c.rowid).where(_itens_fts.c.nome.op("MATCH")(frase))
+        listas_com_item = select(Item.lista_id).where(Item.id.in_(ids_itens))
+        return or_(Lista.id.in_(ids_listas), Lista.id.in_(listas_com_item))
+
+
+BACKENDS = {b.nome: b for b in (BuscaLike, BuscaTrigramaPostgres, BuscaFts5Sqlite)}
+
+
+# BUSCA_BACKEND=auto|like|trigram|fts5; "auto" escolhe pelo dialeto do banco
+def obter_backend_busca(dialeto: str, escolha: Optional[str] = None) -> BuscaLike:
+    escolha = (escolha or os.getenv("BUSCA_BACKEND", "auto")).strip().lower()
+    if escolha == "auto":
+        escolha = {"postgresql": "trigram", "sqlite": "fts5"}.get(dialeto, "like")
+    if escolha not in BACKENDS:
+        raise RuntimeError(f"BUSCA_BACKEND inválido: {escolha}")
+    return BACKENDS[escolha]()
@@ -0,0 +1,60 @@
+# cache.py - cache em memória com TTL e limite de tamanho (comentários em português)
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_AUSENTE = object()
+
+
+class CacheTTL:
+    # LRU limitado a `max_itens` entradas, cada uma válida por `ttl` segundos.
+    # É por processo: com vários workers cada um mantém (e invalida) a sua cópia.
+    def __init__(self, max_itens: int = 1024, ttl: float = 60.0):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._dados: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrementada a cada limpeza: valores calculados antes dela não são gravados
+        self._geracao = 0
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            entrada = self._dados.get(chave, _AUSENTE)
+            if entrada is _AUSENTE:
+                return padrao
+            expira_em, valor = entrada
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return padrao
+            self._dados.move_to_end(chave)
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any, ttl: Optional[float] = None) -> None:
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._dados[chave] = (expira_em, valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_itens:
+                self._dados.popitem(last=False)
+
+    def obter_ou_calcular(self, chave: Hashable, calcular: Callable[[], Any]) -> Any:
+        valor = self.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            geracao = self._geracao
+            valor = calcular()
+            if geracao == self._geracao:
+                self.definir(chave, valor)
+        return valor
+
+    def remover(self, chave: Hashable) -> None:
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._geracao += 1
+            self._dados.clear()
+
+    def __len__(self) -> int:
+        return len(self._dados)
@@ -0,0 +1,220 @@
+# consultas.py - consultas agregadas de listas e itens (comentários em português)
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Select, and_, case, func, literal, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from models import Exclusao, Item, Lista
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+# Cursor opaco: JSON com os valores da última linha, em base64 url-safe
+def codificar_cursor(*valores: Any) -> str:
+    serializados = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    bruto = json.dumps(serializados, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, tipos: Sequence[Callable[[Any], Any]]) -> List[Any]:
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(preenchido.encode("ascii")))
+        if not isinstance(valores, list) or len(valores) != len(tipos):
+            raise CursorInvalido(cursor)
+        return [None if v is None else tipo(v) for tipo, v in zip(tipos, valores)]
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise CursorInvalido(cursor)
+
+
+# Valor do cursor ligado com o tipo da coluna: no SQLite as datas são texto, e assim o valor sai
+# no mesmo formato em que as linhas foram gravadas (ver a migração f1a6d3c8b205)
+def valor_da_coluna(coluna, valor: Any):
+    return literal(valor, coluna.type)
+
+
+# `coluna` começa com `prefixo`, de um jeito que o índice da coluna atenda: no SQLite o LIKE
+# não diferencia maiúsculas e ignora o índice binário, então vira o intervalo
+# [prefixo, prefixo + U+10FFFF); nos demais fica LIKE 'prefixo%' (text_pattern_ops no Postgres).
+def filtro_prefixo(db: Session, coluna, prefixo: str):
+    if db.get_bind().dialect.name == "sqlite":
+        return and_(coluna >= prefixo, coluna < prefixo + "\U0010ffff")
+    return coluna.startswith(prefixo, autoescape=True)
+
+
+# Colunas da lista nas respostas da API (mesmas chaves de lista_to_dict, com as contagens que
+# são colunas de `listas`). Como nos itens, as linhas viram dicts sem objetos ORM e os
+# datetimes ficam para o orjson.
+COLUNAS_LISTA = (
+    Lista.id,
+    Lista.nome,
+    Lista.criado_em,
+    Lista.finalizada,
+    Lista.finalizada_em,
+    Lista.itens_total.label("itens_count"),
+    Lista.itens_comprados.label("itens_comprados"),
+)
+
+
+# SELECT das COLUNAS_LISTA (mais `extras`) das listas do usuário
+def consulta_listas_com_contagens(usuario_id: int, extras: Sequence = ()) -> Select:
+    return select(*COLUNAS_LISTA, *extras).where(Lista.usuario_id == usuario_id)
+
+
+def listas_em_dicts(db: Session, consulta: Select) -> List[dict]:
+    return [dict(linha) for linha in db.execute(consulta).mappings()]
+
+
+# Listas do usuário ordenadas por (criado_em, id) DESC, continuando após o cursor informado.
+# Sem `limite` retorna todas. Devolve (linhas, proximo_cursor); cada linha é um dict das
+# COLUNAS_LISTA.
+def paginar_listas(
+    db: Session,
+    usuario_id: int,
+    *,
+    limite: Optional[int] = None,
+    cursor: Optional[str] = None,
+    finalizada: Optional[bool] = None,
+    prefixo: Optional[str] = None,
+):
+    consulta = consulta_listas_com_contagens(usuario_id)
+    if finalizada is not None:
+        consulta = consulta.where(Lista.finalizada == finalizada)
+    if prefixo:
+        consulta = consulta.where(filtro_prefixo(db, Lista.nome, prefixo))
+    if cursor:
+        criado_em, lista_id = decodificar_cursor(cursor, (datetime.fromisoformat, int))
+        consulta = consulta.where(
+            tuple_(Lista.criado_em, Lista.id) < tuple_(valor_da_coluna(Lista.criado_em, criado_em), lista_id)
+        )
+    consulta = consulta.order_by(Lista.criado_em.desc(), Lista.id.desc())
+    if limite is None:
+        return listas_em_dicts(db, consulta), None
+    linhas = listas_em_dicts(db, consulta.limit(limite + 1))
+    proximo = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo = codificar_cursor(linhas[-1]["criado_em"], linhas[-1]["id"])
+    return linhas, proximo
+
+
+# Ordenação do histórico: finalizada_em DESC NULLS LAST, criado_em DESC, id DESC
+ORDEM_HISTORICO = (Lista.finalizada_em.desc().nullslast(), Lista.criado_em.desc(), Lista.id.desc())
+
+
+def cursor_historico(linha: dict) -> str:
+    return codificar_cursor(linha["finalizada_em"], linha["criado_em"], linha["id"])
+
+
+# Condição keyset equivalente a "linhas depois do cursor" na ORDEM_HISTORICO
+def filtro_apos_cursor_historico(cursor: str):
+    finalizada_em, criado_em, lista_id = decodificar_cursor(
+        cursor, (datetime.fromisoformat, datetime.fromisoformat, int)
+    )
+    if criado_em is None or lista_id is None:
+        raise CursorInvalido(cursor)
+    mesmo_instante = tuple_(Lista.criado_em, Lista.id) < tuple_(valor_da_coluna(Lista.criado_em, criado_em), lista_id)
+    if finalizada_em is None:
+        return and_(Lista.finalizada_em.is_(None), mesmo_instante)
+    finalizada_em = valor_da_coluna(Lista.finalizada_em, finalizada_em)
+    return or_(
+        Lista.finalizada_em < finalizada_em,
+        Lista.finalizada_em.is_(None),
+        and_(Lista.finalizada_em == finalizada_em, mesmo_instante),
+    )
+
+
+# Colunas do item nas respostas da API (mesmas chaves de item_to_dict). As linhas viram dicts
+# sem montar objetos ORM, e os datetimes ficam para o orjson escrever em ISO 8601.
+COLUNAS_ITEM = (Item.id, Item.lista_id, Item.nome, Item.quantidade, Item.comprado, Item.ordem, Item.criado_em)
+# O id desempata itens de mesma ordem e mesmo segundo (mesma ordem de _ids_em_ordem e das prévias)
+ORDEM_ITENS = (Item.ordem.asc(), Item.criado_em.asc(), Item.id.asc())
+
+
+def itens_em_dicts(db: Session, *filtros, extras: Sequence = (), ordem: Sequence = ORDEM_ITENS) -> List[dict]:
+    consulta = select(*COLUNAS_ITEM, *extras).where(*filtros).order_by(*ordem)
+    return [dict(linha) for linha in db.execute(consulta).mappings()]
+
+
+class Previa(NamedTuple):
+    itens: List[dict]
+    total: int
+    comprados: int
+
+
+# Carrega os primeiros `limite` itens de cada lista e as contagens em um único SELECT:
+# ROW_NUMBER() numera os itens por lista e COUNT/SUM OVER trazem os totais da partição,
+# de modo que só as K primeiras linhas de cada lista chegam ao Python.
+def carregar_previas(db: Session, ids: Iterable[int], limite: int = 3) -> Dict[int, Previa]:
+    ids = list(ids)
+    if not ids:
+        return {}
+    por_lista = dict(partition_by=Item.lista_id)
+    numerados = (
+        select(
+            *COLUNAS_ITEM,
+            func.row_number()
+            .over(order_by=(Item.ordem.asc(), Item.criado_em.asc(), Item.id.asc()), **por_lista)
+            .label("posicao"),
+            func.count(Item.id).over(**por_lista).label("total"),
+            func.sum(case((Item.comprado == True, 1), else_=0)).over(**por_lista).label("comprados"),
+        )
+        .where(Item.lista_id.in_(ids))
+        .subquery()
+    )
+    colunas_item = [numerados.c[coluna.key] for coluna in COLUNAS_ITEM]
+    linhas = db.execute(
+        select(*colunas_item, numerados.c.posicao, numerados.c.total, numerados.c.comprados)
+        .where(numerados.c.posicao <= max(limite, 1))
+        .order_by(numerados.c.lista_id.asc(), numerados.c.posicao.asc())
+    ).mappings()
+    previas = {i: Previa([], 0, 0) for i in ids}
+    for linha in linhas:
+        lista_id = linha["lista_id"]
+        if linha["posicao"] == 1:
+            previas[lista_id] = Previa([], linha["total"], linha["comprados"] or 0)
+        if linha["posicao"] <= limite:
+            previas[lista_id].itens.append({coluna.key: linha[coluna.key] for coluna in COLUNAS_ITEM})
+    return previas
+
+
+class Alteracoes(NamedTuple):
+    listas: List[dict]  # COLUNAS_LISTA, versao e atualizado_em
+    itens: List[dict]
+    excluidos: Dict[str, List[int]]
+
+
+# Linhas do usuário com revisão em (desde, ate]. Sem `desde` devolve tudo até `ate` (carga
+# inicial), e aí as lápides não são necessárias.
+def alteracoes_desde(db: Session, usuario_id: int, desde: Optional[int], ate: int) -> Alteracoes:
+    def janela(coluna):
+        return coluna <= ate if desde is None else and_(coluna > desde, coluna <= ate)
+
+    listas = listas_em_dicts(
+        db,
+        consulta_listas_com_contagens(usuario_id, extras=(Lista.versao, Lista.atualizado_em))
+        .where(janela(Lista.revisao))
+        .order_by(Lista.id),
+    )
+    itens = itens_em_dicts(
+        db,
+        janela(Item.revisao),
+        Item.lista_id.in_(select(Lista.id).where(Lista.usuario_id == usuario_id)),
+        extras=(Item.atualizado_em,),
+        ordem=(Item.lista_id.asc(), Item.ordem.asc(), Item.id.asc()),
+    )
+    excluidos = {"listas": [], "itens": []}
+    if desde is not None:
+        for tabela, registro_id in db.execute(
+            select(Exclusao.tabela, Exclusao.registro_id)
+            .where(Exclusao.usuario_id == usuario_id, janela(Exclusao.revisao))
+            .order_by(Exclusao.id)
+        ):
+            excluidos.setdefault(tabela, []).append(registro_id)
+    return Alteracoes(listas, itens, excluidos)
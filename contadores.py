@@ -0,0 +1,94 @@
+# contadores.py - contadores itens_total/itens_comprados das listas (comentários em português)
+#
+# Os contadores são mantidos por triggers em `itens` (DDL em models.py), na mesma transação de
+# qualquer escrita: rotas, lote, importação (executemany), clonagem (INSERT ... SELECT) e
+# exclusões em cascata.
+# Verificação/reparo de divergências: python -m contadores [--reparar]
+import argparse
+from typing import List, NamedTuple
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from models import Item, Lista
+from versoes import nova_revisao
+
+class Divergencia(NamedTuple):
+    lista_id: int
+    itens_total: int
+    itens_comprados: int
+    total_real: int
+    comprados_real: int
+
+
+def _contagens_reais():
+    return (
+        select(
+            Item.lista_id,
+            func.count(Item.id).label("total"),
+            func.sum(case((Item.comprado == True, 1), else_=0)).label("comprados"),
+        )
+        .group_by(Item.lista_id)
+        .subquery()
+    )
+
+
+# Listas cujos contadores não batem com os itens. Com `reparar=True` corrige essas listas
+# (o commit fica com quem chamou).
+def verificar_contadores(db: Session, reparar: bool = False) -> List[Divergencia]:
+    reais = _contagens_reais()
+    total_real = func.coalesce(reais.c.total, 0)
+    comprados_real = func.coalesce(reais.c.comprados, 0)
+    divergencias = [
+        Divergencia(*linha)
+        for linha in db.execute(
+            select(Lista.id, Lista.itens_total, Lista.itens_comprados, total_real, comprados_real)
+            .outerjoin(reais, reais.c.lista_id == Lista.id)
+            .where((Lista.itens_total != total_real) | (Lista.itens_comprados != comprados_real))
+            .order_by(Lista.id)
+        )
+    ]
+    donos = {}
+    if reparar and divergencias:
+        ids = [d.lista_id for d in divergencias]
+        donos = dict(db.execute(select(Lista.id, Lista.usuario_id).where(Lista.id.in_(ids))).all())
+    for d in divergencias if reparar else ():
+        # Nova versão/revisão: ETags e /api/sync passam a entregar as contagens corrigidas. A
+        # revisão é por usuário e vem logo antes do UPDATE da lista; listas sem dono não
+        # aparecem para ninguém.
+        if donos[d.lista_id] is not None:
+            nova_revisao(db, donos[d.lista_id])
+        db.execute(
+            update(Lista)
+            .where(Lista.id == d.lista_id)
+            .values(itens_total=d.total_real, itens_comprados=d.comprados_real, versao=Lista.versao + 1)
+            .execution_options(synchronize_session=False)
+        )
+    return divergencias
+
+
+def main():
+    import main as app_main  # engine configurado pela DATABASE_URL (.env)
+
+    parser = argparse.ArgumentParser(description="Confere itens_total/itens_comprados de todas as listas")
+    parser.add_argument("--reparar", action="store_true", help="Corrige as listas divergentes")
+    args = parser.parse_args()
+
+    db = app_main.SessionLocal()
+    try:
+        divergencias = verificar_contadores(db, reparar=args.reparar)
+        for d in divergencias:
+            print(
+                f"lista {d.lista_id}: total {d.itens_total} (real {d.total_real}), "
+                f"comprados {d.itens_comprados} (real {d.comprados_real})"
+            )
+        if args.reparar:
+            db.commit()
+        print(f"{len(divergencias)} lista(s) divergente(s){' corrigida(s)' if args.reparar and divergencias else ''}")
+    finally:
+        db.close()
+    raise SystemExit(1 if divergencias and not args.reparar else 0)
+
+
+if __name__ == "__main__":
+    main()
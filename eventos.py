@@ -0,0 +1,87 @@
+# eventos.py - pub/sub de alterações das listas para o stream em tempo real (comentários em português)
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+# Aviso enviado no lugar das mensagens descartadas quando um assinante não acompanha o ritmo
+RESINCRONIZAR = {"tipo": "resincronizar"}
+
+
+class Assinatura:
+    def __init__(self, tamanho_fila: int):
+        self.loop = asyncio.get_running_loop()
+        self.fila: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=tamanho_fila)
+        self.atrasada = False
+
+    def _entregar(self, mensagem: dict) -> None:
+        # Roda no loop do assinante; com a fila cheia descarta e avisa uma vez só
+        if self.atrasada:
+            return
+        try:
+            self.fila.put_nowait(mensagem)
+        except asyncio.QueueFull:
+            self.atrasada = True
+
+    def entregar(self, mensagem: dict) -> None:
+        self.loop.call_soon_threadsafe(self._entregar, mensagem)
+
+    async def proxima(self, timeout: Optional[float] = None) -> Optional[dict]:
+        # None quando o tempo acaba sem mensagem (o chamador pode mandar um ping)
+        if self.atrasada and self.fila.empty():
+            self.atrasada = False
+            return RESINCRONIZAR
+        try:
+            return await asyncio.wait_for(self.fila.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BarramentoMemoria:
+    # Entrega só para assinantes deste processo. Com vários workers, use um backend com o
+    # mesmo contrato (publicar/assinar) sobre um broker compartilhado (Redis, LISTEN/NOTIFY).
+    nome = "memoria"
+
+    def __init__(self, tamanho_fila: int = 100):
+        self.tamanho_fila = tamanho_fila
+        self._canais: Dict[str, Set[Assinatura]] = {}
+        self._lock = threading.Lock()
+
+    # Pode ser chamado de qualquer thread (rotas síncronas rodam no threadpool)
+    def publicar(self, canal: str, mensagem: dict) -> int:
+        with self._lock:
+            assinantes = list(self._canais.get(canal, ()))
+        for assinatura in assinantes:
+            assinatura.entregar(mensagem)
+        return len(assinantes)
+
+    @asynccontextmanager
+    async def assinar(self, canal: str) -> AsyncIterator[Assinatura]:
+        assinatura = Assinatura(self.tamanho_fila)
+        with self._lock:
+            self._canais.setdefault(canal, set()).add(assinatura)
+        try:
+            yield assinatura
+        finally:
+            with self._lock:
+                assinantes = self._canais.get(canal)
+                if assinantes is not None:
+                    assinantes.discard(assinatura)
+                    if not assinantes:
+                        del self._canais[canal]
+
+    def assinantes(self, canal: str) -> int:
+        with self._lock:
+            return len(self._canais.get(canal, ()))
+
+
+BACKENDS = {b.nome: b for b in (BarramentoMemoria,)}
+
+
+# PUBSUB_BACKEND escolhe a implementação; PUBSUB_FILA_MAX limita mensagens pendentes por assinante
+def obter_barramento(escolha: Optional[str] = None):
+    escolha = (escolha or os.getenv("PUBSUB_BACKEND", "memoria")).strip().lower()
+    if escolha not in BACKENDS:
+        raise RuntimeError(f"PUBSUB_BACKEND inválido: {escolha}")
+    return BACKENDS[escolha](tamanho_fila=int(os.getenv("PUBSUB_FILA_MAX", "100")))
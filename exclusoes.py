@@ -0,0 +1,59 @@
+# exclusoes.py - expurgo das lápides do /api/sync (comentários em português)
+#
+# Cada exclusão de lista/item vira uma linha em `exclusoes`, para o /api/sync avisar os clientes
+# que já tinham a linha. Passado o prazo de retenção, as lápides saem da tabela e a maior
+# revisão removida de cada usuário fica em `usuarios.revisao_expurgada`: um token mais antigo
+# que ela já não enxerga essas exclusões, e o /api/sync responde com a carga completa.
+# Expurgo (agendar no cron): python -m exclusoes [--dias 90]
+import argparse
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from models import Exclusao, Usuario, agora_utc
+
+RETENCAO_DIAS_PADRAO = 90
+
+
+# Remove as lápides com mais de `dias` e devolve quantas saíram (o commit fica com quem chamou)
+def expurgar_exclusoes(db: Session, dias: int = RETENCAO_DIAS_PADRAO) -> int:
+    corte = agora_utc() - timedelta(days=dias)
+    # A marca sobe antes do DELETE, na mesma transação: nenhum /api/sync vê as lápides
+    # sumirem sem ver também a marca nova
+    for usuario_id, revisao in db.execute(
+        select(Exclusao.usuario_id, func.max(Exclusao.revisao))
+        .where(Exclusao.excluido_em < corte, Exclusao.usuario_id.is_not(None))
+        .group_by(Exclusao.usuario_id)
+    ).all():
+        db.execute(
+            update(Usuario.__table__)
+            .where(Usuario.id == usuario_id, Usuario.revisao_expurgada < revisao)
+            .values(revisao_expurgada=revisao)
+        )
+    return db.execute(delete(Exclusao).where(Exclusao.excluido_em < corte)).rowcount
+
+
+def main():
+    import main as app_main  # engine configurado pela DATABASE_URL (.env)
+
+    parser = argparse.ArgumentParser(description="Expurga as lápides antigas do /api/sync")
+    parser.add_argument(
+        "--dias", type=int, default=RETENCAO_DIAS_PADRAO,
+        help=f"Retenção em dias (default {RETENCAO_DIAS_PADRAO})",
+    )
+    args = parser.parse_args()
+    if args.dias < 0:
+        parser.error("--dias não pode ser negativo")
+
+    db = app_main.SessionLocal()
+    try:
+        removidas = expurgar_exclusoes(db, args.dias)
+        db.commit()
+        print(f"{removidas} lápide(s) com mais de {args.dias} dia(s) expurgada(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
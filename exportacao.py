@@ -0,0 +1,134 @@
+# exportacao.py - geradores de exportação em streaming (comentários em português)
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from consultas import ORDEM_HISTORICO
+from models import Item, Lista
+
+# Linhas lidas do banco por vez (yield_per) e tamanho aproximado de cada pedaço enviado
+LOTE_LEITURA = 500
+TAMANHO_PEDACO = 64 * 1024
+
+FORMATOS = {
+    "txt": ("text/plain", "txt"),
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+
+
+def _agrupar(linhas: Iterable[str]) -> Iterator[bytes]:
+    # Junta as linhas em pedaços de ~64 KB: memória constante e poucas escritas no socket
+    buffer, tamanho = [], 0
+    for linha in linhas:
+        buffer.append(linha)
+        tamanho += len(linha)
+        if tamanho >= TAMANHO_PEDACO:
+            yield "".join(buffer).encode("utf-8")
+            buffer, tamanho = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _escritor_csv():
+    # Texto entre aspas e números sem aspas, como no formato CSV original
+    saida = io.StringIO()
+    escritor = csv.writer(saida, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+
+    def linha(valores) -> str:
+        escritor.writerow(valores)
+        texto = saida.getvalue()
+        saida.seek(0)
+        saida.truncate(0)
+        return texto
+
+    return linha
+
+
+def _linha_json(dados: dict) -> str:
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _itens_da_lista(db: Session, lista_id: int):
+    consulta = (
+        select(Item.nome, Item.quantidade, Item.comprado)
+        .where(Item.lista_id == lista_id)
+        .order_by(Item.ordem.asc(), Item.criado_em.asc(), Item.id.asc())
+        .execution_options(yield_per=LOTE_LEITURA)
+    )
+    return db.execute(consulta)
+
+
+def exportar_itens(db: Session, lista: Lista, formato: str) -> Iterator[bytes]:
+    def linhas():
+        itens = _itens_da_lista(db, lista.id)
+        if formato == "csv":
+            linha_csv = _escritor_csv()
+            yield "nome,quantidade,comprado\n"
+            for nome, quantidade, comprado in itens:
+                yield linha_csv([nome, quantidade, 1 if comprado else 0])
+        elif formato == "jsonl":
+            for nome, quantidade, comprado in itens:
+                yield _linha_json({"nome": nome, "quantidade": quantidade, "comprado": bool(comprado)})
+        else:
+            yield f"Lista: {lista.nome}\n\n"
+            for idx, (nome, quantidade, comprado) in enumerate(itens, start=1):
+                marcador = "[x]" if comprado else "[ ]"
+                yield f"{idx:02d}. {marcador} {nome} (x{quantidade})\n"
+
+    return _agrupar(linhas())
+
+
+# Todas as listas finalizadas do usuário com seus itens, em uma única consulta lida em lotes.
+# Listas sem itens aparecem em uma linha com os campos do item vazios.
+def exportar_historico(db: Session, usuario_id: int, formato: str) -> Iterator[bytes]:
+    consulta = (
+        select(
+            Lista.id,
+            Lista.nome,
+            Lista.finalizada_em,
+            Item.nome,
+            Item.quantidade,
+            Item.comprado,
+        )
+        .outerjoin(Item, Item.lista_id == Lista.id)
+        .where(Lista.usuario_id == usuario_id, Lista.finalizada == True)
+        .order_by(*ORDEM_HISTORICO, Item.ordem.asc(), Item.criado_em.asc(), Item.id.asc())
+        .execution_options(yield_per=LOTE_LEITURA)
+    )
+
+    def linhas():
+        registros = db.execute(consulta)
+        linha_csv = _escritor_csv()
+        if formato == "csv":
+            yield "lista_id,lista,finalizada_em,nome,quantidade,comprado\n"
+        for lista_id, lista, finalizada_em, nome, quantidade, comprado in registros:
+            finalizada = finalizada_em.isoformat() if finalizada_em else None
+            if formato == "csv":
+                yield linha_csv(
+                    [
+                        lista_id,
+                        lista,
+                        finalizada or "",
+                        "" if nome is None else nome,
+                        "" if quantidade is None else quantidade,
+                        "" if comprado is None else (1 if comprado else 0),
+                    ]
+                )
+            else:
+                yield _linha_json(
+                    {
+                        "lista_id": lista_id,
+                        "lista": lista,
+                        "finalizada_em": finalizada,
+                        "nome": nome,
+                        "quantidade": quantidade,
+                        "comprado": None if comprado is None else bool(comprado),
+                    }
+                )
+
+    return _agrupar(linhas())
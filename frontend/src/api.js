@@ -37,18 +37,44 @@ const buildQueryString = (params = {}) => {
   return qs ? `?${qs}` : '';
 };
 
+// Respostas GET com ETag (chave: token + caminho). No próximo GET o validador vai em
+// If-None-Match e, se o servidor responder 304, o corpo guardado é reutilizado.
+const MAX_RESPOSTAS_VALIDADAS = 100;
+const respostasValidadas = new Map();
+
+const copiar = (dados) => (typeof structuredClone === 'function' ? structuredClone(dados) : JSON.parse(JSON.stringify(dados)));
+
+function guardarValidada(chave, etag, dados) {
+  respostasValidadas.delete(chave);
+  respostasValidadas.set(chave, { etag, dados: copiar(dados) });
+  if (respostasValidadas.size > MAX_RESPOSTAS_VALIDADAS) {
+    respostasValidadas.delete(respostasValidadas.keys().next().value);
+  }
+}
+
 // Função genérica para requisições
+// Marca da última escrita (header X-Escrita-Em), reenviada nas requisições seguintes: com
+// réplicas de leitura, qualquer worker do servidor a usa para ler do primário logo após escrever
+let marcaEscrita = null;
+
 export async function apiFetch(path, { method = 'GET', body, headers = {}, auth = true } = {}) {
   const finalHeaders = { 'Content-Type': 'application/json', ...headers };
+  let token = null;
   if (auth) {
-    const token = getStoredToken();
+    token = getStoredToken();
     if (token) {
       finalHeaders.Authorization = `Bearer ${token}`;
     }
   }
+  const chaveCache = method === 'GET' ? `${token || ''}|${path}` : null;
+  const validada = chaveCache ? respostasValidadas.get(chaveCache) : null;
+  if (validada) finalHeaders['If-None-Match'] = validada.etag;
+  if (marcaEscrita) finalHeaders['X-Escrita-Em'] = marcaEscrita;
   const config = { method, headers: finalHeaders };
   if (body) config.body = JSON.stringify(body);
   const resp = await fetch(`${API_BASE}${path}`, config);
+  marcaEscrita = resp.headers.get('X-Escrita-Em') || marcaEscrita;
+  if (resp.status === 304 && validada) return copiar(validada.dados);
   if (!resp.ok) {
     // tenta ler mensagem de erro
     let msg = `Erro HTTP ${resp.status}`;
@@ -63,7 +89,10 @@ export async function apiFetch(path, { method = 'GET', body, headers = {}, auth
   }
   // tentar parse json (204 não tem corpo)
   if (resp.status === 204) return null;
-  return resp.json();
+  const dados = await resp.json();
+  const etag = resp.headers.get('ETag');
+  if (chaveCache && etag) guardarValidada(chaveCache, etag, dados);
+  return dados;
 }
 
 export const ListasAPI = {
@@ -74,7 +103,10 @@ export const ListasAPI = {
   resumo: (id) => apiFetch(`/listas/${id}/resumo`),
   finalizar: (id, finalizada = true) => apiFetch(`/listas/${id}/finalizar`, { method: 'POST', body: { finalizada } }),
   exportar: async (id, formato = 'txt') => {
-    const resp = await fetch(`${API_BASE}/listas/${id}/exportar?formato=${encodeURIComponent(formato)}`);
+    const token = getStoredToken();
+    const resp = await fetch(`${API_BASE}/listas/${id}/exportar?formato=${encodeURIComponent(formato)}`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
     if (!resp.ok) {
       let msg = `Erro HTTP ${resp.status}`;
       try {
@@ -97,6 +129,10 @@ export const ItensAPI = {
   atualizar: (listaId, itemId, dados) => apiFetch(`/listas/${listaId}/itens/${itemId}`, { method: 'PUT', body: dados }),
   excluir: (listaId, itemId) => apiFetch(`/listas/${listaId}/itens/${itemId}`, { method: 'DELETE' }),
   reordenar: (listaId, ids) => apiFetch(`/listas/${listaId}/itens/ordenar`, { method: 'PUT', body: { ordem: ids } }),
+  // referencia: { antes_de: itemId } ou { depois_de: itemId } (null = início/fim da lista)
+  mover: (listaId, itemId, referencia) => apiFetch(`/listas/${listaId}/itens/${itemId}/mover`, { method: 'PUT', body: referencia }),
+  // operacoes: [{ op: 'criar' | 'atualizar' | 'alternar' | 'excluir', id?, nome?, quantidade?, comprado? }]
+  lote: (listaId, operacoes) => apiFetch(`/listas/${listaId}/itens/batch`, { method: 'POST', body: { operacoes } }),
 };
 
 export const HistoricoAPI = {
@@ -111,6 +147,57 @@ export const HistoricoAPI = {
   },
 };
 
+const MAX_FALHAS_HANDSHAKE = 5;
+
+// Stream em tempo real das alterações de uma lista (WebSocket). Devolve uma função que fecha
+// a conexão; se ela cair, reconecta com espera crescente (3 s até 60 s). O navegador não envia
+// headers no WebSocket, então o token vai na query string; 4401/4404 não reconectam.
+export function acompanharLista(id, aoReceber) {
+  const base = new URL(`${API_BASE}/listas/${id}/stream`, window.location.href);
+  base.protocol = base.protocol === 'https:' ? 'wss:' : 'ws:';
+  const token = getStoredToken();
+  if (token) base.searchParams.set('token', token);
+  let socket = null;
+  let encerrado = false;
+  let espera = 3000;
+  // Handshakes recusados seguidos (1006 sem chegar a abrir): servidor fora do ar ou que recusa
+  // antes de aceitar. Depois de MAX_FALHAS_HANDSHAKE para de tentar.
+  let falhasSeguidas = 0;
+  const conectar = () => {
+    let abriu = false;
+    socket = new WebSocket(base.href);
+    socket.onopen = () => {
+      abriu = true;
+      falhasSeguidas = 0;
+      espera = 3000;
+    };
+    socket.onmessage = (evento) => {
+      try {
+        const mensagem = JSON.parse(evento.data);
+        if (mensagem.tipo !== 'ping' && mensagem.tipo !== 'inscrito') aoReceber(mensagem);
+      } catch {}
+    };
+    socket.onclose = (evento) => {
+      if (encerrado || evento.code === 4401 || evento.code === 4404) return;
+      if (!abriu && ++falhasSeguidas >= MAX_FALHAS_HANDSHAKE) return;
+      setTimeout(conectar, espera);
+      espera = Math.min(espera * 2, 60000);
+    };
+  };
+  conectar();
+  return () => {
+    encerrado = true;
+    socket?.close();
+  };
+}
+
+// Sincronização incremental: sem token traz tudo; guarde `token` e reenvie na próxima chamada.
+// Com `completo: true` a resposta é a carga inteira (token vencido pelo expurgo das lápides):
+// substitua o estado local em vez de aplicar as alterações.
+export const SyncAPI = {
+  buscar: (token) => apiFetch(`/sync${buildQueryString({ since: token })}`),
+};
+
 export const ConfigAPI = {
   obter: () => apiFetch('/config'),
   atualizar: (tema) => apiFetch('/config', { method: 'PUT', body: { tema } }),
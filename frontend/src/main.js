@@ -8,6 +8,7 @@ import {
   AuthAPI,
   getStoredToken,
   clearAuthToken,
+  acompanharLista,
 } from './api.js';
 
 // Comentários em português explicando cada parte
@@ -24,7 +25,7 @@ let buscaItens = '';
 let abaAtiva = 'ativas';
 const historicoEstado = {
   itens: [],
-  page: 1,
+  cursor: null,
   hasMore: true,
   carregando: false,
   busca: '',
@@ -35,6 +36,7 @@ const historicoEstado = {
 let configPreferencias = { tema: 'claro' };
 let versaoInfo = null;
 let usuarioAtual = null;
+let fecharStreamLista = null;
 
 function atualizarHeaderUsuario() {
   const nomeEl = document.getElementById('usuarioNome');
@@ -99,12 +101,12 @@ async function moverItem(listaId, itemId, direction) {
   const targetIndex = currentIndex + direction;
   if (targetIndex < 0 || targetIndex >= itensDetalhe.length) return;
 
-  const novaOrdem = [...itensDetalhe];
-  const [item] = novaOrdem.splice(currentIndex, 1);
-  novaOrdem.splice(targetIndex, 0, item);
+  // Move só o item clicado: sobe para antes do vizinho de cima ou desce para depois do de baixo
+  const vizinho = itensDetalhe[targetIndex];
+  const referencia = direction < 0 ? { antes_de: vizinho.id } : { depois_de: vizinho.id };
 
   try {
-    await ItensAPI.reordenar(listaId, novaOrdem.map((i) => i.id));
+    await ItensAPI.mover(listaId, itemId, referencia);
     await carregarItensDaLista(listaId, { preservarEstado: true });
     mostrarStatus('Ordem atualizada.');
   } catch (err) {
@@ -576,7 +578,7 @@ function validarPeriodoCustom() {
 async function carregarHistorico({ reset = false } = {}) {
   if (historicoEstado.carregando) return;
   if (reset) {
-    historicoEstado.page = 1;
+    historicoEstado.cursor = null;
     historicoEstado.itens = [];
     historicoEstado.hasMore = true;
   }
@@ -585,8 +587,10 @@ async function carregarHistorico({ reset = false } = {}) {
   historicoEstado.carregando = true;
   renderizarHistorico();
   try {
+    // "Carregar mais" usa paginação por cursor: cada página custa o mesmo que a primeira
     const params = {
-      page: historicoEstado.page,
+      modo: 'cursor',
+      cursor: historicoEstado.cursor || undefined,
       limit: 9,
       periodo: historicoEstado.periodo,
       busca: historicoEstado.busca || undefined,
@@ -601,9 +605,8 @@ async function carregarHistorico({ reset = false } = {}) {
     }
     historicoEstado.itens = historicoEstado.itens.concat(resp.data || []);
     const meta = resp.meta || {};
-    const paginaAtual = meta.page || historicoEstado.page;
-    historicoEstado.hasMore = Boolean(meta.has_more);
-    historicoEstado.page = historicoEstado.hasMore ? paginaAtual + 1 : paginaAtual;
+    historicoEstado.hasMore = Boolean(meta.has_more && meta.next_cursor);
+    historicoEstado.cursor = meta.next_cursor || null;
   } catch (err) {
     mostrarStatus(err.message);
   } finally {
@@ -670,6 +673,7 @@ async function executarAcaoHistorico(acao, id) {
     if (acao === 'restaurar' && novaLista?.id) {
       alternarAba('ativas');
       listaAtivaId = novaLista.id;
+      acompanharListaAtiva(novaLista.id);
       await carregarItensDaLista(novaLista.id, { preservarEstado: false });
     }
   } catch (err) {
@@ -698,6 +702,19 @@ async function carregarListas() {
   }
 }
 
+// Recarrega os itens quando outra pessoa altera a lista aberta (em vez de ficar consultando);
+// as mensagens chegam em rajadas, então espera um instante e recarrega uma vez só (com ETag)
+function acompanharListaAtiva(listaId) {
+  if (fecharStreamLista) fecharStreamLista();
+  let agendado = null;
+  fecharStreamLista = acompanharLista(listaId, () => {
+    clearTimeout(agendado);
+    agendado = setTimeout(() => {
+      if (listaAtivaId === listaId) carregarItensDaLista(listaId, { preservarEstado: true });
+    }, 200);
+  });
+}
+
 async function carregarItensDaLista(listaId, { preservarEstado = true } = {}) {
   try {
     const itens = await ItensAPI.listar(listaId);
@@ -737,7 +754,7 @@ function renderizarDetalheLista(listaId) {
             <div class='flex items-start justify-between gap-3'>
               <div>
                 <p class='font-semibold ${i.comprado ? 'line-through text-neutral-400' : ''}'>${i.nome}</p>
-                <p class='text-xs text-neutral-500'>Qtd: ${i.quantidade} • Ordem ${i.ordem}</p>
+                <p class='text-xs text-neutral-500'>Qtd: ${i.quantidade} • Ordem ${itensDetalhe.indexOf(i) + 1}</p>
               </div>
               <div class='flex flex-wrap gap-2 text-xs'>
                 <button class='px-2 py-1 border rounded' data-move='up' ${idx === 0 ? 'disabled' : ''}>↑</button>
@@ -958,6 +975,7 @@ document.body.addEventListener('click', (e) => {
   const card = e.target.closest('[data-lista]');
   if (card) {
     listaAtivaId = Number(card.getAttribute('data-lista'));
+    acompanharListaAtiva(listaAtivaId);
     carregarItensDaLista(listaAtivaId, { preservarEstado: false });
   }
 });
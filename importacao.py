@@ -0,0 +1,222 @@
+# importacao.py - importação em lote de itens e listas a partir de CSV/JSONL (comentários em português)
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from typing import IO, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from models import Item, Lista
+from versoes import tocar_listas
+
+# Linhas gravadas por executemany e limite de erros detalhados no relatório
+LOTE_IMPORTACAO = 1000
+MAX_ERROS_RELATADOS = 100
+
+FORMATOS = {"csv", "jsonl"}
+
+_VERDADEIROS = {"1", "true", "sim", "s", "x", "yes", "y"}
+_FALSOS = {"0", "false", "nao", "não", "n", "no", ""}
+
+
+class ErroLinha(ValueError):
+    pass
+
+
+# Arquivo além do limite de linhas: a importação inteira é desfeita
+class LimiteExcedido(ValueError):
+    pass
+
+
+def _registros_csv(texto: IO[str]) -> Iterator[Tuple[int, dict]]:
+    leitor = csv.DictReader(texto)
+    for registro in leitor:
+        yield leitor.line_num, registro
+
+
+def _registros_jsonl(texto: IO[str]) -> Iterator[Tuple[int, dict]]:
+    for numero, linha in enumerate(texto, start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            yield numero, None
+            continue
+        yield numero, registro
+
+
+def _registros(arquivo: IO[bytes], formato: str) -> Iterator[Tuple[int, Optional[dict]]]:
+    # Lê o arquivo de forma incremental; utf-8-sig aceita planilhas salvas com BOM
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    return _registros_csv(texto) if formato == "csv" else _registros_jsonl(texto)
+
+
+def _ler_bool(valor) -> bool:
+    if isinstance(valor, bool) or valor is None:
+        return bool(valor)
+    if isinstance(valor, (int, float)):
+        return valor != 0
+    normalizado = str(valor).strip().lower()
+    if normalizado in _VERDADEIROS:
+        return True
+    if normalizado in _FALSOS:
+        return False
+    raise ErroLinha(f"Valor de 'comprado' inválido: {valor!r}")
+
+
+def _ler_item(registro: dict) -> Optional[dict]:
+    nome = registro.get("nome")
+    nome = nome.strip() if isinstance(nome, str) else None
+    if not nome:
+        return None
+    quantidade = registro.get("quantidade")
+    try:
+        quantidade = 1 if quantidade in (None, "") else int(quantidade)
+    except (TypeError, ValueError):
+        raise ErroLinha(f"Quantidade inválida: {quantidade!r}")
+    return {"nome": nome, "quantidade": quantidade, "comprado": _ler_bool(registro.get("comprado"))}
+
+
+class _Importador:
+    def __init__(self, db: Session, usuario_id: int, passo_ordem: int, max_linhas: Optional[int]):
+        self.db = db
+        self.usuario_id = usuario_id
+        self.passo_ordem = passo_ordem
+        self.max_linhas = max_linhas
+        self.pendentes = []
+        self.proxima_ordem: Dict[int, int] = {}
+        self.inicio = time.perf_counter()
+        self.relatorio = {"linhas": 0, "itens_importados": 0, "listas_criadas": 0, "total_erros": 0, "erros": []}
+
+    def contar_linha(self) -> None:
+        self.relatorio["linhas"] += 1
+        if self.max_linhas is not None and self.relatorio["linhas"] > self.max_linhas:
+            raise LimiteExcedido(f"Máximo de {self.max_linhas} linhas por importação")
+
+    def erro(self, numero: int, mensagem: str) -> None:
+        self.relatorio["total_erros"] += 1
+        if len(self.relatorio["erros"]) < MAX_ERROS_RELATADOS:
+            self.relatorio["erros"].append({"linha": numero, "erro": mensagem})
+
+    def adicionar(self, lista_id: int, item: dict) -> None:
+        # `ordem` atribuída em memória a partir de um único max(ordem) por lista
+        if lista_id not in self.proxima_ordem:
+            maior = self.db.query(func.max(Item.ordem)).filter(Item.lista_id == lista_id).scalar()
+            self.proxima_ordem[lista_id] = (maior + self.passo_ordem) if maior is not None else 0
+        item["lista_id"] = lista_id
+        item["ordem"] = self.proxima_ordem[lista_id]
+        self.proxima_ordem[lista_id] += self.passo_ordem
+        self.pendentes.append(item)
+        if len(self.pendentes) >= LOTE_IMPORTACAO:
+            self.gravar()
+
+    def gravar(self) -> None:
+        if self.pendentes:
+            self.db.execute(insert(Item.__table__), self.pendentes)
+            self.relatorio["itens_importados"] += len(self.pendentes)
+            self.pendentes = []
+
+    def concluir(self) -> dict:
+        self.gravar()
+        # Revisão de sincronização só agora, logo antes do commit: o lock do contador do usuário
+        # não fica preso enquanto o arquivo é lido. As linhas gravadas até aqui saíram com revisão
+        # 0; as listas a recebem no UPDATE de tocar_listas e os itens no UPDATE abaixo.
+        ids = list(self.proxima_ordem)
+        revisao = tocar_listas(self.db, self.usuario_id, ids)
+        if ids:
+            self.db.execute(
+                update(Item)
+                .where(Item.lista_id.in_(ids), Item.revisao == 0)
+                .values(revisao=revisao)
+                .execution_options(synchronize_session=False)
+            )
+        self.db.commit()
+        segundos = time.perf_counter() - self.inicio
+        self.relatorio["segundos"] = round(segundos, 4)
+        self.relatorio["linhas_por_segundo"] = round(self.relatorio["linhas"] / segundos, 1) if segundos else None
+        return self.relatorio
+
+
+# Itens no layout de exportar_lista (nome, quantidade, comprado), adicionados ao fim da lista
+def importar_itens(
+    db: Session,
+    usuario_id: int,
+    lista_id: int,
+    arquivo: IO[bytes],
+    formato: str,
+    passo_ordem: int,
+    max_linhas: Optional[int] = None,
+) -> dict:
+    importador = _Importador(db, usuario_id, passo_ordem, max_linhas)
+    try:
+        for numero, registro in _registros(arquivo, formato):
+            importador.contar_linha()
+            try:
+                if not isinstance(registro, dict):
+                    raise ErroLinha("Linha JSON inválida")
+                item = _ler_item(registro)
+                if item is None:
+                    raise ErroLinha("Nome do item é obrigatório")
+            except ErroLinha as exc:
+                importador.erro(numero, str(exc))
+                continue
+            importador.adicionar(lista_id, item)
+        return importador.concluir()
+    except Exception:
+        db.rollback()
+        raise
+
+
+# Histórico no layout de /api/historico/exportar: cada `lista_id` (ou nome de lista) de
+# origem vira uma nova lista finalizada do usuário; linhas sem nome de item criam só a lista.
+def importar_historico(
+    db: Session,
+    usuario_id: int,
+    arquivo: IO[bytes],
+    formato: str,
+    passo_ordem: int,
+    max_linhas: Optional[int] = None,
+) -> dict:
+    importador = _Importador(db, usuario_id, passo_ordem, max_linhas)
+    criadas: Dict[str, int] = {}
+    tabela = Lista.__table__
+    try:
+        for numero, registro in _registros(arquivo, formato):
+            importador.contar_linha()
+            try:
+                if not isinstance(registro, dict):
+                    raise ErroLinha("Linha JSON inválida")
+                nome_lista = registro.get("lista")
+                nome_lista = nome_lista.strip() if isinstance(nome_lista, str) else ""
+                if not nome_lista:
+                    raise ErroLinha("Nome da lista é obrigatório")
+                origem = str(registro.get("lista_id") or "") or f"nome:{nome_lista}"
+                item = _ler_item(registro)
+                lista_id = criadas.get(origem)
+                if lista_id is None:
+                    finalizada_em = registro.get("finalizada_em") or None
+                    try:
+                        finalizada_em = datetime.fromisoformat(finalizada_em) if finalizada_em else None
+                    except (TypeError, ValueError):
+                        raise ErroLinha(f"Data de finalização inválida: {finalizada_em!r}")
+                    lista_id = db.execute(
+                        insert(tabela)
+                        .values(usuario_id=usuario_id, nome=nome_lista, finalizada=True, finalizada_em=finalizada_em)
+                        .returning(tabela.c.id)
+                    ).scalar_one()
+                    criadas[origem] = lista_id
+                    importador.proxima_ordem[lista_id] = 0
+                    importador.relatorio["listas_criadas"] += 1
+            except ErroLinha as exc:
+                importador.erro(numero, str(exc))
+                continue
+            if item is not None:
+                importador.adicionar(lista_id, item)
+        return importador.concluir()
+    except Exception:
+        db.rollback()
+        raise
@@ -1,17 +1,64 @@
-from fastapi import FastAPI, HTTPException, Depends, Body, Query, status
+from fastapi import FastAPI, HTTPException, Depends, Body, Query, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import create_engine, func, text
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import Integer, case, create_engine, delete, false, func, insert, literal, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.orm import selectinload
+from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
+import asyncio
+import hashlib
+import inspect
+import math
 import os
+import secrets
+import tempfile
+import threading
+import time
+import unicodedata
 from dotenv import load_dotenv
-from typing import Generator, Optional, Tuple
+from urllib.parse import quote
+from typing import AsyncGenerator, Callable, Generator, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from models import Base, Lista, Item, Configuracao, Usuario
+from models import Base, Lista, Item, Configuracao, TokenRevogado, Usuario
+from banco import RodizioReplicas, aplicar_perfil_sqlite, estatisticas_pool, opcoes_engine, opcoes_pool
+from banco_async import criar_engine_async, rota_async
+from busca import obter_backend_busca
+from cache import CacheTTL
+from eventos import obter_barramento
+from metricas import Medicao, OrcamentoExcedido, medicao_atual, metricas_requisicoes, orcamento_consultas, texto_prometheus
+from senhas import PoolSaturado, PoolSenhas
+from consultas import (
+    COLUNAS_LISTA,
+    ORDEM_HISTORICO,
+    CursorInvalido,
+    alteracoes_desde,
+    carregar_previas,
+    codificar_cursor,
+    cursor_historico,
+    decodificar_cursor,
+    filtro_apos_cursor_historico,
+    filtro_prefixo,
+    itens_em_dicts,
+    listas_em_dicts,
+    paginar_listas,
+)
+from exportacao import FORMATOS as FORMATOS_EXPORTACAO, exportar_historico, exportar_itens
+from importacao import FORMATOS as FORMATOS_IMPORTACAO, LimiteExcedido, importar_historico, importar_itens
+from versoes import (
+    etag_confere,
+    nova_revisao,
+    registrar_exclusoes,
+    revisoes_sync,
+    tocar_listas,
+    validador_lista,
+    versao_colecao,
+    versao_lista,
+)
 
 # Carrega variáveis de ambiente (.env)
 load_dotenv()
@@ -28,18 +75,71 @@ APP_PRIVACY_URL = os.getenv("APP_PRIVACY_URL", APP_DOCS_URL)
 JWT_SECRET = os.getenv("JWT_SECRET", "change-me")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRES_DAYS = int(os.getenv("JWT_EXPIRES_DAYS", "30"))
-
-# Configuração do SQLAlchemy
-engine_kwargs = {"pool_pre_ping": True}
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args["check_same_thread"] = False
-engine = create_engine(DATABASE_URL, connect_args=connect_args, **engine_kwargs)
+HISTORICO_TOTAL_TTL = float(os.getenv("HISTORICO_TOTAL_TTL", "60"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "30"))
+AUTH_CACHE_MAX = int(os.getenv("AUTH_CACHE_MAX", "10000"))
+LOTE_MAX_OPERACOES = int(os.getenv("LOTE_MAX_OPERACOES", "500"))
+IMPORTACAO_MAX_BYTES = int(os.getenv("IMPORTACAO_MAX_BYTES", str(10 * 1024 * 1024)))
+IMPORTACAO_MAX_LINHAS = int(os.getenv("IMPORTACAO_MAX_LINHAS", "50000"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+SENHAS_WORKERS = int(os.getenv("SENHAS_WORKERS", "2"))
+SENHAS_FILA_MAX = int(os.getenv("SENHAS_FILA_MAX", "16"))
+# sync (padrão): rotas no threadpool; async: rotas de listas/itens/histórico sobre AsyncEngine
+DB_MODO = os.getenv("DB_MODO", "sync").strip().lower()
+if DB_MODO not in {"sync", "async"}:
+    raise RuntimeError(f"DB_MODO inválido: {DB_MODO}")
+# Réplicas de leitura (separadas por vírgula) e por quantos segundos, após uma escrita, as
+# leituras do mesmo cliente continuam no primário para enxergar o que ele acabou de gravar
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_JANELA_ESCRITA = float(os.getenv("REPLICA_JANELA_ESCRITA", "5"))
+# Intervalo de ping do /api/listas/{id}/stream sem alterações (mantém proxies com a conexão aberta)
+STREAM_PING_SEGUNDOS = float(os.getenv("STREAM_PING_SEGUNDOS", "25"))
+# ORCAMENTO_CONSULTAS=estrito (usado nos testes): a requisição que passar do orçamento de
+# consultas declarado na rota falha; fora dele o excesso só é contado em /api/metrics
+ORCAMENTO_CONSULTAS_ESTRITO = os.getenv("ORCAMENTO_CONSULTAS", "").strip().lower() == "estrito"
+# /api/metrics expõe rotas, latências e o estado dos pools: com METRICAS_TOKEN exige
+# `Authorization: Bearer <token>`; sem ele só responde a clientes na própria máquina
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "").strip()
+# Espaço entre valores de `ordem`: mover um item só grava a linha dele enquanto houver lacuna
+ORDEM_PASSO = 1024
+
+# Configuração do SQLAlchemy (pool e perfil SQLite via DB_POOL_* / SQLITE_*, ver banco.py)
+engine = create_engine(DATABASE_URL, **opcoes_engine(DATABASE_URL))
+aplicar_perfil_sqlite(engine, DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
-
-app = FastAPI(title="API Lista de Compras")
+# No modo async o engine síncrono continua atendendo login/cadastro, config, exportação e
+# importação; a verificação do token das rotas (get_current_user) já usa o engine async
+engine_async = criar_engine_async(DATABASE_URL, **opcoes_pool(DATABASE_URL)) if DB_MODO == "async" else None
+if engine_async:
+    aplicar_perfil_sqlite(engine_async.sync_engine, DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(bind=engine_async, autoflush=False) if engine_async else None
+replicas = RodizioReplicas(DATABASE_REPLICA_URLS, com_async=DB_MODO == "async")
+# Alterações das listas publicadas para o stream em tempo real (PUBSUB_BACKEND)
+barramento = obter_barramento()
+backend_busca = obter_backend_busca(engine.dialect.name)
+
+# orjson serializa as respostas (inclusive datetimes) bem mais rápido que o json da stdlib
+app = FastAPI(title="API Lista de Compras", default_response_class=ORJSONResponse)
 security = HTTPBearer(auto_error=False)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max iguais ao padrão: hashes com outro custo são marcados para regravação no login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+# bcrypt fora do threadpool das rotas, com fila limitada (429 quando cheia)
+pool_senhas = PoolSenhas(pwd_context, workers=SENHAS_WORKERS, fila_max=SENHAS_FILA_MAX)
+# Totais do histórico por filtro; limpo sempre que o conjunto de listas finalizadas muda
+historico_totais = CacheTTL(max_itens=256, ttl=HISTORICO_TOTAL_TTL)
+# Usuários já autenticados, por hash do token: evita decodificar o JWT e ir ao banco a cada requisição
+usuarios_autenticados = CacheTTL(max_itens=AUTH_CACHE_MAX, ttl=AUTH_CACHE_TTL)
+
+
+def limpar_caches() -> None:
+    historico_totais.limpar()
+    usuarios_autenticados.limpar()
 
 # Configuração CORS (simples) - ajustar conforme necessidade
 origins = ["*"]
@@ -49,6 +149,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Escrita-Em"],
 )
 
 # Dependência para obter sessão
@@ -59,29 +160,134 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+
+async def get_db_async() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+METODOS_LEITURA = {"GET", "HEAD", "OPTIONS"}
+# Instante (epoch) da última escrita do cliente. Vai com o próprio cliente, em cookie e em
+# header, e não em memória do processo: com vários workers a leitura seguinte pode cair em
+# outro processo, que só assim sabe que deve ler do primário.
+MARCA_ESCRITA_COOKIE = "escrita_em"
+MARCA_ESCRITA_HEADER = "X-Escrita-Em"
+
+
+def _ler_do_primario(request: Request) -> bool:
+    if not replicas:
+        return True
+    marca = request.headers.get(MARCA_ESCRITA_HEADER) or request.cookies.get(MARCA_ESCRITA_COOKIE)
+    try:
+        escrita_em = float(marca)
+    except (TypeError, ValueError):
+        return False
+    # abs(): relógios dos servidores levemente fora de sincronia não mandam a leitura à réplica
+    return abs(time.time() - escrita_em) < REPLICA_JANELA_ESCRITA
+
+
+@app.middleware("http")
+async def marcar_escritas(request: Request, call_next):
+    resposta = await call_next(request)
+    if replicas and request.method not in METODOS_LEITURA and resposta.status_code < 400:
+        marca = f"{time.time():.3f}"
+        resposta.headers[MARCA_ESCRITA_HEADER] = marca
+        resposta.set_cookie(
+            MARCA_ESCRITA_COOKIE, marca, max_age=math.ceil(REPLICA_JANELA_ESCRITA), httponly=True, samesite="lax"
+        )
+    return resposta
+
+
+# Latência, consultas e tempo de banco por rota (ver metricas.py). Declarada depois das demais,
+# envolve todas. Em respostas em streaming só conta o que rodou antes do primeiro byte.
+@app.middleware("http")
+async def medir_requisicoes(request: Request, call_next):
+    medicao = Medicao()
+    marcador = medicao_atual.set(medicao)
+    inicio = time.perf_counter()
+    try:
+        resposta = await call_next(request)
+    finally:
+        medicao_atual.reset(marcador)
+    duracao = time.perf_counter() - inicio
+    rota = getattr(request.scope.get("route"), "path", "-")
+    limite = getattr(request.scope.get("endpoint"), "orcamento_consultas", None)
+    excedeu = limite is not None and medicao.consultas > limite
+    metricas_requisicoes.registrar(request.method, rota, resposta.status_code, duracao, medicao, excedeu)
+    resposta.headers["Server-Timing"] = (
+        f'db;dur={medicao.tempo_db * 1000:.1f};desc="{medicao.consultas} consultas", total;dur={duracao * 1000:.1f}'
+    )
+    if excedeu and ORCAMENTO_CONSULTAS_ESTRITO:
+        raise OrcamentoExcedido(f"{request.method} {rota}: {medicao.consultas} consultas (orçamento {limite})")
+    return resposta
+
+
+# Sessão para rotas somente leitura: uma réplica, salvo logo após uma escrita do cliente.
+# Depende de get_db para respeitar overrides; a sessão primária só conecta se for usada.
+def get_db_leitura(request: Request, db: Session = Depends(get_db)) -> Generator[Session, None, None]:
+    if _ler_do_primario(request):
+        yield db
+        return
+    replica = replicas.sessao()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def get_db_async_leitura(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    fabrica = AsyncSessionLocal if _ler_do_primario(request) else replicas.sessao_async
+    async with fabrica() as db:
+        yield db
+
+
+def rota_banco(funcao: Callable) -> Callable:
+    # Em DB_MODO=async a rota vira corrotina com AsyncSession; a lógica é a mesma
+    if DB_MODO != "async":
+        return funcao
+    padrao = inspect.signature(funcao).parameters["db"].default
+    leitura = getattr(padrao, "dependency", None) is get_db_leitura
+    return rota_async(funcao, get_db_async_leitura if leitura else get_db_async)
+
 # Função util para converter modelo em dict
-def lista_to_dict(l: Lista, db: Session = None, incluir_itens: bool = False):
-    itens_count = 0
-    itens_preview = []
-    if db is not None:
-        itens_count = db.query(func.count(Item.id)).filter(Item.lista_id == l.id).scalar()
-        if incluir_itens:
-            itens_preview = (
-                db.query(Item)
-                .filter(Item.lista_id == l.id)
-                .order_by(Item.ordem.asc(), Item.criado_em.asc())
-                .limit(3)
-                .all()
-            )
-    return {
+def lista_to_dict(
+    l: Lista,
+    db: Session = None,
+    incluir_itens: bool = False,
+    *,
+    itens_count: Optional[int] = None,
+    itens_comprados: Optional[int] = None,
+    itens_preview: Optional[list] = None,
+):
+    # Contagens vindas da consulta (ou dos contadores da própria lista) dispensam contar itens
+    if itens_count is not None:
+        incluir_itens = incluir_itens or itens_preview is not None
+        itens_preview = itens_preview or []
+    elif db is not None and incluir_itens:
+        previa = carregar_previas(db, [l.id])[l.id]
+        itens_count, itens_preview = previa.total, previa.itens
+    else:
+        itens_count = l.itens_total or 0
+        itens_preview = []
+    dados = {
         "id": l.id,
         "nome": l.nome,
         "criado_em": l.criado_em.isoformat(),
         "finalizada": l.finalizada,
         "finalizada_em": l.finalizada_em.isoformat() if l.finalizada_em else None,
         "itens_count": itens_count,
-        "preview_itens": [item_to_dict(i) for i in itens_preview] if incluir_itens else None,
+        "preview_itens": itens_preview if incluir_itens else None,
     }
+    if itens_comprados is not None:
+        dados["itens_comprados"] = itens_comprados
+    return dados
+
+
+# Linha de COLUNAS_LISTA (consultas.py) no formato de lista_to_dict, sem passar pelo ORM; os
+# datetimes seguem como datetime e o orjson os escreve em ISO 8601. Usada pelas rotas que
+# devolvem muitas listas (listagem, histórico, sync).
+def linha_lista_to_dict(linha: dict, itens_preview: Optional[list] = None) -> dict:
+    return {**linha, "preview_itens": itens_preview}
 
 # Função para converter item em dict
 def item_to_dict(i: Item):
@@ -105,41 +311,93 @@ def usuario_to_dict(usuario: Usuario):
     }
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# Devolver a Response pronta dispensa o jsonable_encoder, que percorre cada valor do conteúdo
+# antes da serialização. Só para conteúdo já em tipos nativos; os headers definidos em
+# `response` (ETag) são copiados, pois o FastAPI os ignora quando a rota devolve uma Response.
+def _json(conteudo, response: Optional[Response] = None) -> ORJSONResponse:
+    return ORJSONResponse(conteudo, headers=dict(response.headers) if response is not None else None)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception:
-        return False
+def _erro_pool_saturado() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Muitas autenticações simultâneas; tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(days=JWT_EXPIRES_DAYS))
-    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
+    # jti distingue tokens emitidos no mesmo segundo (o logout de um não derruba o outro)
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc), "jti": secrets.token_urlsafe(12)})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
 ):
     if not credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Não autenticado")
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        sub = payload.get("sub")
-        user_id = int(sub)
-    except (JWTError, TypeError, ValueError):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-    usuario = db.query(Usuario).filter(Usuario.id == user_id).first()
-    if not usuario:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-    return usuario
+    return _usuario_do_token(credentials.credentials, db)
+
+
+# DB_MODO=async: a mesma verificação como corrotina, com a AsyncSession (run_sync). Sem isso a
+# dependência síncrona ocuparia uma thread do threadpool em toda requisição autenticada.
+async def _get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db_async),
+):
+    if not credentials:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Não autenticado")
+    return await db.run_sync(lambda sessao: _usuario_do_token(credentials.credentials, sessao))
+
+
+if DB_MODO == "async":
+    get_current_user = _get_current_user_async
+
+
+# Também usada pelo stream (WebSocket), que recebe o token fora do header Authorization
+def _usuario_do_token(token: str, db: Session) -> Usuario:
+    chave = _hash_token(token)
+    # O cache é por processo: após um logout atendido por outro worker, este ainda aceita o
+    # token até a entrada expirar (AUTH_CACHE_TTL, curto por isso). Fora do cache a revogação
+    # vem do banco, na mesma consulta do usuário.
+    principal = usuarios_autenticados.obter(chave)
+    if principal is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            sub = payload.get("sub")
+            user_id = int(sub)
+            expira_em = float(payload["exp"])
+        except (JWTError, KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
+        revogado = select(TokenRevogado.hash).where(TokenRevogado.hash == chave).exists()
+        usuario = db.query(Usuario).filter(Usuario.id == user_id, ~revogado).first()
+        if not usuario:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
+        principal = {
+            "id": usuario.id,
+            "nome": usuario.nome,
+            "email": usuario.email,
+            "criado_em": usuario.criado_em,
+            "exp": expira_em,
+        }
+        # Nunca guarda além da validade do próprio token
+        ttl = min(AUTH_CACHE_TTL, expira_em - datetime.now(timezone.utc).timestamp())
+        usuarios_autenticados.definir(chave, principal, ttl=ttl)
+    # Cópia desanexada da sessão: o objeto em cache é compartilhado entre requisições
+    return Usuario(
+        id=principal["id"],
+        nome=principal["nome"],
+        email=principal["email"],
+        criado_em=principal["criado_em"],
+    )
 
 
 def _obter_config(db: Session) -> Configuracao:
@@ -159,49 +417,138 @@ def _normalizar_email(raw_email: str) -> str:
 def _validar_senha(senha: str) -> bool:
     return bool(senha) and len(senha) >= 6
 
-# Endpoints de listas
+def _publicar(lista_id: int, tipo: str, **dados) -> None:
+    # Sempre depois do commit: quem acompanha a lista nunca recebe algo que foi desfeito
+    barramento.publicar(f"lista:{lista_id}", {"tipo": tipo, "lista_id": lista_id, **dados})
+
+
+# Filtro de itens cujas listas são do usuário (EXISTS na mesma consulta do item)
+def _da_lista_do_usuario(usuario: Usuario):
+    return Item.lista.has(Lista.usuario_id == usuario.id)
+
+
+def _nao_modificado(request: Request, response: Response, etag: str) -> Optional[Response]:
+    # ETag forte + no-cache: o cliente sempre revalida e recebe 304 se nada mudou
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_confere(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabecalhos)
+    response.headers.update(cabecalhos)
+    return None
+
+# Endpoints de listas (cada usuário só enxerga as próprias listas; listas de outro usuário
+# respondem 404). Os orçamentos de consultas contam a leitura do usuário em get_current_user,
+# feita quando o token ainda não está em `usuarios_autenticados`.
 
 @app.get("/api/listas")
-def listar_listas(db: Session = Depends(get_db)):
-    listas = db.query(Lista).order_by(Lista.criado_em.desc()).all()
-    return [lista_to_dict(l, db) for l in listas]
+@orcamento_consultas(4)
+@rota_banco
+def listar_listas(
+    request: Request,
+    response: Response,
+    previa: bool = Query(default=False, description="Inclui os 3 primeiros itens de cada lista"),
+    finalizada: Optional[bool] = Query(default=None, description="Filtra por status"),
+    nome: Optional[str] = Query(default=None, description="Prefixo do nome"),
+    limit: Optional[int] = Query(default=None, ge=1, le=100, description="Ativa paginação por cursor"),
+    cursor: Optional[str] = Query(default=None),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura),
+):
+    # Usuário e parâmetros entram no ETag: cada combinação é uma representação diferente
+    chave = hashlib.sha1(f"{usuario.id}:{versao_colecao(db, usuario.id)}?{request.url.query}".encode()).hexdigest()[:20]
+    nao_modificado = _nao_modificado(request, response, f'"listas-{chave}"')
+    if nao_modificado:
+        return nao_modificado
+
+    paginado = limit is not None or cursor is not None
+    limite = (limit or 20) if paginado else None
+    try:
+        linhas, proximo_cursor = paginar_listas(
+            db,
+            usuario.id,
+            limite=limite,
+            cursor=cursor,
+            finalizada=finalizada,
+            prefixo=(nome or "").strip() or None,
+        )
+    except CursorInvalido:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    previas = carregar_previas(db, [l["id"] for l in linhas]) if previa else {}
+    data = [linha_lista_to_dict(l, previas[l["id"]].itens if previa else None) for l in linhas]
+    if not paginado:
+        return _json(data, response)
+    return _json(
+        {
+            "data": data,
+            "meta": {
+                "limit": limite,
+                "next_cursor": proximo_cursor,
+                "has_more": proximo_cursor is not None,
+            },
+        },
+        response,
+    )
 
 @app.post("/api/listas")
-def criar_lista(payload: dict, db: Session = Depends(get_db)):
+@rota_banco
+def criar_lista(payload: dict, usuario: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
     nome = (payload.get("nome") or "").strip()
     if not nome:
         raise HTTPException(status_code=400, detail="Nome é obrigatório")
-    nova = Lista(nome=nome)
+    _travar_nomes_do_usuario(db, usuario.id)
+    nova_revisao(db, usuario.id)
+    nova = Lista(nome=nome, usuario_id=usuario.id)
     db.add(nova)
     db.commit()
     db.refresh(nova)
     return lista_to_dict(nova)
 
 @app.put("/api/listas/{lista_id}")
-def renomear_lista(lista_id: int, payload: dict, db: Session = Depends(get_db)):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
+@rota_banco
+def renomear_lista(
+    lista_id: int,
+    payload: dict,
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    lista = db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
     if not lista:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
     nome = (payload.get("nome") or "").strip()
     if not nome:
         raise HTTPException(status_code=400, detail="Nome é obrigatório")
+    _travar_nomes_do_usuario(db, usuario.id)
+    revisao = tocar_listas(db, usuario.id, [lista.id])
     lista.nome = nome
     db.commit()
     db.refresh(lista)
+    _publicar(lista.id, "lista_atualizada", revisao=revisao, nome=lista.nome)
     return lista_to_dict(lista)
 
 @app.delete("/api/listas/{lista_id}")
-def excluir_lista(lista_id: int, db: Session = Depends(get_db)):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
+@rota_banco
+def excluir_lista(lista_id: int, usuario: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+    lista = db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
     if not lista:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
+    registrar_exclusoes(db, "listas", [lista.id], usuario.id)
+    revisao = nova_revisao(db, usuario.id)
     db.delete(lista)
     db.commit()
+    historico_totais.limpar()
+    _publicar(lista_id, "lista_excluida", revisao=revisao)
     return {"ok": True}
 
 @app.post("/api/listas/{lista_id}/itens")
-def adicionar_item(lista_id: int, payload: dict, db: Session = Depends(get_db)):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
+@orcamento_consultas(8)
+@rota_banco
+def adicionar_item(
+    lista_id: int,
+    payload: dict,
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    lista = db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
     if not lista:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
     nome = (payload.get("nome") or "").strip()
@@ -209,37 +556,238 @@ def adicionar_item(lista_id: int, payload: dict, db: Session = Depends(get_db)):
     if not nome:
         raise HTTPException(status_code=400, detail="Nome do item é obrigatório")
     maior_ordem = db.query(func.max(Item.ordem)).filter(Item.lista_id == lista.id).scalar()
-    proxima_ordem = (maior_ordem + 1) if maior_ordem is not None else 0
+    proxima_ordem = (maior_ordem + ORDEM_PASSO) if maior_ordem is not None else 0
+    revisao = tocar_listas(db, usuario.id, [lista.id])
     item = Item(lista_id=lista.id, nome=nome, quantidade=int(qtd), ordem=proxima_ordem)
     db.add(item)
     db.commit()
     db.refresh(item)
-    return item_to_dict(item)
+    dados = item_to_dict(item)
+    _publicar(lista.id, "item_criado", revisao=revisao, item=dados)
+    return dados
 
 @app.get("/api/listas/{lista_id}/itens")
-def listar_itens(lista_id: int, db: Session = Depends(get_db)):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
+@orcamento_consultas(3)
+@rota_banco
+def listar_itens(
+    lista_id: int,
+    request: Request,
+    response: Response,
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura),
+):
+    versao = versao_lista(db, lista_id, usuario.id)
+    if versao is None:
+        raise HTTPException(status_code=404, detail="Lista não encontrada")
+    nao_modificado = _nao_modificado(request, response, f'"itens-{lista_id}-{versao}"')
+    if nao_modificado:
+        return nao_modificado
+    return _json(itens_em_dicts(db, Item.lista_id == lista_id), response)
+
+def _ler_quantidade(valor) -> int:
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError("Quantidade inválida")
+
+
+@app.post("/api/listas/{lista_id}/itens/batch")
+@orcamento_consultas(10)
+@rota_banco
+def processar_itens_em_lote(
+    lista_id: int,
+    payload: Optional[dict] = Body(default=None),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    lista = db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
     if not lista:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
-    itens = (
-        db.query(Item)
-        .filter(Item.lista_id == lista_id)
-        .order_by(Item.ordem.asc(), Item.criado_em.asc())
-        .all()
+    operacoes = payload.get("operacoes") if isinstance(payload, dict) else None
+    if not operacoes or not isinstance(operacoes, list):
+        raise HTTPException(status_code=400, detail="Informe uma lista de operações em 'operacoes'")
+    if len(operacoes) > LOTE_MAX_OPERACOES:
+        raise HTTPException(status_code=400, detail=f"Máximo de {LOTE_MAX_OPERACOES} operações por lote")
+
+    # Carrega de uma vez só os itens referenciados e o maior `ordem` atual
+    ids_referenciados = set()
+    for op in operacoes:
+        if isinstance(op, dict) and op.get("op") != "criar":
+            try:
+                ids_referenciados.add(int(op.get("id")))
+            except (TypeError, ValueError):
+                pass
+    estado = {}
+    if ids_referenciados:
+        existentes = db.query(Item).filter(Item.lista_id == lista_id, Item.id.in_(ids_referenciados)).all()
+        estado = {i.id: item_to_dict(i) for i in existentes}
+        # Só o snapshot em dict é usado daqui em diante; tirar os objetos da sessão evita que
+        # um id reaproveitado pelo INSERT (SQLite) seja confundido com um item excluído
+        for i in existentes:
+            db.expunge(i)
+    proxima_ordem = None
+
+    # Aplica as operações em ordem sobre o estado em memória; nada é gravado se alguma falhar
+    resultados, erros = [], []
+    novos, alterados, excluidos = [], set(), set()
+    for indice, op in enumerate(operacoes):
+        try:
+            if not isinstance(op, dict) or op.get("op") not in {"criar", "atualizar", "alternar", "excluir"}:
+                raise ValueError("Operação inválida. Use criar, atualizar, alternar ou excluir")
+            tipo = op["op"]
+            if tipo == "criar":
+                nome = (op.get("nome") or "").strip()
+                if not nome:
+                    raise ValueError("Nome do item é obrigatório")
+                if proxima_ordem is None:
+                    maior_ordem = db.query(func.max(Item.ordem)).filter(Item.lista_id == lista_id).scalar()
+                    proxima_ordem = (maior_ordem + ORDEM_PASSO) if maior_ordem is not None else 0
+                novos.append(
+                    {
+                        "lista_id": lista_id,
+                        "nome": nome,
+                        "quantidade": _ler_quantidade(op.get("quantidade") or 1),
+                        "comprado": bool(op.get("comprado", False)),
+                        "ordem": proxima_ordem,
+                    }
+                )
+                proxima_ordem += ORDEM_PASSO
+                resultados.append({"indice": indice, "op": tipo, "novo": len(novos) - 1})
+                continue
+
+            try:
+                item_id = int(op.get("id"))
+            except (TypeError, ValueError):
+                raise ValueError("ID de item inválido")
+            atual = estado.get(item_id)
+            if atual is None or item_id in excluidos:
+                raise LookupError("Item não encontrado")
+            if tipo == "excluir":
+                excluidos.add(item_id)
+                alterados.discard(item_id)
+                resultados.append({"indice": indice, "op": tipo, "id": item_id})
+                continue
+            if tipo == "alternar":
+                atual["comprado"] = not atual["comprado"]
+            else:
+                if "nome" in op:
+                    nome = (op.get("nome") or "").strip()
+                    if not nome:
+                        raise ValueError("Nome do item é obrigatório")
+                    atual["nome"] = nome
+                if "quantidade" in op and op.get("quantidade") is not None:
+                    atual["quantidade"] = _ler_quantidade(op.get("quantidade"))
+                if "comprado" in op:
+                    atual["comprado"] = bool(op.get("comprado"))
+            alterados.add(item_id)
+            resultados.append({"indice": indice, "op": tipo, "item": dict(atual)})
+        except (ValueError, LookupError) as exc:
+            erros.append({"indice": indice, "erro": str(exc)})
+
+    if erros:
+        raise HTTPException(
+            status_code=400,
+            detail={"mensagem": "Nenhuma operação foi aplicada", "erros": erros},
+        )
+
+    # Grava tudo na mesma transação com comandos em lote (executemany / IN / RETURNING)
+    try:
+        revisao = tocar_listas(db, usuario.id, [lista_id])
+        if alterados:
+            db.execute(
+                update(Item),
+                [
+                    {k: estado[iid][k] for k in ("id", "nome", "quantidade", "comprado")}
+                    for iid in alterados
+                ],
+            )
+        if excluidos:
+            registrar_exclusoes(db, "itens", excluidos, usuario.id, lista_id)
+            db.execute(
+                delete(Item).where(Item.id.in_(excluidos)).execution_options(synchronize_session=False)
+            )
+        criados = {}
+        if novos:
+            # INSERT ... RETURNING em lote; `ordem` é única entre os novos e associa cada linha ao pedido
+            retornados = db.scalars(insert(Item).returning(Item), novos).all()
+            criados = {i.ordem: item_to_dict(i) for i in retornados}
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for resultado in resultados:
+        if "novo" in resultado:
+            resultado["item"] = criados[novos[resultado.pop("novo")]["ordem"]]
+    _publicar(
+        lista_id,
+        "lote",
+        revisao=revisao,
+        criados=list(criados.values()),
+        atualizados=[estado[iid] for iid in alterados],
+        excluidos=sorted(excluidos),
     )
-    return [item_to_dict(i) for i in itens]
+    return {"resultados": resultados}
+
 
-def _gerar_nome_disponivel(db: Session, base: str, sufixo: str) -> str:
+def _gerar_nome_disponivel(db: Session, usuario_id: int, base: str, sufixo: str) -> str:
     nome_base = (base or "Lista").strip() or "Lista"
-    existente = db.query(Lista).filter(Lista.nome == nome_base).first()
-    if not existente:
+    com_sufixo = f"{nome_base} {sufixo}".strip()
+    prefixo_numerado = f"{com_sufixo} "
+    # Uma única consulta traz o nome base, "base sufixo" e todos os "base sufixo N" já usados
+    # pelo usuário (os nomes só precisam ser distintos entre as listas de cada um)
+    ocupados = set(
+        db.scalars(
+            select(Lista.nome)
+            .where(
+                Lista.usuario_id == usuario_id,
+                or_(
+                    Lista.nome.in_([nome_base, com_sufixo]),
+                    filtro_prefixo(db, Lista.nome, prefixo_numerado),
+                ),
+            )
+            .distinct()
+        )
+    )
+    if nome_base not in ocupados:
         return nome_base
+    if com_sufixo not in ocupados:
+        return com_sufixo
+    numeros = set()
+    for nome in ocupados:
+        resto = nome[len(prefixo_numerado):] if nome.startswith(prefixo_numerado) else ""
+        if resto.isascii() and resto.isdigit():
+            numeros.add(int(resto))
     contador = 2
-    candidato = f"{nome_base} {sufixo}".strip()
-    while db.query(Lista).filter(Lista.nome == candidato).first():
-        candidato = f"{nome_base} {sufixo} {contador}".strip()
+    while contador in numeros:
         contador += 1
-    return candidato
+    return f"{com_sufixo} {contador}"
+
+
+# Locks do processo por usuário (faixas por id: memória fixa, usuários distintos quase nunca esperam)
+_travas_nomes_local = tuple(threading.Lock() for _ in range(64))
+
+
+# Postgres: advisory lock da transação sobre os nomes de listas do usuário (liberado no
+# commit/rollback, vale entre workers). A chave é o usuário e não o nome base: restaurar "X"
+# e "X (restaurada)" sondam nomes que se sobrepõem. Criar e renomear também o tomam, para
+# não gravar um nome que uma clonagem em andamento acabou de escolher.
+def _travar_nomes_do_usuario(db: Session, usuario_id: int) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"listas.nome:{usuario_id}"))))
+
+
+@contextmanager
+def _trava_nome(db: Session, usuario_id: int):
+    # Serializa a geração de nome + commit entre clonagens concorrentes do mesmo usuário.
+    # Demais bancos (SQLite): lock do processo, já que lá as escritas são serializadas.
+    # Por bloquear a thread, restaurar/duplicar ficam fora do rota_banco (DB_MODO=async).
+    if db.get_bind().dialect.name == "postgresql":
+        _travar_nomes_do_usuario(db, usuario_id)
+        yield
+    else:
+        with _travas_nomes_local[usuario_id % len(_travas_nomes_local)]:
+            yield
 
 
 def _clonar_lista(
@@ -250,75 +798,195 @@ def _clonar_lista(
     sufixo: str,
     nome_forcado: Optional[str] = None,
 ) -> Lista:
-    nome_gerado = None
     if nome_forcado:
         nome_forcado = nome_forcado.strip()
         if not nome_forcado:
             raise HTTPException(status_code=400, detail="Nome informado é inválido")
-        conflito = db.query(Lista).filter(Lista.nome == nome_forcado).first()
-        nome_gerado = nome_forcado if not conflito else _gerar_nome_disponivel(db, nome_forcado, sufixo)
+        nome_gerado = _gerar_nome_disponivel(db, lista.usuario_id, nome_forcado, sufixo)
     else:
-        nome_gerado = _gerar_nome_disponivel(db, lista.nome, sufixo)
+        nome_gerado = _gerar_nome_disponivel(db, lista.usuario_id, lista.nome, sufixo)
 
-    nova = Lista(nome=nome_gerado, finalizada=False, finalizada_em=None)
+    nova_revisao(db, lista.usuario_id)
+    nova = Lista(usuario_id=lista.usuario_id, nome=nome_gerado, finalizada=False, finalizada_em=None)
     db.add(nova)
     db.flush()
 
-    itens_origem = (
-        db.query(Item)
-        .filter(Item.lista_id == lista.id)
-        .order_by(Item.ordem.asc(), Item.criado_em.asc())
-        .all()
-    )
-    for item in itens_origem:
-        clone = Item(
-            lista_id=nova.id,
-            nome=item.nome,
-            quantidade=item.quantidade,
-            comprado=False if resetar_compra else item.comprado,
-            ordem=item.ordem,
+    # Copia os itens no próprio banco (INSERT ... SELECT): nenhum Item passa pelo Python
+    origem = (
+        select(
+            literal(nova.id, type_=Integer),
+            Item.nome,
+            Item.quantidade,
+            false() if resetar_compra else Item.comprado,
+            Item.ordem,
         )
-        db.add(clone)
+        .where(Item.lista_id == lista.id)
+        .order_by(Item.ordem.asc(), Item.criado_em.asc(), Item.id.asc())
+    )
+    db.execute(
+        insert(Item.__table__).from_select(["lista_id", "nome", "quantidade", "comprado", "ordem"], origem)
+    )
     return nova
 
 
+def _ids_em_ordem(db: Session, lista_id: int) -> list:
+    return list(
+        db.scalars(
+            select(Item.id)
+            .where(Item.lista_id == lista_id)
+            .order_by(Item.ordem.asc(), Item.criado_em.asc(), Item.id.asc())
+        )
+    )
+
+
+# Grava `ordem` = posição * ORDEM_PASSO para todos os ids em um único UPDATE ... CASE
+def _regravar_ordens(db: Session, lista_id: int, ids_em_ordem: list) -> None:
+    if not ids_em_ordem:
+        return
+    novas = {iid: pos * ORDEM_PASSO for pos, iid in enumerate(ids_em_ordem)}
+    db.execute(
+        update(Item)
+        .where(Item.lista_id == lista_id, Item.id.in_(novas))
+        .values(ordem=case(novas, value=Item.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
 @app.put("/api/listas/{lista_id}/itens/ordenar")
-def reordenar_itens(lista_id: int, payload: dict, db: Session = Depends(get_db)):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
+@orcamento_consultas(6)
+@rota_banco
+def reordenar_itens(
+    lista_id: int,
+    payload: dict,
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    lista = db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
     if not lista:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
     nova_ordem = payload.get("ordem") if isinstance(payload, dict) else None
     if not nova_ordem or not isinstance(nova_ordem, list):
         raise HTTPException(status_code=400, detail="Informe uma lista de IDs em 'ordem'")
 
-    itens = db.query(Item).filter(Item.lista_id == lista_id).all()
-    itens_por_id = {i.id: i for i in itens}
+    ids_atuais = _ids_em_ordem(db, lista_id)
+    pertencentes = set(ids_atuais)
     ids_recebidos = []
+    vistos = set()
     for raw_id in nova_ordem:
         try:
             iid = int(raw_id)
         except (TypeError, ValueError):
             raise HTTPException(status_code=400, detail="IDs de item inválidos")
-        if iid not in itens_por_id:
+        if iid not in pertencentes:
             raise HTTPException(status_code=400, detail=f"Item {iid} não pertence à lista")
-        ids_recebidos.append(iid)
+        if iid not in vistos:
+            vistos.add(iid)
+            ids_recebidos.append(iid)
+
+    # Itens não informados seguem depois, na ordem em que já estavam
+    restantes = [iid for iid in ids_atuais if iid not in vistos]
+    revisao = tocar_listas(db, usuario.id, [lista_id])
+    _regravar_ordens(db, lista_id, ids_recebidos + restantes)
+    db.commit()
+    _publicar(lista_id, "itens_reordenados", revisao=revisao, ordem=ids_recebidos + restantes)
+    return {"ok": True}
+
 
-    for pos, iid in enumerate(ids_recebidos):
-        itens_por_id[iid].ordem = pos
+@app.put("/api/listas/{lista_id}/itens/{item_id}/mover")
+@orcamento_consultas(9)
+@rota_banco
+def mover_item(
+    lista_id: int,
+    item_id: int,
+    payload: Optional[dict] = Body(default=None),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    item = db.query(Item).filter(Item.id == item_id, Item.lista_id == lista_id, _da_lista_do_usuario(usuario)).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item não encontrado")
+    payload = payload if isinstance(payload, dict) else {}
+    if ("antes_de" in payload) == ("depois_de" in payload):
+        raise HTTPException(status_code=400, detail="Informe 'antes_de' ou 'depois_de'")
+    campo = "antes_de" if "antes_de" in payload else "depois_de"
+    referencia = None
+    if payload[campo] is not None:
+        try:
+            ref_id = int(payload[campo])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="ID de referência inválido")
+        referencia = db.query(Item).filter(Item.id == ref_id, Item.lista_id == lista_id).first()
+        if not referencia or referencia.id == item.id:
+            raise HTTPException(status_code=400, detail="Item de referência inválido")
+
+    # Vizinhos da nova posição (ignorando o próprio item): anterior < nova ordem < seguinte.
+    # Outro item com a mesma `ordem` da referência (itens antigos ficaram todos com 0) volta como
+    # vizinho de mesma ordem: sem lacuna, e a lista é redistribuída abaixo.
+    outros = db.query(Item.ordem).filter(Item.lista_id == lista_id, Item.id != item.id)
+    if campo == "depois_de" and referencia is None:
+        anterior, seguinte = None, outros.order_by(Item.ordem.asc()).limit(1).scalar()
+    elif campo == "antes_de" and referencia is None:
+        anterior, seguinte = outros.order_by(Item.ordem.desc()).limit(1).scalar(), None
+    elif campo == "depois_de":
+        anterior = referencia.ordem
+        seguinte = (
+            outros.filter(Item.id != referencia.id, Item.ordem >= anterior)
+            .order_by(Item.ordem.asc())
+            .limit(1)
+            .scalar()
+        )
+    else:
+        seguinte = referencia.ordem
+        anterior = (
+            outros.filter(Item.id != referencia.id, Item.ordem <= seguinte)
+            .order_by(Item.ordem.desc())
+            .limit(1)
+            .scalar()
+        )
 
-    restantes = [i for i in itens if i.id not in ids_recebidos]
-    restantes.sort(key=lambda it: (it.ordem, it.criado_em))
-    offset = len(ids_recebidos)
-    for idx, item in enumerate(restantes):
-        item.ordem = offset + idx
+    if anterior is None and seguinte is None:
+        nova = item.ordem
+    elif anterior is None:
+        nova = seguinte - ORDEM_PASSO
+    elif seguinte is None:
+        nova = anterior + ORDEM_PASSO
+    elif seguinte - anterior > 1:
+        nova = (anterior + seguinte) // 2
+    else:
+        nova = None
 
+    revisao = tocar_listas(db, usuario.id, [lista_id])
+    if nova is not None:
+        item.ordem = nova
+    else:
+        # Sem lacuna entre os vizinhos: redistribui a lista inteira com ORDEM_PASSO (raro)
+        ids = [iid for iid in _ids_em_ordem(db, lista_id) if iid != item.id]
+        if referencia is None:
+            posicao = 0 if campo == "depois_de" else len(ids)
+        else:
+            posicao = ids.index(referencia.id) + (1 if campo == "depois_de" else 0)
+        ids.insert(posicao, item.id)
+        _regravar_ordens(db, lista_id, ids)
     db.commit()
-    return {"ok": True}
+    db.refresh(item)
+    dados = item_to_dict(item)
+    if nova is not None:
+        _publicar(lista_id, "item_movido", revisao=revisao, id=item.id, ordem=item.ordem)
+    else:
+        _publicar(lista_id, "itens_reordenados", revisao=revisao, ordem=ids)
+    return dados
 
 
 @app.put("/api/listas/{lista_id}/itens/{item_id}")
-def atualizar_item(lista_id: int, item_id: int, payload: dict, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id, Item.lista_id == lista_id).first()
+@rota_banco
+def atualizar_item(
+    lista_id: int,
+    item_id: int,
+    payload: dict,
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    item = db.query(Item).filter(Item.id == item_id, Item.lista_id == lista_id, _da_lista_do_usuario(usuario)).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item não encontrado")
     if "nome" in payload:
@@ -332,36 +1000,121 @@ def atualizar_item(lista_id: int, item_id: int, payload: dict, db: Session = Dep
             item.quantidade = int(qtd)
     if "comprado" in payload:
         item.comprado = bool(payload.get("comprado"))
+    revisao = tocar_listas(db, usuario.id, [lista_id])
     db.commit()
     db.refresh(item)
-    return item_to_dict(item)
+    dados = item_to_dict(item)
+    _publicar(lista_id, "item_atualizado", revisao=revisao, item=dados)
+    return dados
 
 @app.delete("/api/listas/{lista_id}/itens/{item_id}")
-def excluir_item(lista_id: int, item_id: int, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id, Item.lista_id == lista_id).first()
+@rota_banco
+def excluir_item(
+    lista_id: int,
+    item_id: int,
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    item = db.query(Item).filter(Item.id == item_id, Item.lista_id == lista_id, _da_lista_do_usuario(usuario)).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item não encontrado")
+    revisao = tocar_listas(db, usuario.id, [lista_id])
+    registrar_exclusoes(db, "itens", [item.id], usuario.id, lista_id)
     db.delete(item)
     db.commit()
+    _publicar(lista_id, "item_excluido", revisao=revisao, id=item_id)
     return {"ok": True}
 
 @app.get("/api/listas/{lista_id}/resumo")
-def resumo_lista(lista_id: int, db: Session = Depends(get_db)):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
-    if not lista:
+@orcamento_consultas(2)
+@rota_banco
+def resumo_lista(
+    lista_id: int,
+    request: Request,
+    response: Response,
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura),
+):
+    # Versão e contadores na mesma linha: o resumo é uma leitura só, sem contar itens
+    linha = db.execute(
+        select(Lista.revisao, Lista.versao, Lista.itens_total, Lista.itens_comprados).where(
+            Lista.id == lista_id, Lista.usuario_id == usuario.id
+        )
+    ).first()
+    if linha is None:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
-    total = db.query(func.count(Item.id)).filter(Item.lista_id == lista_id).scalar() or 0
-    comprados = db.query(func.count(Item.id)).filter(Item.lista_id == lista_id, Item.comprado == True).scalar() or 0
-    return {"id": lista.id, "itens": total, "comprados": comprados}
+    revisao, versao, total, comprados = linha
+    nao_modificado = _nao_modificado(request, response, f'"resumo-{lista_id}-{validador_lista(revisao, versao)}"')
+    if nao_modificado:
+        return nao_modificado
+    return {"id": lista_id, "itens": total, "comprados": comprados}
+
+
+@app.websocket("/api/listas/{lista_id}/stream")
+async def acompanhar_lista(
+    websocket: WebSocket,
+    lista_id: int,
+    token: Optional[str] = Query(default=None, description="Token de acesso (o WebSocket do navegador não envia headers)"),
+    db: Session = Depends(get_db),
+):
+    # Envia as alterações da lista assim que confirmadas (mensagens com `tipo`, `lista_id` e,
+    # quando houver, `revisao`). `resincronizar` indica mensagens perdidas: recarregue via
+    # /api/sync ou /itens. A sessão só é usada para validar token e lista e é fechada em seguida.
+    # Sem token válido fecha com 4401; lista inexistente ou de outro usuário, com 4404.
+    autorizacao = websocket.headers.get("authorization") or ""
+    token = token or (autorizacao[7:] if autorizacao.lower().startswith("bearer ") else None)
+
+    def validar():
+        try:
+            usuario = _usuario_do_token(token, db) if token else None
+        except HTTPException:
+            usuario = None
+        if usuario is None:
+            return 4401
+        existe = db.query(Lista.id).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
+        return None if existe else 4404
+
+    recusa = await run_in_threadpool(validar)
+    await run_in_threadpool(db.close)
+    # Aceita antes de recusar: fechar durante o handshake vira um 403 HTTP no uvicorn e o
+    # navegador só enxerga o código 1006, sem saber que não adianta reconectar
+    await websocket.accept()
+    if recusa:
+        await websocket.close(code=recusa)
+        return
+    async with barramento.assinar(f"lista:{lista_id}") as assinatura:
+        await websocket.send_json({"tipo": "inscrito", "lista_id": lista_id})
+        # Lê o socket em paralelo só para perceber a desconexão do cliente
+        leitura = asyncio.ensure_future(websocket.receive())
+        try:
+            while True:
+                proxima = asyncio.ensure_future(assinatura.proxima(timeout=STREAM_PING_SEGUNDOS))
+                await asyncio.wait({leitura, proxima}, return_when=asyncio.FIRST_COMPLETED)
+                if leitura.done():
+                    if leitura.result()["type"] == "websocket.disconnect":
+                        proxima.cancel()
+                        break
+                    leitura = asyncio.ensure_future(websocket.receive())
+                if proxima.done():
+                    await websocket.send_json(proxima.result() or {"tipo": "ping"})
+                else:
+                    proxima.cancel()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            leitura.cancel()
 
 
 @app.post("/api/listas/{lista_id}/finalizar")
+@orcamento_consultas(7)
+@rota_banco
 def finalizar_lista(
     lista_id: int,
     payload: Optional[dict] = Body(default=None),
+    usuario: Usuario = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
+    lista = db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
     if not lista:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
 
@@ -377,46 +1130,117 @@ def finalizar_lista(
         lista.finalizada = False
         lista.finalizada_em = None
 
+    revisao = tocar_listas(db, usuario.id, [lista.id])
     db.commit()
+    historico_totais.limpar()
     db.refresh(lista)
+    _publicar(
+        lista.id,
+        "lista_atualizada",
+        revisao=revisao,
+        finalizada=lista.finalizada,
+        finalizada_em=lista.finalizada_em.isoformat() if lista.finalizada_em else None,
+    )
     return lista_to_dict(lista, db)
 
 
+def _resposta_exportacao(conteudo, formato: str, nome_base: str) -> StreamingResponse:
+    media_type, extensao = FORMATOS_EXPORTACAO[formato]
+    nome = f"{nome_base}.{extensao}"
+    # Headers só aceitam latin-1: `filename` vai sem acentos e `filename*` (RFC 6266) leva o nome em UTF-8
+    em_ascii = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode("ascii").replace('"', "")
+    headers = {"Content-Disposition": f"attachment; filename=\"{em_ascii}\"; filename*=UTF-8''{quote(nome)}"}
+    return StreamingResponse(conteudo, media_type=f"{media_type}; charset=utf-8", headers=headers)
+
+
 @app.get("/api/listas/{lista_id}/exportar")
-def exportar_lista(lista_id: int, formato: str = "txt", db: Session = Depends(get_db)):
-    lista = db.query(Lista).filter(Lista.id == lista_id).first()
+def exportar_lista(
+    lista_id: int,
+    formato: str = "txt",
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura),
+):
+    lista = db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
     if not lista:
         raise HTTPException(status_code=404, detail="Lista não encontrada")
-    itens = (
-        db.query(Item)
-        .filter(Item.lista_id == lista_id)
-        .order_by(Item.ordem.asc(), Item.criado_em.asc())
-        .all()
-    )
+    formato = formato.lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        formato = "txt"
 
     nome_base = f"lista-{lista_id}-{lista.nome.strip().lower().replace(' ', '-') or 'itens'}"
+    return _resposta_exportacao(exportar_itens(db, lista, formato), formato, nome_base)
+
+
+def _arquivo_grande_demais() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Arquivo maior que {IMPORTACAO_MAX_BYTES} bytes")
 
-    if formato.lower() == "csv":
-        linhas = ["nome,quantidade,comprado"]
-        for item in itens:
-            nome_csv = item.nome.replace('"', '""')
-            linhas.append(
-                f'"{nome_csv}",{item.quantidade},{1 if item.comprado else 0}'
-            )
-        conteudo = "\n".join(linhas)
-        media_type = "text/csv"
-        filename = f"{nome_base}.csv"
-    else:
-        linhas = [f"Lista: {lista.nome}", ""]
-        for idx, item in enumerate(itens, start=1):
-            marcador = "[x]" if item.comprado else "[ ]"
-            linhas.append(f"{idx:02d}. {marcador} {item.nome} (x{item.quantidade})")
-        conteudo = "\n".join(linhas)
-        media_type = "text/plain"
-        filename = f"{nome_base}.txt"
 
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return PlainTextResponse(content=conteudo, media_type=media_type, headers=headers)
+async def _receber_upload(request: Request):
+    # Copia o corpo em pedaços para um arquivo temporário (em memória até 1 MB, depois em disco).
+    # O Content-Length declarado recusa antes de ler; sem ele (chunked), o corte é na contagem.
+    declarado = request.headers.get("content-length")
+    if declarado and declarado.isdigit() and int(declarado) > IMPORTACAO_MAX_BYTES:
+        raise _arquivo_grande_demais()
+    arquivo = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    recebidos = 0
+    async for pedaco in request.stream():
+        recebidos += len(pedaco)
+        if recebidos > IMPORTACAO_MAX_BYTES:
+            arquivo.close()
+            raise _arquivo_grande_demais()
+        arquivo.write(pedaco)
+    arquivo.seek(0)
+    return arquivo
+
+
+# A importação desfaz tudo (rollback) antes de LimiteExcedido chegar aqui
+async def _importar(funcao, *args):
+    try:
+        return await run_in_threadpool(funcao, *args, ORDEM_PASSO, IMPORTACAO_MAX_LINHAS)
+    except LimiteExcedido as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+
+
+def _validar_formato_importacao(formato: str) -> str:
+    formato = (formato or "").lower()
+    if formato not in FORMATOS_IMPORTACAO:
+        raise HTTPException(status_code=400, detail="Formato inválido. Use 'csv' ou 'jsonl'.")
+    return formato
+
+
+@app.post("/api/listas/{lista_id}/importar")
+async def importar_itens_lista(
+    lista_id: int,
+    request: Request,
+    formato: str = Query(default="csv", description="csv|jsonl"),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    formato = _validar_formato_importacao(formato)
+    lista = await run_in_threadpool(
+        lambda: db.query(Lista).filter(Lista.id == lista_id, Lista.usuario_id == usuario.id).first()
+    )
+    if not lista:
+        raise HTTPException(status_code=404, detail="Lista não encontrada")
+    with await _receber_upload(request) as arquivo:
+        relatorio = await _importar(importar_itens, db, usuario.id, lista_id, arquivo, formato)
+    if relatorio["itens_importados"]:
+        _publicar(lista_id, "itens_importados", quantidade=relatorio["itens_importados"])
+    return relatorio
+
+
+@app.post("/api/historico/importar")
+async def importar_historico_completo(
+    request: Request,
+    formato: str = Query(default="jsonl", description="jsonl|csv"),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    formato = _validar_formato_importacao(formato)
+    with await _receber_upload(request) as arquivo:
+        relatorio = await _importar(importar_historico, db, usuario.id, arquivo, formato)
+    historico_totais.limpar()
+    return relatorio
 
 
 @app.get("/api/config")
@@ -461,13 +1285,47 @@ def healthcheck(db: Session = Depends(get_db)):
     return {
         "status": status,
         "database": db_ok,
+        "senhas": pool_senhas.estatisticas(),
+        "pool": estatisticas_pool(engine),
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
 
+def _acesso_metricas(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)) -> None:
+    if METRICAS_TOKEN:
+        recebido = credentials.credentials if credentials else ""
+        if not secrets.compare_digest(recebido.encode(), METRICAS_TOKEN.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token de métricas inválido",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    elif request.client is None or request.client.host not in {"127.0.0.1", "::1"}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Defina METRICAS_TOKEN para acessar as métricas")
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse, dependencies=[Depends(_acesso_metricas)])
+def metricas():
+    pool = estatisticas_pool(engine)
+    senhas = pool_senhas.estatisticas()
+    medidores = {
+        "app_db_pool_checkouts_total": ("Conexões entregues pelo pool do primário.", pool["checkouts"]),
+        "app_db_pool_espera_segundos_total": ("Tempo esperando conexão livre no pool.", pool["espera_total_s"]),
+        "app_db_pool_timeouts_total": ("Checkouts que estouraram DB_POOL_TIMEOUT.", pool["timeouts"]),
+        "app_db_pool_em_uso": ("Conexões do pool em uso.", pool.get("em_uso")),
+        "app_db_pool_saturacao": ("Fração da capacidade do pool em uso.", pool.get("saturacao")),
+        "app_senhas_em_execucao": ("Hashes bcrypt em execução.", senhas["em_execucao"]),
+        "app_senhas_na_fila": ("Hashes bcrypt aguardando um worker.", senhas["na_fila"]),
+        "app_senhas_rejeitadas_total": ("Autenticações recusadas com 429 pela fila cheia.", senhas["rejeitadas"]),
+    }
+    return PlainTextResponse(texto_prometheus(medidores), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.post("/auth/register", status_code=status.HTTP_201_CREATED)
 @app.post("/api/auth/register", status_code=status.HTTP_201_CREATED)
-def registrar_usuario(payload: Optional[dict] = Body(default=None), db: Session = Depends(get_db)):
+async def registrar_usuario(payload: Optional[dict] = Body(default=None), db: Session = Depends(get_db)):
+    # Rotas async: o acesso ao banco vai para o threadpool e o bcrypt para o pool_senhas,
+    # então nenhuma thread do servidor fica parada esperando o hash
     if not isinstance(payload, dict):
         raise HTTPException(status_code=400, detail="Dados inválidos")
     nome = (payload.get("nome") or "").strip()
@@ -475,19 +1333,27 @@ def registrar_usuario(payload: Optional[dict] = Body(default=None), db: Session
     senha = (payload.get("senha") or "").strip()
     if not nome or not email or not _validar_senha(senha):
         raise HTTPException(status_code=400, detail="Dados inválidos")
-    existente = db.query(Usuario).filter(Usuario.email == email).first()
+    existente = await run_in_threadpool(lambda: db.query(Usuario.id).filter(Usuario.email == email).first())
     if existente:
         raise HTTPException(status_code=400, detail="Email já utilizado")
-    usuario = Usuario(nome=nome, email=email, senha_hash=get_password_hash(senha))
-    db.add(usuario)
-    db.commit()
-    db.refresh(usuario)
-    return usuario_to_dict(usuario)
+    try:
+        senha_hash = await pool_senhas.gerar_hash(senha)
+    except PoolSaturado:
+        raise _erro_pool_saturado()
+
+    def criar():
+        usuario = Usuario(nome=nome, email=email, senha_hash=senha_hash)
+        db.add(usuario)
+        db.commit()
+        db.refresh(usuario)
+        return usuario_to_dict(usuario)
+
+    return await run_in_threadpool(criar)
 
 
 @app.post("/auth/login")
 @app.post("/api/auth/login")
-def login(payload: Optional[dict] = Body(default=None), db: Session = Depends(get_db)):
+async def login(payload: Optional[dict] = Body(default=None), db: Session = Depends(get_db)):
     erro = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
     if not isinstance(payload, dict):
         raise erro
@@ -495,9 +1361,22 @@ def login(payload: Optional[dict] = Body(default=None), db: Session = Depends(ge
     senha = (payload.get("senha") or "").strip()
     if not email or not senha:
         raise erro
-    usuario = db.query(Usuario).filter(Usuario.email == email).first()
-    if not usuario or not verify_password(senha, usuario.senha_hash):
+    usuario = await run_in_threadpool(lambda: db.query(Usuario).filter(Usuario.email == email).first())
+    if not usuario:
+        raise erro
+    try:
+        valida, novo_hash = await pool_senhas.verificar(senha, usuario.senha_hash)
+    except PoolSaturado:
+        raise _erro_pool_saturado()
+    if not valida:
         raise erro
+    if novo_hash:
+        # Custo do bcrypt mudou (BCRYPT_ROUNDS): regrava o hash com a senha em mãos
+        def regravar():
+            db.execute(update(Usuario).where(Usuario.id == usuario.id).values(senha_hash=novo_hash))
+            db.commit()
+
+        await run_in_threadpool(regravar)
     token = create_access_token({"sub": str(usuario.id)})
     return {"access_token": token, "token_type": "bearer"}
 
@@ -510,7 +1389,24 @@ def obter_usuario_logado(usuario: Usuario = Depends(get_current_user)):
 
 @app.post("/auth/logout")
 @app.post("/api/auth/logout")
-def logout(_: Usuario = Depends(get_current_user)):
+def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    _: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    chave = _hash_token(credentials.credentials)
+    principal = usuarios_autenticados.obter(chave) or {}
+    expira_em = principal.get("exp") or (datetime.now(timezone.utc) + timedelta(days=JWT_EXPIRES_DAYS)).timestamp()
+    agora = datetime.now(timezone.utc)
+    # Revogações de tokens já expirados não servem para mais nada
+    db.execute(delete(TokenRevogado).where(TokenRevogado.expira_em <= agora))
+    db.add(TokenRevogado(hash=chave, expira_em=datetime.fromtimestamp(expira_em, timezone.utc)))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Logout simultâneo do mesmo token: o outro já gravou a revogação
+        db.rollback()
+    usuarios_autenticados.remover(chave)
     return {"ok": True}
 
 
@@ -537,74 +1433,97 @@ def _aplicar_periodo(periodo: str, data_inicio: Optional[str], data_fim: Optiona
 
 
 @app.get("/api/historico")
+@orcamento_consultas(4)
+@rota_banco
 def listar_historico(
-    busca: Optional[str] = Query(default=None, description="Filtro por nome"),
+    busca: Optional[str] = Query(default=None, description="Filtro por nome da lista ou de seus itens"),
     periodo: str = Query(default="30d", description="7d|30d|custom"),
     data_inicio: Optional[str] = Query(default=None),
     data_fim: Optional[str] = Query(default=None),
     page: int = Query(default=1, ge=1),
     limit: int = Query(default=9, ge=1, le=50),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(default=None, description="Ativa paginação por cursor"),
+    modo: str = Query(default="page", description="page|cursor"),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura),
 ):
-    query = db.query(Lista).filter(Lista.finalizada == True)
-    if busca:
-        like = f"%{busca.strip()}%"
-        query = query.filter(Lista.nome.ilike(like))
+    filtros = [Lista.usuario_id == usuario.id, Lista.finalizada == True]
+    termo = (busca or "").strip()
+    if termo:
+        filtros.append(backend_busca.filtro(termo))
 
     inicio, fim = _aplicar_periodo(periodo, data_inicio, data_fim)
     if inicio:
-        query = query.filter(Lista.finalizada_em >= inicio)
+        filtros.append(Lista.finalizada_em >= inicio)
     if fim:
-        query = query.filter(Lista.finalizada_em <= fim)
-
-    total = query.count()
-    offset = (page - 1) * limit
-    listas_page = (
-        query.order_by(Lista.finalizada_em.desc().nullslast(), Lista.criado_em.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-    ids = [l.id for l in listas_page]
-    itens_map = {i: [] for i in ids}
-    if ids:
-        itens = (
-            db.query(Item)
-            .filter(Item.lista_id.in_(ids))
-            .order_by(Item.lista_id.asc(), Item.ordem.asc(), Item.criado_em.asc())
-            .all()
-        )
-        for item in itens:
-            if len(itens_map[item.lista_id]) < 3:
-                itens_map[item.lista_id].append(item_to_dict(item))
+        filtros.append(Lista.finalizada_em <= fim)
 
+    def contar() -> int:
+        return db.scalar(select(func.count()).select_from(Lista).where(*filtros))
+
+    # Total em cache por filtro (períodos relativos usam a chave textual; o TTL limita o desvio).
+    # Com `busca` o total depende dos nomes das listas e dos itens, que mudam em rotas que não
+    # limpam o cache: nesse caso é sempre contado.
+    if termo:
+        total = contar()
+    else:
+        chave_total = (usuario.id, (periodo or "30d").lower(), data_inicio, data_fim)
+        total = historico_totais.obter_ou_calcular(chave_total, contar)
+
+    modo_cursor = cursor is not None or modo == "cursor"
+    consulta = select(*COLUNAS_LISTA).where(*filtros).order_by(*ORDEM_HISTORICO)
+    if modo_cursor:
+        if cursor:
+            try:
+                consulta = consulta.where(filtro_apos_cursor_historico(cursor))
+            except CursorInvalido:
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+    else:
+        consulta = consulta.offset((page - 1) * limit)
+
+    # Busca uma linha a mais para saber se existe próxima página sem depender do total
+    listas_page = listas_em_dicts(db, consulta.limit(limit + 1))
+    has_more = len(listas_page) > limit
+    listas_page = listas_page[:limit]
+    previas = carregar_previas(db, [l["id"] for l in listas_page])
     data = []
-    for lista in listas_page:
-        info = lista_to_dict(lista, db)
-        info["preview_itens"] = itens_map.get(lista.id, [])
-        data.append(info)
+    for linha in listas_page:
+        previa = previas[linha["id"]]
+        # Contagens da prévia, lidas dos itens na mesma consulta
+        linha |= {"itens_count": previa.total, "itens_comprados": previa.comprados}
+        data.append(linha_lista_to_dict(linha, previa.itens))
+
+    meta = {"total": total, "limit": limit, "has_more": has_more}
+    if modo_cursor:
+        meta["next_cursor"] = cursor_historico(listas_page[-1]) if has_more else None
+    else:
+        meta["page"] = page
+    return _json({"data": data, "meta": meta})
 
-    return {
-        "data": data,
-        "meta": {
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "has_more": offset + len(listas_page) < total,
-        },
-    }
+
+@app.get("/api/historico/exportar")
+def exportar_historico_completo(
+    formato: str = Query(default="jsonl", description="jsonl|csv"),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura),
+):
+    formato = formato.lower()
+    if formato not in {"jsonl", "csv"}:
+        raise HTTPException(status_code=400, detail="Formato inválido. Use 'jsonl' ou 'csv'.")
+    return _resposta_exportacao(exportar_historico(db, usuario.id, formato), formato, "historico-listas")
 
 
 @app.post("/api/historico/restaurar/{lista_id}")
+@orcamento_consultas(8)
 def restaurar_lista(
     lista_id: int,
     payload: Optional[dict] = Body(default=None),
+    usuario: Usuario = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     lista = (
         db.query(Lista)
-        .options(selectinload(Lista.itens))
-        .filter(Lista.id == lista_id, Lista.finalizada == True)
+        .filter(Lista.id == lista_id, Lista.usuario_id == usuario.id, Lista.finalizada == True)
         .first()
     )
     if not lista:
@@ -615,26 +1534,29 @@ def restaurar_lista(
         nome_custom = payload.get("nome")
 
     try:
-        nova = _clonar_lista(db, lista, resetar_compra=True, sufixo="(restaurada)", nome_forcado=nome_custom)
-        db.commit()
+        with _trava_nome(db, usuario.id):
+            nova = _clonar_lista(db, lista, resetar_compra=True, sufixo="(restaurada)", nome_forcado=nome_custom)
+            db.commit()
     except Exception:
         db.rollback()
         raise
+    historico_totais.limpar()
 
     db.refresh(nova)
     return lista_to_dict(nova, db)
 
 
 @app.post("/api/historico/duplicar/{lista_id}")
+@orcamento_consultas(8)
 def duplicar_lista(
     lista_id: int,
     payload: Optional[dict] = Body(default=None),
+    usuario: Usuario = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     lista = (
         db.query(Lista)
-        .options(selectinload(Lista.itens))
-        .filter(Lista.id == lista_id, Lista.finalizada == True)
+        .filter(Lista.id == lista_id, Lista.usuario_id == usuario.id, Lista.finalizada == True)
         .first()
     )
     if not lista:
@@ -645,8 +1567,9 @@ def duplicar_lista(
         nome_custom = payload.get("nome")
 
     try:
-        nova = _clonar_lista(db, lista, resetar_compra=False, sufixo="(cópia)", nome_forcado=nome_custom)
-        db.commit()
+        with _trava_nome(db, usuario.id):
+            nova = _clonar_lista(db, lista, resetar_compra=False, sufixo="(cópia)", nome_forcado=nome_custom)
+            db.commit()
     except Exception:
         db.rollback()
         raise
@@ -654,6 +1577,39 @@ def duplicar_lista(
     db.refresh(nova)
     return lista_to_dict(nova, db)
 
+@app.get("/api/sync")
+@orcamento_consultas(5)
+@rota_banco
+def sincronizar(
+    since: Optional[str] = Query(default=None, description="Token devolvido pela sincronização anterior"),
+    usuario: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura),
+):
+    # Sem `since`: carga completa. Com `since`: só listas/itens alterados depois dele e os
+    # ids excluídos (aplicar `excluidos` antes de `listas`/`itens`). Listas com itens
+    # alterados também voltam, com as contagens atualizadas.
+    desde = None
+    if since:
+        try:
+            (desde,) = decodificar_cursor(since, (int,))
+        except CursorInvalido:
+            raise HTTPException(status_code=400, detail="Token de sincronização inválido")
+    ate, expurgada = revisoes_sync(db, usuario.id)
+    # Token anterior ao expurgo das lápides (exclusoes.py): as exclusões desde ele já não
+    # existem, então vai a carga completa com `completo: true` e o cliente descarta o que tinha
+    if desde is not None and desde < expurgada:
+        desde = None
+    alteracoes = alteracoes_desde(db, usuario.id, desde, ate)
+    return _json(
+        {
+            "token": codificar_cursor(ate),
+            "completo": desde is None,
+            "listas": [linha_lista_to_dict(l) for l in alteracoes.listas],
+            "itens": alteracoes.itens,
+            "excluidos": alteracoes.excluidos,
+        }
+    )
+
 # Exemplos de payload / respostas (comentários)
 # POST /api/listas { "nome": "Compras semanais" } -> 201 (aqui 200) { id: 1, nome: "Compras semanais", criado_em: "...", finalizada: false, finalizada_em: null, itens_count: 0 }
 # PUT /api/listas/1 { "nome": "Lista atualizada" } -> { id: 1, nome: "Lista atualizada", ... }
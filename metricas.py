@@ -0,0 +1,161 @@
+# metricas.py - latência por rota, consultas por requisição e texto Prometheus (comentários em português)
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites (em segundos) dos buckets de latência e (em consultas) dos buckets por requisição
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+class OrcamentoExcedido(AssertionError):
+    pass
+
+
+class Medicao:
+    # Consultas da requisição corrente; acumulada pelos eventos do SQLAlchemy
+    __slots__ = ("consultas", "tempo_db")
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_db = 0.0
+
+
+# A middleware define a medição antes de chamar a rota; o threadpool e o greenlet do modo
+# async copiam o contexto, então as consultas feitas por eles caem no mesmo objeto.
+medicao_atual: "contextvars.ContextVar[Optional[Medicao]]" = contextvars.ContextVar("medicao_atual", default=None)
+
+
+# Vale para todo Engine do processo (primário, réplicas, sync_engine do modo async e o dos testes)
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and medicao_atual.get() is not None:
+        context._metricas_inicio = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    medicao = medicao_atual.get()
+    if medicao is None:
+        return
+    medicao.consultas += 1
+    inicio = getattr(context, "_metricas_inicio", None)
+    if inicio is not None:
+        medicao.tempo_db += time.perf_counter() - inicio
+
+
+class Histograma:
+    def __init__(self, limites: Tuple[float, ...]):
+        self.limites = limites
+        self.contagens = [0] * len(limites)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        for posicao, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.contagens[posicao] += 1
+                break
+        self.soma += valor
+        self.total += 1
+
+    def acumulados(self) -> Iterable[Tuple[float, int]]:
+        acumulado = 0
+        for limite, contagem in zip(self.limites, self.contagens):
+            acumulado += contagem
+            yield limite, acumulado
+
+
+class MetricasRequisicoes:
+    # Por (método, rota): a rota é o template ("/api/listas/{lista_id}"), não o caminho,
+    # para o número de séries não crescer com os ids
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self) -> None:
+        with self._lock:
+            self.latencia: Dict[Tuple[str, str], Histograma] = {}
+            self.consultas: Dict[Tuple[str, str], Histograma] = {}
+            self.tempo_db: Dict[Tuple[str, str], float] = {}
+            self.respostas: Dict[Tuple[str, str, int], int] = {}
+            self.excessos: Dict[Tuple[str, str], int] = {}
+
+    def registrar(self, metodo: str, rota: str, status: int, duracao: float, medicao: Medicao, excedeu: bool) -> None:
+        chave = (metodo, rota)
+        with self._lock:
+            self.latencia.setdefault(chave, Histograma(BUCKETS_LATENCIA)).observar(duracao)
+            self.consultas.setdefault(chave, Histograma(BUCKETS_CONSULTAS)).observar(medicao.consultas)
+            self.tempo_db[chave] = self.tempo_db.get(chave, 0.0) + medicao.tempo_db
+            self.respostas[(metodo, rota, status)] = self.respostas.get((metodo, rota, status), 0) + 1
+            if excedeu:
+                self.excessos[chave] = self.excessos.get(chave, 0) + 1
+
+
+metricas_requisicoes = MetricasRequisicoes()
+
+
+# Limite de consultas por requisição declarado na rota (fica no atributo da função, que o
+# functools.wraps de rota_banco preserva). Serve para pegar N+1: o limite não depende do tamanho.
+def orcamento_consultas(limite: int) -> Callable:
+    def decorar(funcao: Callable) -> Callable:
+        funcao.orcamento_consultas = limite
+        return funcao
+
+    return decorar
+
+
+def _rotulos(**valores) -> str:
+    partes = []
+    for nome, valor in valores.items():
+        texto = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{nome}="{texto}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+# Texto no formato de exposição do Prometheus (0.0.4). `medidores` são valores instantâneos
+# extras, {nome: (ajuda, valor)}; valores None são omitidos.
+def texto_prometheus(medidores: Optional[Dict[str, Tuple[str, Optional[float]]]] = None) -> str:
+    m = metricas_requisicoes
+    linhas = []
+
+    def cabecalho(nome: str, tipo: str, ajuda: str):
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+
+    def histograma(nome: str, ajuda: str, series: Dict[Tuple[str, str], Histograma]):
+        cabecalho(nome, "histogram", ajuda)
+        for (metodo, rota), hist in sorted(series.items()):
+            for limite, acumulado in hist.acumulados():
+                linhas.append(f"{nome}_bucket{_rotulos(metodo=metodo, rota=rota, le=_numero(limite))} {acumulado}")
+            linhas.append(f"{nome}_bucket{_rotulos(metodo=metodo, rota=rota, le='+Inf')} {hist.total}")
+            linhas.append(f"{nome}_sum{_rotulos(metodo=metodo, rota=rota)} {_numero(hist.soma)}")
+            linhas.append(f"{nome}_count{_rotulos(metodo=metodo, rota=rota)} {hist.total}")
+
+    with m._lock:
+        histograma("app_requisicao_segundos", "Latência das requisições HTTP por rota.", m.latencia)
+        histograma("app_consultas_por_requisicao", "Consultas SQL executadas por requisição.", m.consultas)
+        cabecalho("app_consultas_segundos_total", "counter", "Tempo gasto em consultas SQL por rota.")
+        for (metodo, rota), total in sorted(m.tempo_db.items()):
+            linhas.append(f"app_consultas_segundos_total{_rotulos(metodo=metodo, rota=rota)} {_numero(total)}")
+        cabecalho("app_respostas_total", "counter", "Respostas HTTP por rota e status.")
+        for (metodo, rota, status), total in sorted(m.respostas.items()):
+            linhas.append(f"app_respostas_total{_rotulos(metodo=metodo, rota=rota, status=status)} {total}")
+        cabecalho("app_orcamento_consultas_excedido_total", "counter", "Requisições acima do orçamento de consultas da rota.")
+        for (metodo, rota), total in sorted(m.excessos.items()):
+            linhas.append(f"app_orcamento_consultas_excedido_total{_rotulos(metodo=metodo, rota=rota)} {total}")
+
+    for nome, (ajuda, valor) in (medidores or {}).items():
+        if valor is None:
+            continue
+        cabecalho(nome, "counter" if nome.endswith("_total") else "gauge", ajuda)
+        linhas.append(f"{nome} {_numero(valor)}")
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,35 @@
+"""indices paginacao listas
+
+Revision ID: 732f3c7fcb01
+Revises: 7f9d4c6a23a5
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '732f3c7fcb01'
+down_revision: Union[str, Sequence[str], None] = '7f9d4c6a23a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Índices compostos para a paginação por cursor de listas."""
+    op.create_index('ix_listas_criado_em_id', 'listas', ['criado_em', 'id'], unique=False)
+    op.create_index(
+        'ix_listas_finalizada_criado_em_id',
+        'listas',
+        ['finalizada', 'criado_em', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Remove os índices de paginação."""
+    op.drop_index('ix_listas_finalizada_criado_em_id', table_name='listas')
+    op.drop_index('ix_listas_criado_em_id', table_name='listas')
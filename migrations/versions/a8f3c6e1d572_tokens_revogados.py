@@ -0,0 +1,34 @@
+"""tokens revogados
+
+Revision ID: a8f3c6e1d572
+Revises: e5c9a1f7d428
+Create Date: 2026-10-20 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8f3c6e1d572'
+down_revision: Union[str, Sequence[str], None] = 'e5c9a1f7d428'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Revogações de tokens (logout) no banco, visíveis a todos os workers."""
+    op.create_table(
+        'tokens_revogados',
+        sa.Column('hash', sa.String(length=64), primary_key=True),
+        sa.Column('expira_em', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_tokens_revogados_expira_em', 'tokens_revogados', ['expira_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove a tabela de revogações."""
+    op.drop_index('ix_tokens_revogados_expira_em', table_name='tokens_revogados')
+    op.drop_table('tokens_revogados')
@@ -0,0 +1,56 @@
+"""indices consultas frequentes
+
+Revision ID: a93f1e6d7c42
+Revises: e4a7c9b2d510
+Create Date: 2026-10-18 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93f1e6d7c42'
+down_revision: Union[str, Sequence[str], None] = 'e4a7c9b2d510'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Índices compostos para itens por lista, histórico e nomes por prefixo."""
+    dialeto = op.get_bind().dialect.name
+    # (lista_id, ordem, criado_em) cobre tudo o que ix_itens_lista_id atendia
+    op.create_index('ix_itens_lista_ordem', 'itens', ['lista_id', 'ordem', 'criado_em'], unique=False)
+    op.drop_index('ix_itens_lista_id', table_name='itens')
+    op.create_index(
+        'ix_listas_nome',
+        'listas',
+        ['nome'],
+        unique=False,
+        postgresql_ops={'nome': 'text_pattern_ops'},
+    )
+    if dialeto == 'postgresql':
+        op.create_index(
+            'ix_listas_historico',
+            'listas',
+            [sa.text('finalizada_em DESC NULLS LAST'), sa.text('criado_em DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text('finalizada'),
+        )
+    else:
+        op.create_index(
+            'ix_listas_historico',
+            'listas',
+            ['finalizada', 'finalizada_em', 'criado_em', 'id'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Volta ao índice simples de itens.lista_id."""
+    op.drop_index('ix_listas_historico', table_name='listas')
+    op.drop_index('ix_listas_nome', table_name='listas')
+    op.create_index('ix_itens_lista_id', 'itens', ['lista_id'], unique=False)
+    op.drop_index('ix_itens_lista_ordem', table_name='itens')
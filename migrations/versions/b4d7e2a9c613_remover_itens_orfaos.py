@@ -0,0 +1,26 @@
+"""remover itens orfaos
+
+Revision ID: b4d7e2a9c613
+Revises: f1a6d3c8b205
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d7e2a9c613'
+down_revision: Union[str, Sequence[str], None] = 'f1a6d3c8b205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apaga itens de listas excluídas enquanto o SQLite rodava sem chaves estrangeiras."""
+    op.execute('DELETE FROM itens WHERE NOT EXISTS (SELECT 1 FROM listas WHERE listas.id = itens.lista_id)')
+
+
+def downgrade() -> None:
+    """Nada a desfazer: os itens apagados não pertenciam a nenhuma lista."""
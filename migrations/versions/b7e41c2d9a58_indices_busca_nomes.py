@@ -0,0 +1,83 @@
+"""indices busca nomes
+
+Revision ID: b7e41c2d9a58
+Revises: 732f3c7fcb01
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e41c2d9a58'
+down_revision: Union[str, Sequence[str], None] = '732f3c7fcb01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FTS_SQLITE = {
+    'listas': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS listas_fts USING fts5("
+        "nome, content='listas', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS listas_fts_ai AFTER INSERT ON listas BEGIN "
+        "INSERT INTO listas_fts(rowid, nome) VALUES (new.id, new.nome); END",
+        "CREATE TRIGGER IF NOT EXISTS listas_fts_ad AFTER DELETE ON listas BEGIN "
+        "INSERT INTO listas_fts(listas_fts, rowid, nome) VALUES ('delete', old.id, old.nome); END",
+        "CREATE TRIGGER IF NOT EXISTS listas_fts_au AFTER UPDATE OF nome ON listas BEGIN "
+        "INSERT INTO listas_fts(listas_fts, rowid, nome) VALUES ('delete', old.id, old.nome); "
+        "INSERT INTO listas_fts(rowid, nome) VALUES (new.id, new.nome); END",
+        "INSERT INTO listas_fts(listas_fts) VALUES ('rebuild')",
+    ),
+    'itens': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS itens_fts USING fts5("
+        "nome, content='itens', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS itens_fts_ai AFTER INSERT ON itens BEGIN "
+        "INSERT INTO itens_fts(rowid, nome) VALUES (new.id, new.nome); END",
+        "CREATE TRIGGER IF NOT EXISTS itens_fts_ad AFTER DELETE ON itens BEGIN "
+        "INSERT INTO itens_fts(itens_fts, rowid, nome) VALUES ('delete', old.id, old.nome); END",
+        "CREATE TRIGGER IF NOT EXISTS itens_fts_au AFTER UPDATE OF nome ON itens BEGIN "
+        "INSERT INTO itens_fts(itens_fts, rowid, nome) VALUES ('delete', old.id, old.nome); "
+        "INSERT INTO itens_fts(rowid, nome) VALUES (new.id, new.nome); END",
+        "INSERT INTO itens_fts(itens_fts) VALUES ('rebuild')",
+    ),
+}
+
+
+def upgrade() -> None:
+    """Índices de busca por trecho: pg_trgm (GIN) no Postgres, FTS5 trigram no SQLite."""
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_listas_nome_trgm',
+            'listas',
+            ['nome'],
+            postgresql_using='gin',
+            postgresql_ops={'nome': 'gin_trgm_ops'},
+        )
+        op.create_index(
+            'ix_itens_nome_trgm',
+            'itens',
+            ['nome'],
+            postgresql_using='gin',
+            postgresql_ops={'nome': 'gin_trgm_ops'},
+        )
+    elif dialeto == 'sqlite':
+        for comandos in FTS_SQLITE.values():
+            for comando in comandos:
+                op.execute(comando)
+
+
+def downgrade() -> None:
+    """Remove os índices de busca."""
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.drop_index('ix_itens_nome_trgm', table_name='itens')
+        op.drop_index('ix_listas_nome_trgm', table_name='listas')
+    elif dialeto == 'sqlite':
+        for tabela in FTS_SQLITE:
+            for sufixo in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {tabela}_fts_{sufixo}')
+            op.execute(f'DROP TABLE IF EXISTS {tabela}_fts')
@@ -0,0 +1,90 @@
+"""listas por usuario
+
+Revision ID: c2e8b4f19a37
+Revises: a93f1e6d7c42
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8b4f19a37'
+down_revision: Union[str, Sequence[str], None] = 'a93f1e6d7c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Até aqui todos os usuários viam todas as listas: as existentes ficam com a conta mais antiga
+DONO_PADRAO = '(SELECT min(id) FROM usuarios)'
+
+
+def _indice_historico(dialeto: str, nome: str, prefixo: list) -> None:
+    if dialeto == 'postgresql':
+        op.create_index(
+            nome,
+            'listas',
+            prefixo + [sa.text('finalizada_em DESC NULLS LAST'), sa.text('criado_em DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text('finalizada'),
+        )
+    else:
+        op.create_index(nome, 'listas', prefixo + ['finalizada', 'finalizada_em', 'criado_em', 'id'], unique=False)
+
+
+def upgrade() -> None:
+    """Dono das listas (usuario_id), com backfill, e índices que começam por ele."""
+    dialeto = op.get_bind().dialect.name
+    # O SQLite não adiciona chave estrangeira via ALTER TABLE (e recriar `listas` perderia os
+    # triggers da busca); lá a coluna fica sem a constraint
+    if dialeto == 'sqlite':
+        op.add_column('listas', sa.Column('usuario_id', sa.Integer(), nullable=True))
+    else:
+        op.add_column(
+            'listas',
+            sa.Column('usuario_id', sa.Integer(), sa.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=True),
+        )
+    op.add_column('exclusoes', sa.Column('usuario_id', sa.Integer(), nullable=True))
+    op.execute(f'UPDATE listas SET usuario_id = {DONO_PADRAO} WHERE usuario_id IS NULL')
+    op.execute(f'UPDATE exclusoes SET usuario_id = {DONO_PADRAO} WHERE usuario_id IS NULL')
+
+    op.drop_index('ix_listas_criado_em_id', table_name='listas')
+    op.drop_index('ix_listas_finalizada_criado_em_id', table_name='listas')
+    op.drop_index('ix_listas_nome', table_name='listas')
+    op.drop_index('ix_listas_historico', table_name='listas')
+    op.drop_index('ix_listas_revisao', table_name='listas')
+    op.drop_index('ix_exclusoes_revisao', table_name='exclusoes')
+
+    op.create_index('ix_listas_usuario_criado_em', 'listas', ['usuario_id', 'criado_em', 'id'], unique=False)
+    op.create_index(
+        'ix_listas_usuario_nome',
+        'listas',
+        ['usuario_id', 'nome'],
+        unique=False,
+        postgresql_ops={'nome': 'text_pattern_ops'},
+    )
+    op.create_index('ix_listas_usuario_revisao', 'listas', ['usuario_id', 'revisao'], unique=False)
+    _indice_historico(dialeto, 'ix_listas_usuario_historico', ['usuario_id'])
+    op.create_index('ix_exclusoes_usuario_revisao', 'exclusoes', ['usuario_id', 'revisao'], unique=False)
+
+
+def downgrade() -> None:
+    """Volta às listas compartilhadas e aos índices globais."""
+    dialeto = op.get_bind().dialect.name
+    op.drop_index('ix_exclusoes_usuario_revisao', table_name='exclusoes')
+    op.drop_index('ix_listas_usuario_historico', table_name='listas')
+    op.drop_index('ix_listas_usuario_revisao', table_name='listas')
+    op.drop_index('ix_listas_usuario_nome', table_name='listas')
+    op.drop_index('ix_listas_usuario_criado_em', table_name='listas')
+
+    op.create_index('ix_exclusoes_revisao', 'exclusoes', ['revisao'], unique=False)
+    op.create_index('ix_listas_revisao', 'listas', ['revisao'], unique=False)
+    _indice_historico(dialeto, 'ix_listas_historico', [])
+    op.create_index('ix_listas_nome', 'listas', ['nome'], unique=False, postgresql_ops={'nome': 'text_pattern_ops'})
+    op.create_index('ix_listas_finalizada_criado_em_id', 'listas', ['finalizada', 'criado_em', 'id'], unique=False)
+    op.create_index('ix_listas_criado_em_id', 'listas', ['criado_em', 'id'], unique=False)
+
+    op.drop_column('exclusoes', 'usuario_id')
+    op.drop_column('listas', 'usuario_id')
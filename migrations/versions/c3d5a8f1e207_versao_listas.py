@@ -0,0 +1,28 @@
+"""versao listas
+
+Revision ID: c3d5a8f1e207
+Revises: b7e41c2d9a58
+Create Date: 2026-10-18 11:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d5a8f1e207'
+down_revision: Union[str, Sequence[str], None] = 'b7e41c2d9a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Contador de versão por lista, base dos ETags."""
+    op.add_column('listas', sa.Column('versao', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Remove o contador de versão."""
+    op.drop_column('listas', 'versao')
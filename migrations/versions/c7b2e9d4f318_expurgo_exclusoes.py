@@ -0,0 +1,31 @@
+"""expurgo exclusoes
+
+Revision ID: c7b2e9d4f318
+Revises: a8f3c6e1d572
+Create Date: 2026-10-20 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7b2e9d4f318'
+down_revision: Union[str, Sequence[str], None] = 'a8f3c6e1d572'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Guarda, por usuário, a maior revisão das lápides já expurgadas."""
+    op.add_column('usuarios', sa.Column('revisao_expurgada', sa.Integer(), server_default='0', nullable=False))
+    # Índice para o expurgo por idade (WHERE excluido_em < corte)
+    op.create_index('ix_exclusoes_excluido_em', 'exclusoes', ['excluido_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove a marca de expurgo e o índice por data."""
+    op.drop_index('ix_exclusoes_excluido_em', table_name='exclusoes')
+    op.drop_column('usuarios', 'revisao_expurgada')
@@ -0,0 +1,60 @@
+"""sincronizacao incremental
+
+Revision ID: d81f0b6c4e93
+Revises: c3d5a8f1e207
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f0b6c4e93'
+down_revision: Union[str, Sequence[str], None] = 'c3d5a8f1e207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Revisão/atualizado_em em listas e itens, contador global e lápides de exclusão."""
+    op.create_table(
+        'sync_contador',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('valor', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.execute("INSERT INTO sync_contador (id, valor) VALUES (1, 0)")
+
+    for tabela in ('listas', 'itens'):
+        op.add_column(tabela, sa.Column('revisao', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(tabela, sa.Column('atualizado_em', sa.DateTime(timezone=True), nullable=True))
+        op.execute(f"UPDATE {tabela} SET atualizado_em = criado_em")
+        # No SQLite a coluna fica anulável: ALTER TABLE não aceita default não constante e
+        # recriar a tabela apagaria os triggers FTS (a aplicação sempre preenche o valor)
+        if op.get_bind().dialect.name != 'sqlite':
+            op.alter_column(tabela, 'atualizado_em', nullable=False, server_default=sa.func.now())
+        op.create_index(f'ix_{tabela}_revisao', tabela, ['revisao'], unique=False)
+
+    op.create_table(
+        'exclusoes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('tabela', sa.String(), nullable=False),
+        sa.Column('registro_id', sa.Integer(), nullable=False),
+        sa.Column('lista_id', sa.Integer(), nullable=True),
+        sa.Column('revisao', sa.Integer(), nullable=False),
+        sa.Column('excluido_em', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_exclusoes_revisao', 'exclusoes', ['revisao'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove o rastreamento de alterações."""
+    op.drop_index('ix_exclusoes_revisao', table_name='exclusoes')
+    op.drop_table('exclusoes')
+    for tabela in ('itens', 'listas'):
+        op.drop_index(f'ix_{tabela}_revisao', table_name=tabela)
+        op.drop_column(tabela, 'atualizado_em')
+        op.drop_column(tabela, 'revisao')
+    op.drop_table('sync_contador')
@@ -0,0 +1,97 @@
+"""contadores itens listas
+
+Revision ID: e4a7c9b2d510
+Revises: d81f0b6c4e93
+Create Date: 2026-10-18 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c9b2d510'
+down_revision: Union[str, Sequence[str], None] = 'd81f0b6c4e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS_SQLITE = (
+    "CREATE TRIGGER IF NOT EXISTS itens_contadores_ai AFTER INSERT ON itens BEGIN "
+    "UPDATE listas SET itens_total = itens_total + 1, itens_comprados = itens_comprados + new.comprado "
+    "WHERE id = new.lista_id; END",
+    "CREATE TRIGGER IF NOT EXISTS itens_contadores_ad AFTER DELETE ON itens BEGIN "
+    "UPDATE listas SET itens_total = itens_total - 1, itens_comprados = itens_comprados - old.comprado "
+    "WHERE id = old.lista_id; END",
+    "CREATE TRIGGER IF NOT EXISTS itens_contadores_au AFTER UPDATE OF comprado, lista_id ON itens "
+    "WHEN old.comprado IS NOT new.comprado OR old.lista_id IS NOT new.lista_id BEGIN "
+    "UPDATE listas SET itens_total = itens_total - 1, itens_comprados = itens_comprados - old.comprado "
+    "WHERE id = old.lista_id; "
+    "UPDATE listas SET itens_total = itens_total + 1, itens_comprados = itens_comprados + new.comprado "
+    "WHERE id = new.lista_id; END",
+)
+
+TRIGGERS_POSTGRES = (
+    """
+    CREATE OR REPLACE FUNCTION itens_contadores() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE listas l SET itens_total = l.itens_total + d.total, itens_comprados = l.itens_comprados + d.comprados
+            FROM (SELECT lista_id, count(*) AS total, count(*) FILTER (WHERE comprado) AS comprados
+                  FROM novos GROUP BY lista_id) d
+            WHERE l.id = d.lista_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE listas l SET itens_total = l.itens_total - d.total, itens_comprados = l.itens_comprados - d.comprados
+            FROM (SELECT lista_id, count(*) AS total, count(*) FILTER (WHERE comprado) AS comprados
+                  FROM antigos GROUP BY lista_id) d
+            WHERE l.id = d.lista_id;
+        ELSE
+            UPDATE listas l SET itens_total = l.itens_total + d.total, itens_comprados = l.itens_comprados + d.comprados
+            FROM (SELECT lista_id, sum(sinal) AS total, sum(CASE WHEN comprado THEN sinal ELSE 0 END) AS comprados
+                  FROM (SELECT lista_id, comprado, 1 AS sinal FROM novos
+                        UNION ALL SELECT lista_id, comprado, -1 FROM antigos) m
+                  GROUP BY lista_id) d
+            WHERE l.id = d.lista_id AND (d.total <> 0 OR d.comprados <> 0);
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    "CREATE TRIGGER itens_contadores_ai AFTER INSERT ON itens REFERENCING NEW TABLE AS novos "
+    "FOR EACH STATEMENT EXECUTE FUNCTION itens_contadores()",
+    "CREATE TRIGGER itens_contadores_ad AFTER DELETE ON itens REFERENCING OLD TABLE AS antigos "
+    "FOR EACH STATEMENT EXECUTE FUNCTION itens_contadores()",
+    "CREATE TRIGGER itens_contadores_au AFTER UPDATE ON itens REFERENCING OLD TABLE AS antigos NEW TABLE AS novos "
+    "FOR EACH STATEMENT EXECUTE FUNCTION itens_contadores()",
+)
+
+
+def upgrade() -> None:
+    """Contadores itens_total/itens_comprados em listas, preenchidos e mantidos por triggers."""
+    op.add_column('listas', sa.Column('itens_total', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('listas', sa.Column('itens_comprados', sa.Integer(), server_default='0', nullable=False))
+    # Backfill antes dos triggers; no Postgres a tabela fica travada até o fim da migração
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.execute('LOCK TABLE itens IN SHARE MODE')
+    op.execute(
+        "UPDATE listas SET "
+        "itens_total = (SELECT count(*) FROM itens WHERE itens.lista_id = listas.id), "
+        "itens_comprados = (SELECT count(*) FROM itens WHERE itens.lista_id = listas.id AND itens.comprado)"
+    )
+    for comando in {'postgresql': TRIGGERS_POSTGRES, 'sqlite': TRIGGERS_SQLITE}.get(dialeto, ()):
+        op.execute(comando)
+
+
+def downgrade() -> None:
+    """Remove os contadores e seus triggers."""
+    dialeto = op.get_bind().dialect.name
+    for sufixo in ('ai', 'ad', 'au'):
+        if dialeto == 'postgresql':
+            op.execute(f'DROP TRIGGER IF EXISTS itens_contadores_{sufixo} ON itens')
+        else:
+            op.execute(f'DROP TRIGGER IF EXISTS itens_contadores_{sufixo}')
+    if dialeto == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS itens_contadores()')
+    op.drop_column('listas', 'itens_comprados')
+    op.drop_column('listas', 'itens_total')
@@ -0,0 +1,38 @@
+"""revisao sync por usuario
+
+Revision ID: e5c9a1f7d428
+Revises: b4d7e2a9c613
+Create Date: 2026-10-19 11:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c9a1f7d428'
+down_revision: Union[str, Sequence[str], None] = 'b4d7e2a9c613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Troca o contador global de revisões por um contador em cada usuário."""
+    op.add_column('usuarios', sa.Column('revisao_sync', sa.Integer(), server_default='0', nullable=False))
+    # Todos partem do valor global, que não é menor que nenhuma revisão já gravada:
+    # os tokens em uso continuam válidos e as próximas escritas ficam acima deles
+    op.execute("UPDATE usuarios SET revisao_sync = coalesce((SELECT valor FROM sync_contador WHERE id = 1), 0)")
+    op.drop_table('sync_contador')
+
+
+def downgrade() -> None:
+    """Volta ao contador global, a partir da maior revisão entre os usuários."""
+    op.create_table(
+        'sync_contador',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('valor', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.execute("INSERT INTO sync_contador (id, valor) SELECT 1, coalesce(max(revisao_sync), 0) FROM usuarios")
+    op.drop_column('usuarios', 'revisao_sync')
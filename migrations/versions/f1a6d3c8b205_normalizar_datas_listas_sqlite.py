@@ -0,0 +1,39 @@
+"""normalizar datas listas sqlite
+
+Revision ID: f1a6d3c8b205
+Revises: c2e8b4f19a37
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a6d3c8b205'
+down_revision: Union[str, Sequence[str], None] = 'c2e8b4f19a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# No SQLite as datas são texto e os cursores de paginação comparam texto. O SQLAlchemy grava
+# 'AAAA-MM-DD HH:MM:SS.ffffff', mas linhas antigas vieram do CURRENT_TIMESTAMP
+# ('AAAA-MM-DD HH:MM:SS', sem fração) e comparam fora de ordem com o valor do cursor.
+COLUNAS = ('criado_em', 'finalizada_em')
+
+
+def upgrade() -> None:
+    """Reescreve as datas de listas no formato do SQLAlchemy (só SQLite)."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for coluna in COLUNAS:
+        # strftime aceita 'T' ou espaço, fração opcional e fuso (convertido para UTC)
+        op.execute(
+            f"UPDATE listas SET {coluna} = strftime('%Y-%m-%d %H:%M:%S', {coluna}) "
+            f"|| '.' || substr(strftime('%f', {coluna}), 4) || '000' "
+            f"WHERE {coluna} IS NOT NULL AND (length({coluna}) <> 26 OR substr({coluna}, 11, 1) <> ' ')"
+        )
+
+
+def downgrade() -> None:
+    """Nada a desfazer: o formato normalizado também é lido pelas versões anteriores."""
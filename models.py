@@ -1,27 +1,111 @@
 # models.py - definição dos modelos SQLAlchemy (comentários em português)
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import DDL, Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, event
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 
 Base = declarative_base()
 
+
+def agora_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# Chave da revisão da transação em andamento no `info` da conexão (ver versoes.nova_revisao)
+CHAVE_REVISAO = 'revisao_sync'
+
+
+def _revisao_corrente(contexto):
+    # Lida no próprio INSERT/UPDATE: todas as linhas gravadas na transação recebem a revisão dela.
+    # Fora de uma transação que pediu revisão (cargas em lote, scripts) fica 0.
+    return contexto.connection.info.get(CHAVE_REVISAO, 0)
+
+
 class Lista(Base):
     __tablename__ = 'listas'
     id = Column(Integer, primary_key=True, index=True)
+    # Dono da lista: toda consulta de listas, itens e histórico filtra por ele
+    usuario_id = Column(Integer, ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=True)
     nome = Column(String, nullable=False)
-    criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    finalizada = Column(Boolean, nullable=False, server_default='false')
+    # default em Python mantém precisão de microssegundos também no SQLite (cursor de paginação)
+    criado_em = Column(DateTime(timezone=True), default=agora_utc, server_default=func.now(), nullable=False)
+    finalizada = Column(Boolean, nullable=False, default=False, server_default='false')
     finalizada_em = Column(DateTime(timezone=True), nullable=True)
+    # Incrementada a cada alteração na lista ou nos seus itens (ETag das respostas)
+    versao = Column(Integer, nullable=False, default=0, server_default='0')
+    # Revisão (do dono) da última alteração e instante dela (sincronização incremental)
+    revisao = Column(Integer, nullable=False, default=_revisao_corrente, onupdate=_revisao_corrente, server_default='0')
+    atualizado_em = Column(DateTime(timezone=True), default=agora_utc, onupdate=agora_utc, server_default=func.now(), nullable=False)
+    # Contagens dos itens, mantidas por triggers em `itens` (DDL_CONTADORES_*, no fim do módulo)
+    itens_total = Column(Integer, nullable=False, default=0, server_default='0')
+    itens_comprados = Column(Integer, nullable=False, default=0, server_default='0')
+
+    # Todos começam por usuario_id: cada consulta percorre só as listas do próprio usuário
+    __table_args__ = (
+        # Paginação por cursor em GET /api/listas: ORDER BY criado_em DESC, id DESC
+        Index('ix_listas_usuario_criado_em', 'usuario_id', 'criado_em', 'id'),
+        # Nomes iguais/por prefixo (nomes de cópias e filtro `nome`); text_pattern_ops atende LIKE 'x%'
+        Index('ix_listas_usuario_nome', 'usuario_id', 'nome', postgresql_ops={'nome': 'text_pattern_ops'}),
+        # /api/sync: listas do usuário alteradas depois da revisão do token
+        Index('ix_listas_usuario_revisao', 'usuario_id', 'revisao'),
+    )
 
 class Item(Base):
     __tablename__ = 'itens'
     id = Column(Integer, primary_key=True, index=True)
-    lista_id = Column(Integer, ForeignKey('listas.id', ondelete='CASCADE'), nullable=False, index=True)
+    lista_id = Column(Integer, ForeignKey('listas.id', ondelete='CASCADE'), nullable=False)
     nome = Column(String, nullable=False)
     quantidade = Column(Integer, nullable=False, server_default='1')
-    comprado = Column(Boolean, nullable=False, server_default='false')
+    comprado = Column(Boolean, nullable=False, default=False, server_default='false')
     ordem = Column(Integer, nullable=False, server_default='0')
     criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    revisao = Column(Integer, nullable=False, default=_revisao_corrente, onupdate=_revisao_corrente, server_default='0', index=True)
+    atualizado_em = Column(DateTime(timezone=True), default=agora_utc, onupdate=agora_utc, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Itens de uma lista já na ordem de exibição (WHERE lista_id = ? ORDER BY ordem, criado_em);
+        # o prefixo lista_id atende também a chave estrangeira e o MAX(ordem) da lista
+        Index('ix_itens_lista_ordem', 'lista_id', 'ordem', 'criado_em'),
+    )
+
+
+class Exclusao(Base):
+    # Lápides de listas/itens excluídos, para o /api/sync avisar quem já tinha a linha
+    __tablename__ = 'exclusoes'
+    id = Column(Integer, primary_key=True)
+    tabela = Column(String, nullable=False)
+    registro_id = Column(Integer, nullable=False)
+    lista_id = Column(Integer, nullable=True)
+    # Dono da lista excluída (a lista já não existe para o /api/sync filtrar por ela)
+    usuario_id = Column(Integer, nullable=True)
+    revisao = Column(Integer, nullable=False, default=_revisao_corrente)
+    excluido_em = Column(DateTime(timezone=True), default=agora_utc, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_exclusoes_usuario_revisao', 'usuario_id', 'revisao'),
+        # Expurgo das lápides antigas (exclusoes.py)
+        Index('ix_exclusoes_excluido_em', 'excluido_em'),
+    )
+
+# Histórico: WHERE usuario_id = ? AND finalizada ORDER BY finalizada_em DESC NULLS LAST,
+# criado_em DESC, id DESC. O SQLite não aceita NULLS LAST em índices, mas no DESC dele os
+# nulos já vêm por último; no Postgres o índice é parcial e declara a mesma ordem da consulta.
+Index(
+    'ix_listas_usuario_historico',
+    Lista.usuario_id,
+    Lista.finalizada,
+    Lista.finalizada_em,
+    Lista.criado_em,
+    Lista.id,
+).ddl_if(dialect='sqlite')
+Index(
+    'ix_listas_usuario_historico',
+    Lista.usuario_id,
+    Lista.finalizada_em.desc().nullslast(),
+    Lista.criado_em.desc(),
+    Lista.id.desc(),
+    postgresql_where=Lista.finalizada == True,
+).ddl_if(dialect='postgresql')
 
 # Relacionamento na Lista
 Lista.itens = relationship('Item', backref='lista', cascade='all, delete-orphan', passive_deletes=True)
@@ -35,6 +119,14 @@ class Configuracao(Base):
     atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
 
+class TokenRevogado(Base):
+    # Tokens encerrados via logout (hash SHA-256 do JWT), até o `exp` de cada um. No banco e
+    # não na memória: um worker que ainda não viu o token também o recusa.
+    __tablename__ = 'tokens_revogados'
+    hash = Column(String(64), primary_key=True)
+    expira_em = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
 class Usuario(Base):
     __tablename__ = 'usuarios'
     id = Column(Integer, primary_key=True, index=True)
@@ -42,3 +134,74 @@ class Usuario(Base):
     email = Column(String, nullable=False, unique=True, index=True)
     senha_hash = Column(Text, nullable=False)
     criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Última revisão do /api/sync usada nas listas deste usuário; cada transação que escreve
+    # incrementa uma vez (versoes.nova_revisao) antes de gravar as linhas
+    revisao_sync = Column(Integer, nullable=False, default=0, server_default='0')
+    # Maior revisão entre as lápides já expurgadas (exclusoes.py); um token do /api/sync mais
+    # antigo que ela perdeu exclusões e recebe a carga completa
+    revisao_expurgada = Column(Integer, nullable=False, default=0, server_default='0')
+
+
+# Contadores itens_total/itens_comprados das listas (verificação e reparo em contadores.py).
+# SQLite: um UPDATE por linha afetada. O trigger de UPDATE só dispara quando `comprado`
+# ou `lista_id` mudam (reordenar e renomear itens não tocam em listas).
+DDL_CONTADORES_SQLITE = [
+    "CREATE TRIGGER IF NOT EXISTS itens_contadores_ai AFTER INSERT ON itens BEGIN "
+    "UPDATE listas SET itens_total = itens_total + 1, itens_comprados = itens_comprados + new.comprado "
+    "WHERE id = new.lista_id; END",
+    "CREATE TRIGGER IF NOT EXISTS itens_contadores_ad AFTER DELETE ON itens BEGIN "
+    "UPDATE listas SET itens_total = itens_total - 1, itens_comprados = itens_comprados - old.comprado "
+    "WHERE id = old.lista_id; END",
+    "CREATE TRIGGER IF NOT EXISTS itens_contadores_au AFTER UPDATE OF comprado, lista_id ON itens "
+    "WHEN old.comprado IS NOT new.comprado OR old.lista_id IS NOT new.lista_id BEGIN "
+    "UPDATE listas SET itens_total = itens_total - 1, itens_comprados = itens_comprados - old.comprado "
+    "WHERE id = old.lista_id; "
+    "UPDATE listas SET itens_total = itens_total + 1, itens_comprados = itens_comprados + new.comprado "
+    "WHERE id = new.lista_id; END",
+]
+
+# Postgres: triggers por instrução com tabelas de transição, então um INSERT de mil itens
+# faz um UPDATE por lista, não mil
+DDL_CONTADORES_POSTGRES = [
+    """
+    CREATE OR REPLACE FUNCTION itens_contadores() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE listas l SET itens_total = l.itens_total + d.total, itens_comprados = l.itens_comprados + d.comprados
+            FROM (SELECT lista_id, count(*) AS total, count(*) FILTER (WHERE comprado) AS comprados
+                  FROM novos GROUP BY lista_id) d
+            WHERE l.id = d.lista_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE listas l SET itens_total = l.itens_total - d.total, itens_comprados = l.itens_comprados - d.comprados
+            FROM (SELECT lista_id, count(*) AS total, count(*) FILTER (WHERE comprado) AS comprados
+                  FROM antigos GROUP BY lista_id) d
+            WHERE l.id = d.lista_id;
+        ELSE
+            UPDATE listas l SET itens_total = l.itens_total + d.total, itens_comprados = l.itens_comprados + d.comprados
+            FROM (SELECT lista_id, sum(sinal) AS total, sum(CASE WHEN comprado THEN sinal ELSE 0 END) AS comprados
+                  FROM (SELECT lista_id, comprado, 1 AS sinal FROM novos
+                        UNION ALL SELECT lista_id, comprado, -1 FROM antigos) m
+                  GROUP BY lista_id) d
+            WHERE l.id = d.lista_id AND (d.total <> 0 OR d.comprados <> 0);
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    "CREATE TRIGGER itens_contadores_ai AFTER INSERT ON itens REFERENCING NEW TABLE AS novos "
+    "FOR EACH STATEMENT EXECUTE FUNCTION itens_contadores()",
+    "CREATE TRIGGER itens_contadores_ad AFTER DELETE ON itens REFERENCING OLD TABLE AS antigos "
+    "FOR EACH STATEMENT EXECUTE FUNCTION itens_contadores()",
+    "CREATE TRIGGER itens_contadores_au AFTER UPDATE ON itens REFERENCING OLD TABLE AS antigos NEW TABLE AS novos "
+    "FOR EACH STATEMENT EXECUTE FUNCTION itens_contadores()",
+]
+
+# Mantém os triggers quando o schema é criado via metadata.create_all (testes/dev, benchmarks):
+# registrados aqui, junto com a tabela, nenhum chamador precisa importar outro módulo antes
+for _dialeto, _ddls in (("sqlite", DDL_CONTADORES_SQLITE), ("postgresql", DDL_CONTADORES_POSTGRES)):
+    for _ddl in _ddls:
+        event.listen(Item.__table__, "after_create", DDL(_ddl).execute_if(dialect=_dialeto))
+event.listen(
+    Item.__table__,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS itens_contadores()").execute_if(dialect="postgresql"),
+)
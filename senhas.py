@@ -0,0 +1,70 @@
+# senhas.py - hash/verificação bcrypt em um pool de threads limitado (comentários em português)
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+
+class PoolSaturado(RuntimeError):
+    pass
+
+
+class PoolSenhas:
+    # bcrypt leva ~100-300 ms de CPU (e libera o GIL); aqui ele roda em `workers` threads
+    # próprias, com no máximo `fila_max` pedidos aguardando. Acima disso a chamada falha
+    # na hora com PoolSaturado (a API responde 429) em vez de ocupar o threadpool do servidor.
+    def __init__(self, contexto: CryptContext, workers: int = 2, fila_max: int = 16):
+        self.contexto = contexto
+        self.workers = workers
+        self.fila_max = fila_max
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="senhas")
+        self._vagas = threading.BoundedSemaphore(workers + fila_max)
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._rejeitadas = 0
+
+    def _executar(self, funcao, args):
+        # A vaga é devolvida antes do resultado ficar visível para quem espera
+        try:
+            return funcao(*args)
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+            self._vagas.release()
+
+    def submeter(self, funcao, *args) -> Future:
+        if not self._vagas.acquire(blocking=False):
+            with self._lock:
+                self._rejeitadas += 1
+            raise PoolSaturado("Pool de senhas saturado")
+        with self._lock:
+            self._pendentes += 1
+        return self._executor.submit(self._executar, funcao, args)
+
+    async def gerar_hash(self, senha: str) -> str:
+        return await asyncio.wrap_future(self.submeter(self.contexto.hash, senha))
+
+    def _verificar(self, senha: str, senha_hash: str) -> Tuple[bool, Optional[str]]:
+        try:
+            return self.contexto.verify_and_update(senha, senha_hash)
+        except Exception:
+            return False, None
+
+    # Retorna (válida, novo_hash); novo_hash vem preenchido quando o hash salvo usa
+    # parâmetros antigos (ex.: BCRYPT_ROUNDS mudou) e deve ser regravado
+    async def verificar(self, senha: str, senha_hash: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self.submeter(self._verificar, senha, senha_hash))
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            pendentes = self._pendentes
+            rejeitadas = self._rejeitadas
+        return {
+            "workers": self.workers,
+            "fila_max": self.fila_max,
+            "em_execucao": min(pendentes, self.workers),
+            "na_fila": max(0, pendentes - self.workers),
+            "rejeitadas": rejeitadas,
+        }
@@ -1,14 +1,32 @@
+import importlib.util
 import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
 import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
-os.environ["DATABASE_URL"] = "sqlite:///./test_app.db"
+# Banco em diretório temporário (apagado no fim da sessão), fora da árvore versionada
+_DIRETORIO_BANCO = tempfile.TemporaryDirectory(prefix="testes-lista-", ignore_cleanup_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_DIRETORIO_BANCO.name) / 'test_app.db'}"
+# Custo mínimo do bcrypt para os testes não gastarem segundos em hashes
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Requisição acima do orçamento de consultas da rota falha o teste (ver metricas.py)
+os.environ.setdefault("ORCAMENTO_CONSULTAS", "estrito")
 
-from main import app, Base, get_db  # noqa: E402
+from banco import ativar_chaves_estrangeiras  # noqa: E402
+from main import app, Base, create_access_token, engine_async, get_db, limpar_caches  # noqa: E402
+from metricas import metricas_requisicoes  # noqa: E402
+from models import Item, Lista, Usuario  # noqa: E402
 
 engine = create_engine(os.environ["DATABASE_URL"], connect_args={"check_same_thread": False})
+ativar_chaves_estrangeiras(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -23,6 +41,8 @@ def override_get_db():
 def _reset_db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    limpar_caches()
+    metricas_requisicoes.limpar()
 
 
 app.dependency_overrides[get_db] = override_get_db
@@ -48,6 +68,98 @@ def session_factory():
     return TestingSessionLocal
 
 
+# Dono das listas criadas pelos testes; `client` já vem autenticado como ele
+@pytest.fixture
+def usuario(db_session):
+    dono = Usuario(nome="Dono", email="dono@example.com", senha_hash="-")
+    db_session.add(dono)
+    db_session.commit()
+    return dono
+
+
+# Grava uma lista do `usuario` direto no banco e devolve a Lista. Cada item pode ser o nome,
+# uma tupla (nome, comprado[, quantidade]) ou um dict com nome/quantidade/comprado/ordem.
+# Lista finalizada sem `finalizada_em` recebe o instante atual, como na rota de finalizar.
+@pytest.fixture
+def criar_lista(db_session, usuario):
+    def _criar(nome="Mercado", itens=None, finalizada=False, finalizada_em=None):
+        if finalizada and finalizada_em is None:
+            finalizada_em = datetime.now(timezone.utc)
+        lista = Lista(usuario_id=usuario.id, nome=nome, finalizada=finalizada, finalizada_em=finalizada_em)
+        db_session.add(lista)
+        db_session.flush()
+        for idx, dados in enumerate(itens or []):
+            if isinstance(dados, str):
+                dados = {"nome": dados}
+            elif isinstance(dados, tuple):
+                dados = dict(zip(("nome", "comprado", "quantidade"), dados))
+            db_session.add(
+                Item(
+                    lista_id=lista.id,
+                    nome=dados.get("nome", f"Item {idx+1}"),
+                    quantidade=dados.get("quantidade", 1),
+                    comprado=dados.get("comprado", False),
+                    ordem=dados.get("ordem", idx),
+                )
+            )
+        db_session.commit()
+        db_session.refresh(lista)
+        return lista
+
+    return _criar
+
+
+@pytest.fixture
+def cabecalhos_de():
+    def _cabecalhos(usuario):
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(usuario.id)})}"}
+
+    return _cabecalhos
+
+
+@pytest.fixture
+def client(usuario, cabecalhos_de):
+    cliente = TestClient(app, headers=cabecalhos_de(usuario))
+    # Token já validado (cache de get_current_user): as contagens de consultas dos testes
+    # ficam só com as da rota
+    cliente.get("/auth/me")
+    metricas_requisicoes.limpar()
+    return cliente
+
+
+@pytest.fixture
+def contar_consultas():
+    @contextmanager
+    def _contar():
+        consultas = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+
+        # Com DB_MODO=async as rotas consultam pelo engine async (mesmo arquivo de banco)
+        engines = [engine] + ([engine_async.sync_engine] if engine_async else [])
+        for alvo in engines:
+            event.listen(alvo, "before_cursor_execute", registrar)
+        try:
+            yield consultas
+        finally:
+            for alvo in engines:
+                event.remove(alvo, "before_cursor_execute", registrar)
+
+    return _contar
+
+
+# Roda o upgrade() de uma migração de dados sobre o banco dos testes (criado pelo create_all)
 @pytest.fixture
-def client():
-    return TestClient(app)
+def aplicar_migracao():
+    versoes = Path(__file__).resolve().parent.parent / "migrations" / "versions"
+
+    def _aplicar(revisao):
+        (caminho,) = versoes.glob(f"{revisao}_*.py")
+        spec = importlib.util.spec_from_file_location(caminho.stem, caminho)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        with engine.begin() as conn, Operations.context(MigrationContext.configure(conn)):
+            modulo.upgrade()
+
+    return _aplicar
@@ -1,6 +1,16 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
 from models import Usuario
 
 
+@pytest.fixture
+def client():
+    # Sem o token do conftest: aqui cada teste se registra e autentica
+    return TestClient(app)
+
+
 def registrar(client, nome="Usuário Teste", email="user@example.com", senha="segredo123"):
     return client.post("/auth/register", json={"nome": nome, "email": email, "senha": senha})
 
@@ -66,3 +76,99 @@ def test_logout_requer_token(client):
     resp = client.post("/auth/logout", headers={"Authorization": f"Bearer {token}"})
     assert resp.status_code == 200
     assert resp.json()["ok"] is True
+
+
+def test_me_em_cache_nao_consulta_banco(client, contar_consultas):
+    registrar(client)
+    token = autenticar(client).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    with contar_consultas() as consultas:
+        resp = client.get("/auth/me", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["email"] == "user@example.com"
+    assert consultas == []
+
+
+def test_logout_revoga_token_em_cache(client):
+    registrar(client)
+    token = autenticar(client).json()["access_token"]
+    outro = autenticar(client).json()["access_token"]
+    assert token != outro
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    # Outra sessão do mesmo usuário continua válida
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {outro}"}).status_code == 200
+
+
+def test_logout_vale_para_worker_sem_o_token_em_cache(client):
+    import main
+
+    registrar(client)
+    token = autenticar(client).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    # Outro worker: nenhum estado do processo que atendeu o logout
+    main.limpar_caches()
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_cache_respeita_expiracao_do_token(client):
+    from datetime import timedelta
+
+    from main import create_access_token, usuarios_autenticados, _hash_token
+
+    registrar(client)
+    token = create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert usuarios_autenticados.obter(_hash_token(token)) is None
+
+
+def test_login_regrava_hash_com_custo_antigo(client, session_factory):
+    from passlib.context import CryptContext
+
+    import main
+
+    registrar(client)
+    antigo = CryptContext(schemes=["bcrypt"], bcrypt__rounds=main.BCRYPT_ROUNDS + 1).hash("segredo123")
+    db = session_factory()
+    try:
+        db.query(Usuario).update({Usuario.senha_hash: antigo})
+        db.commit()
+        assert autenticar(client).status_code == 200
+        db.expire_all()
+        novo = db.query(Usuario.senha_hash).scalar()
+    finally:
+        db.close()
+    assert novo != antigo
+    assert not main.pwd_context.needs_update(novo)
+    assert autenticar(client).status_code == 200
+
+
+def test_login_responde_429_com_pool_saturado(client, monkeypatch):
+    import threading
+
+    import main
+    from senhas import PoolSenhas
+
+    registrar(client)
+    liberar = threading.Event()
+    pool = PoolSenhas(main.pwd_context, workers=1, fila_max=0)
+    monkeypatch.setattr(main, "pool_senhas", pool)
+    ocupado = pool.submeter(liberar.wait)
+    try:
+        assert pool.estatisticas()["em_execucao"] == 1
+        resp = autenticar(client)
+        assert resp.status_code == 429
+        assert resp.headers["retry-after"] == "1"
+        assert pool.estatisticas()["rejeitadas"] == 1
+    finally:
+        liberar.set()
+        ocupado.result()
+    assert autenticar(client).status_code == 200
+    assert pool.estatisticas()["em_execucao"] == 0
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from banco import PoolMedido, aplicar_perfil_sqlite, estatisticas_pool, metricas_pool, opcoes_engine
+
+
+@pytest.fixture
+def engine_temporario(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "1")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.05")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **opcoes_engine(url))
+    aplicar_perfil_sqlite(engine, url)
+    metricas_pool.limpar()
+    yield engine
+    engine.dispose()
+    metricas_pool.limpar()
+
+
+def test_opcoes_do_pool_vem_do_ambiente(engine_temporario):
+    assert isinstance(engine_temporario.pool, PoolMedido)
+    assert engine_temporario.pool.size() == 1
+    assert engine_temporario.pool._pre_ping is False
+
+
+def test_perfil_sqlite_aplica_pragmas(engine_temporario):
+    with engine_temporario.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_metricas_registram_checkout_saturacao_e_timeout(engine_temporario):
+    with engine_temporario.connect():
+        dados = estatisticas_pool(engine_temporario)
+        assert dados["em_uso"] == 1
+        assert dados["saturacao"] == 1.0
+        with pytest.raises(PoolTimeoutError):
+            engine_temporario.connect()
+    dados = estatisticas_pool(engine_temporario)
+    assert dados["checkouts"] == 1
+    assert dados["timeouts"] == 1
+    assert dados["espera_max_s"] >= 0.05
+    assert dados["em_uso"] == 0
@@ -0,0 +1,46 @@
+import inspect
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+from banco_async import rota_async, url_async
+
+
+def test_url_async_troca_driver():
+    assert url_async("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert url_async("postgresql://u:s@host:5432/db") == "postgresql+asyncpg://u:s@host:5432/db"
+    assert url_async("postgresql+psycopg2://u:s@host/db") == "postgresql+asyncpg://u:s@host/db"
+    with pytest.raises(RuntimeError):
+        url_async("mysql://u:s@host/db")
+
+
+def test_rota_async_executa_corpo_sincrono_com_run_sync():
+    class SessaoFalsa:
+        async def run_sync(self, funcao):
+            return funcao("sessao-sync")
+
+    async def obter_sessao():
+        yield SessaoFalsa()
+
+    def rota(lista_id: int, limite: int = 10, db=None):
+        return {"lista_id": lista_id, "limite": limite, "db": db}
+
+    convertida = rota_async(rota, obter_sessao)
+    assert inspect.iscoroutinefunction(convertida)
+    app = FastAPI()
+    app.get("/x/{lista_id}")(convertida)
+    resp = TestClient(app).get("/x/7", params={"limite": 3})
+    assert resp.json() == {"lista_id": 7, "limite": 3, "db": "sessao-sync"}
+
+
+@pytest.mark.skipif(main.DB_MODO != "async", reason="só no DB_MODO=async")
+def test_usuario_do_token_sai_da_sessao_async(client):
+    # Nada de dependência síncrona no caminho das rotas: a busca do usuário usa a AsyncSession
+    assert inspect.iscoroutinefunction(main.get_current_user)
+    main.limpar_caches()
+    resp = client.get("/auth/me")
+    assert resp.status_code == 200
+    main.limpar_caches()
+    assert client.get("/api/listas").status_code == 200
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+# Cada benchmark uma vez, na menor escala, num banco próprio: quebra de assinatura ou de
+# schema aparece aqui em vez de só quando alguém for medir
+def rodar(tmp_path, modulo, *args):
+    ambiente = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'bench.db'}")
+    resultado = subprocess.run(
+        [sys.executable, "-m", modulo, *args], cwd=RAIZ, env=ambiente, capture_output=True, text=True, timeout=120
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return resultado.stdout
+
+
+@pytest.mark.parametrize(
+    "modulo, args",
+    [
+        ("benchmarks.bench_clonar", ("--tamanhos", "10", "--repeticoes", "1")),
+        ("benchmarks.bench_serializacao", ("--tamanhos", "10", "--repeticoes", "1")),
+        ("benchmarks.bench_carga", ("--requisicoes", "8", "--concorrencia", "2", "--listas", "2", "--itens", "2")),
+    ],
+)
+def test_benchmark_roda(tmp_path, modulo, args):
+    assert rodar(tmp_path, modulo, *args).strip()
+
+
+def test_suite_roda_sem_erros(tmp_path):
+    saida = tmp_path / "base.json"
+    rodar(tmp_path, "benchmarks.suite", "--escalas", "4", "--itens", "2", "--requisicoes", "3", "--saida", str(saida))
+    resultados = json.loads(saida.read_text())["resultados"]["4"]
+    assert {nome: r["erros"] for nome, r in resultados.items() if r["erros"]} == {}
@@ -0,0 +1,101 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from contadores import verificar_contadores
+from models import Lista
+
+
+def resumo(client, lista_id):
+    dados = client.get(f"/api/listas/{lista_id}/resumo").json()
+    return dados["itens"], dados["comprados"]
+
+
+def sem_divergencias(session_factory):
+    db = session_factory()
+    try:
+        return verificar_contadores(db) == []
+    finally:
+        db.close()
+
+
+def test_contadores_acompanham_as_rotas_de_itens(client, session_factory, criar_lista):
+    lista_id = criar_lista(itens=[("Arroz", True), ("Feijão", False)]).id
+    assert resumo(client, lista_id) == (2, 1)
+
+    item = client.post(f"/api/listas/{lista_id}/itens", json={"nome": "Café"}).json()
+    assert resumo(client, lista_id) == (3, 1)
+
+    client.put(f"/api/listas/{lista_id}/itens/{item['id']}", json={"comprado": True})
+    assert resumo(client, lista_id) == (3, 2)
+
+    client.delete(f"/api/listas/{lista_id}/itens/{item['id']}")
+    assert resumo(client, lista_id) == (2, 1)
+
+    ids = [i["id"] for i in client.get(f"/api/listas/{lista_id}/itens").json()]
+    resp = client.post(
+        f"/api/listas/{lista_id}/itens/batch",
+        json={"operacoes": [
+            {"op": "criar", "nome": "Leite"},
+            {"op": "alternar", "id": ids[1]},
+            {"op": "excluir", "id": ids[0]},
+        ]},
+    )
+    assert resp.status_code == 200
+    assert resumo(client, lista_id) == (2, 1)
+
+    client.put(f"/api/listas/{lista_id}/itens/ordenar", json={"ordem": list(reversed(ids[1:]))})
+    resp = client.post(f"/api/listas/{lista_id}/importar", params={"formato": "csv"}, content=b"nome,comprado\nSal,1\nOvos,0\n")
+    assert resp.status_code == 200
+    assert resumo(client, lista_id) == (4, 2)
+    assert sem_divergencias(session_factory)
+
+
+def test_contadores_em_listas_clonadas_e_na_listagem(client, session_factory, criar_lista):
+    lista_id = criar_lista(itens=[("Arroz", True), ("Feijão", False), ("Sal", True)]).id
+    assert client.post(f"/api/listas/{lista_id}/finalizar").status_code == 200
+
+    restaurada = client.post(f"/api/historico/restaurar/{lista_id}").json()
+    duplicada = client.post(f"/api/historico/duplicar/{lista_id}").json()
+    assert restaurada["itens_count"] == duplicada["itens_count"] == 3
+    assert resumo(client, restaurada["id"]) == (3, 0)
+    assert resumo(client, duplicada["id"]) == (3, 2)
+
+    cartoes = {l["id"]: l for l in client.get("/api/listas").json()}
+    assert (cartoes[duplicada["id"]]["itens_count"], cartoes[duplicada["id"]]["itens_comprados"]) == (3, 2)
+    assert sem_divergencias(session_factory)
+
+
+def test_verificar_contadores_aponta_e_repara_divergencias(db_session, client, session_factory, criar_lista):
+    lista_id = criar_lista(itens=[("Arroz", True), ("Feijão", False)]).id
+    outra_id = criar_lista(nome="Feira", itens=[("Banana", False)]).id
+    db_session.query(Lista).filter(Lista.id == lista_id).update({"itens_total": 7, "itens_comprados": 0})
+    db_session.commit()
+    etag = client.get(f"/api/listas/{lista_id}/resumo").headers["etag"]
+
+    divergencias = verificar_contadores(db_session)
+    assert [(d.lista_id, d.total_real, d.comprados_real) for d in divergencias] == [(lista_id, 2, 1)]
+
+    verificar_contadores(db_session, reparar=True)
+    db_session.commit()
+    assert verificar_contadores(db_session) == []
+    resp = client.get(f"/api/listas/{lista_id}/resumo", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert (resp.json()["itens"], resp.json()["comprados"]) == (2, 1)
+    assert resumo(client, outra_id) == (1, 0)
+
+
+def test_create_all_so_com_models_cria_os_triggers():
+    # Processo novo, sem main/contadores importados (como os benchmarks): os triggers vêm de models
+    script = (
+        "from sqlalchemy import create_engine, text\n"
+        "from models import Base\n"
+        "engine = create_engine('sqlite://')\n"
+        "Base.metadata.create_all(engine)\n"
+        "with engine.connect() as conn:\n"
+        "    print(sorted(conn.execute(text(\"SELECT name FROM sqlite_master WHERE name LIKE 'itens_contadores%'\")).scalars()))\n"
+    )
+    saida = subprocess.run(
+        [sys.executable, "-c", script], cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True
+    ).stdout
+    assert saida.strip() == "['itens_contadores_ad', 'itens_contadores_ai', 'itens_contadores_au']"
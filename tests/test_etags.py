@@ -0,0 +1,86 @@
+def criar(client, nome="Mercado", itens=("Arroz", "Feijão")):
+    lista = client.post("/api/listas", json={"nome": nome}).json()
+    ids = [client.post(f"/api/listas/{lista['id']}/itens", json={"nome": n}).json()["id"] for n in itens]
+    return lista["id"], ids
+
+
+def etag(client, url, **kwargs):
+    resp = client.get(url, **kwargs)
+    assert resp.status_code == 200
+    return resp.headers["etag"]
+
+
+def test_itens_responde_304_sem_ler_itens(client, contar_consultas):
+    lista_id, _ = criar(client)
+    url = f"/api/listas/{lista_id}/itens"
+    atual = etag(client, url)
+    with contar_consultas() as consultas:
+        resp = client.get(url, headers={"If-None-Match": atual})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == atual
+    assert resp.content == b""
+    assert len(consultas) == 1 and "itens" not in consultas[0]
+    assert client.get(url, headers={"If-None-Match": f'"outro", W/{atual}'}).status_code == 304
+
+
+def test_mutacoes_mudam_a_versao_da_lista(client):
+    lista_id, (arroz, feijao) = criar(client)
+    url = f"/api/listas/{lista_id}/itens"
+    mutacoes = [
+        lambda: client.put(f"{url}/{arroz}", json={"comprado": True}),
+        lambda: client.put(f"{url}/{feijao}/mover", json={"antes_de": arroz}),
+        lambda: client.put(f"{url}/ordenar", json={"ordem": [arroz, feijao]}),
+        lambda: client.post(f"{url}/batch", json={"operacoes": [{"op": "alternar", "id": feijao}]}),
+        lambda: client.post(f"/api/listas/{lista_id}/importar", params={"formato": "csv"}, content=b"nome\nSal\n"),
+        lambda: client.delete(f"{url}/{arroz}"),
+        lambda: client.put(f"/api/listas/{lista_id}", json={"nome": "Feira"}),
+        lambda: client.post(f"/api/listas/{lista_id}/finalizar"),
+    ]
+    vistos = {etag(client, url)}
+    for mutacao in mutacoes:
+        assert mutacao().status_code == 200
+        novo = etag(client, url)
+        assert novo not in vistos
+        vistos.add(novo)
+
+
+def test_resumo_usa_etag_proprio(client):
+    lista_id, _ = criar(client)
+    url = f"/api/listas/{lista_id}/resumo"
+    atual = etag(client, url)
+    assert atual != etag(client, f"/api/listas/{lista_id}/itens")
+    assert client.get(url, headers={"If-None-Match": atual}).status_code == 304
+    client.post(f"/api/listas/{lista_id}/itens", json={"nome": "Sal"})
+    resp = client.get(url, headers={"If-None-Match": atual})
+    assert resp.status_code == 200
+    assert resp.json()["itens"] == 3
+
+
+def test_lista_recriada_com_o_mesmo_id_nao_herda_etag(client):
+    # O SQLite reaproveita o maior id depois de uma exclusão
+    lista_id, _ = criar(client, "Antiga")
+    antigos = {rota: etag(client, f"/api/listas/{lista_id}/{rota}") for rota in ("itens", "resumo")}
+    assert client.delete(f"/api/listas/{lista_id}").status_code == 200
+
+    nova = client.post("/api/listas", json={"nome": "Nova"}).json()
+    assert nova["id"] == lista_id
+    for rota, antigo in antigos.items():
+        resp = client.get(f"/api/listas/{lista_id}/{rota}", headers={"If-None-Match": antigo})
+        assert resp.status_code == 200, rota
+    assert client.get(f"/api/listas/{lista_id}/itens").json() == []
+
+
+def test_colecao_de_listas_muda_com_qualquer_lista(client):
+    primeira, _ = criar(client, "Primeira")
+    atual = etag(client, "/api/listas")
+    assert client.get("/api/listas", headers={"If-None-Match": atual}).status_code == 304
+    assert etag(client, "/api/listas", params={"previa": True}) != atual
+
+    client.post(f"/api/listas/{primeira}/itens", json={"nome": "Sal"})
+    depois_item = etag(client, "/api/listas")
+    assert depois_item != atual
+    criar(client, "Segunda", itens=())
+    depois_lista = etag(client, "/api/listas")
+    assert depois_lista not in {atual, depois_item}
+    client.delete(f"/api/listas/{primeira}")
+    assert etag(client, "/api/listas") not in {atual, depois_item, depois_lista}
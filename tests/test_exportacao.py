@@ -0,0 +1,167 @@
+import json
+
+import exportacao
+import importacao
+import main
+from models import Item, Lista
+
+
+def test_exportar_csv_escapa_aspas_e_mantem_formato(client, criar_lista):
+    lista = criar_lista("Feira", itens=[('Queijo "minas"', True, 1), ("Pão, francês", False, 2)])
+    resp = client.get(f"/api/listas/{lista.id}/exportar", params={"formato": "csv"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert 'filename="lista-' in resp.headers["content-disposition"]
+    assert resp.text.splitlines() == [
+        "nome,quantidade,comprado",
+        '"Queijo ""minas""",1,1',
+        '"Pão, francês",2,0',
+    ]
+
+
+def test_exportar_nome_com_acentos_no_content_disposition(client, criar_lista):
+    lista = criar_lista("Feijão da Vó", itens=[("Feijão", False)])
+    resp = client.get(f"/api/listas/{lista.id}/exportar", params={"formato": "csv"})
+    assert resp.status_code == 200
+    disposicao = resp.headers["content-disposition"]
+    assert f'filename="lista-{lista.id}-feijao-da-vo.csv"' in disposicao
+    assert f"filename*=UTF-8''lista-{lista.id}-feij%C3%A3o-da-v%C3%B3.csv" in disposicao
+
+
+def test_exportar_txt_e_jsonl(client, criar_lista):
+    lista = criar_lista("Feira", itens=[("Banana", True, 1), ("Maçã", False, 2)])
+    txt = client.get(f"/api/listas/{lista.id}/exportar").text
+    assert txt.splitlines() == ["Lista: Feira", "", "01. [x] Banana (x1)", "02. [ ] Maçã (x2)"]
+
+    resp = client.get(f"/api/listas/{lista.id}/exportar", params={"formato": "jsonl"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(l) for l in resp.text.splitlines()]
+    assert linhas == [
+        {"nome": "Banana", "quantidade": 1, "comprado": True},
+        {"nome": "Maçã", "quantidade": 2, "comprado": False},
+    ]
+
+
+def test_exportar_gera_pedacos_incrementais(db_session, monkeypatch, criar_lista):
+    monkeypatch.setattr(exportacao, "TAMANHO_PEDACO", 64)
+    lista = criar_lista("Grande", itens=[(f"Item {i}", False) for i in range(200)])
+    pedacos = list(exportacao.exportar_itens(db_session, lista, "csv"))
+    assert len(pedacos) > 10
+    assert all(len(p) < 128 for p in pedacos)
+    assert b"".join(pedacos).decode().count("\n") == 201
+
+
+def test_exportar_historico_inclui_todas_as_listas_finalizadas(client, criar_lista):
+    criar_lista("Aberta", itens=[("Nada", False)])
+    criar_lista("Churrasco", itens=[("Carvão", True), ("Carne", False)], finalizada=True)
+    criar_lista("Vazia", finalizada=True)
+
+    resp = client.get("/api/historico/exportar")
+    assert resp.status_code == 200
+    linhas = [json.loads(l) for l in resp.text.splitlines()]
+    assert sorted((l["lista"], l["nome"]) for l in linhas) == [
+        ("Churrasco", "Carne"),
+        ("Churrasco", "Carvão"),
+        ("Vazia", None),
+    ]
+
+    csv_linhas = client.get("/api/historico/exportar", params={"formato": "csv"}).text.splitlines()
+    assert csv_linhas[0] == "lista_id,lista,finalizada_em,nome,quantidade,comprado"
+    assert len(csv_linhas) == 4
+    assert client.get("/api/historico/exportar", params={"formato": "xml"}).status_code == 400
+
+
+def test_importar_csv_exportado_em_outra_lista(client, session_factory, criar_lista):
+    origem = criar_lista("Origem", itens=[('Queijo "minas"', True, 1), ("Pão, francês", False, 2)])
+    destino = criar_lista("Destino", itens=[("Já existia", False)])
+    csv_exportado = client.get(f"/api/listas/{origem.id}/exportar", params={"formato": "csv"}).content
+
+    resp = client.post(f"/api/listas/{destino.id}/importar", params={"formato": "csv"}, content=csv_exportado)
+    assert resp.status_code == 200
+    relatorio = resp.json()
+    assert relatorio["itens_importados"] == 2
+    assert relatorio["total_erros"] == 0
+    assert relatorio["linhas_por_segundo"] > 0
+
+    verificar = session_factory()
+    try:
+        itens = verificar.query(Item).filter(Item.lista_id == destino.id).order_by(Item.ordem.asc()).all()
+    finally:
+        verificar.close()
+    assert [(i.nome, i.quantidade, i.comprado) for i in itens] == [
+        ("Já existia", 1, False),
+        ('Queijo "minas"', 1, True),
+        ("Pão, francês", 2, False),
+    ]
+    assert len({i.ordem for i in itens}) == 3
+
+
+def test_importar_jsonl_relata_erros_por_linha(client, criar_lista):
+    lista = criar_lista("Destino")
+    corpo = "\n".join(
+        [
+            '{"nome": "Arroz", "quantidade": 2, "comprado": false}',
+            "não é json",
+            '{"nome": ""}',
+            '{"nome": "Feijão", "quantidade": "muitos"}',
+            '{"nome": "Café"}',
+        ]
+    ).encode()
+    resp = client.post(f"/api/listas/{lista.id}/importar", params={"formato": "jsonl"}, content=corpo)
+    relatorio = resp.json()
+    assert relatorio["linhas"] == 5
+    assert relatorio["itens_importados"] == 2
+    assert [e["linha"] for e in relatorio["erros"]] == [2, 3, 4]
+
+    assert client.post("/api/listas/999/importar", content=b"").status_code == 404
+    assert client.post(f"/api/listas/{lista.id}/importar", params={"formato": "xls"}, content=b"").status_code == 400
+
+
+def test_importar_historico_recria_listas_exportadas(client, criar_lista):
+    criar_lista("Churrasco", itens=[("Carvão", True), ("Carne", False)], finalizada=True)
+    criar_lista("Vazia", finalizada=True)
+    arquivo = client.get("/api/historico/exportar", params={"formato": "csv"}).content
+    assert client.get("/api/historico").json()["meta"]["total"] == 2
+
+    resp = client.post("/api/historico/importar", params={"formato": "csv"}, content=arquivo)
+    assert resp.status_code == 200
+    relatorio = resp.json()
+    assert relatorio["listas_criadas"] == 2
+    assert relatorio["itens_importados"] == 2
+
+    historico = client.get("/api/historico").json()
+    assert historico["meta"]["total"] == 4
+    contagens = sorted((l["nome"], l["itens_count"]) for l in historico["data"])
+    assert contagens == [("Churrasco", 2), ("Churrasco", 2), ("Vazia", 0), ("Vazia", 0)]
+
+
+def test_importar_acima_do_limite_de_linhas_responde_413_sem_gravar(client, session_factory, criar_lista, monkeypatch):
+    lista = criar_lista("Destino")
+    monkeypatch.setattr(main, "IMPORTACAO_MAX_LINHAS", 3)
+    # Lotes de 2 linhas: o primeiro já foi gravado quando o limite estoura, e o rollback o desfaz
+    monkeypatch.setattr(importacao, "LOTE_IMPORTACAO", 2)
+    corpo = b"nome\nArroz\nFeijao\nSal\nOvos\n"
+    resp = client.post(f"/api/listas/{lista.id}/importar", params={"formato": "csv"}, content=corpo)
+    assert resp.status_code == 413
+    assert "3 linhas" in resp.json()["detail"]
+    resp = client.post("/api/historico/importar", params={"formato": "csv"}, content=b"lista,nome\n" + b"Feira,Sal\n" * 4)
+    assert resp.status_code == 413
+
+    with session_factory() as sessao:
+        assert sessao.query(Item).count() == 0
+        assert sessao.query(Lista).count() == 1
+    # No limite exato passa
+    resp = client.post(f"/api/listas/{lista.id}/importar", params={"formato": "csv"}, content=b"nome\nArroz\nFeijao\nSal\n")
+    assert resp.status_code == 200 and resp.json()["itens_importados"] == 3
+
+
+def test_importar_acima_do_limite_de_bytes_responde_413(client, criar_lista, monkeypatch):
+    lista = criar_lista("Destino")
+    monkeypatch.setattr(main, "IMPORTACAO_MAX_BYTES", 16)
+    corpo = b"nome\n" + b"Arroz\n" * 5
+    resp = client.post(f"/api/listas/{lista.id}/importar", params={"formato": "csv"}, content=corpo)
+    assert resp.status_code == 413
+    # Sem Content-Length (chunked) o corte vem da contagem dos bytes recebidos
+    resp = client.post(f"/api/listas/{lista.id}/importar", params={"formato": "csv"}, content=iter([corpo[:10], corpo[10:]]))
+    assert resp.status_code == 413
+    assert client.get(f"/api/listas/{lista.id}/itens").json() == []
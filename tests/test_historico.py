@@ -1,41 +1,19 @@
 from datetime import datetime, timedelta, timezone
 
-from models import Lista, Item
+from sqlalchemy import text
 
+from models import Item
 
-def criar_lista(db, nome, finalizada=False, itens=None, finalizada_em=None):
-    lista = Lista(
-        nome=nome,
-        finalizada=finalizada,
-        finalizada_em=finalizada_em,
-    )
-    db.add(lista)
-    db.flush()
-    for idx, dados in enumerate(itens or []):
-        item = Item(
-            lista_id=lista.id,
-            nome=dados.get("nome", f"Item {idx+1}"),
-            quantidade=dados.get("quantidade", 1),
-            comprado=dados.get("comprado", False),
-            ordem=dados.get("ordem", idx),
-        )
-        db.add(item)
-    db.commit()
-    db.refresh(lista)
-    return lista
 
-
-def test_historico_listagem_aplica_busca_e_periodo(db_session, client):
+def test_historico_listagem_aplica_busca_e_periodo(client, criar_lista):
     agora = datetime.now(timezone.utc)
     criar_lista(
-        db_session,
         nome="Feira semanal",
         finalizada=True,
         finalizada_em=agora - timedelta(days=2),
         itens=[{"nome": "Banana"}],
     )
     criar_lista(
-        db_session,
         nome="Viagem",
         finalizada=True,
         finalizada_em=agora - timedelta(days=40),
@@ -50,9 +28,8 @@ def test_historico_listagem_aplica_busca_e_periodo(db_session, client):
     assert data["data"][0]["preview_itens"][0]["nome"] == "Banana"
 
 
-def test_restaurar_lista_reseta_itens_e_nome(db_session, client, session_factory):
+def test_restaurar_lista_reseta_itens_e_nome(client, session_factory, criar_lista):
     origem = criar_lista(
-        db_session,
         nome="Compras julho",
         finalizada=True,
         finalizada_em=datetime.now(timezone.utc) - timedelta(days=1),
@@ -80,9 +57,8 @@ def test_restaurar_lista_reseta_itens_e_nome(db_session, client, session_factory
     assert [item.nome for item in itens_restaurados] == ["Arroz", "Feijão"]
 
 
-def test_duplicar_lista_preserva_status_e_itens(db_session, client, session_factory):
+def test_duplicar_lista_preserva_status_e_itens(client, session_factory, criar_lista):
     origem = criar_lista(
-        db_session,
         nome="Churrasco",
         finalizada=True,
         finalizada_em=datetime.now(timezone.utc) - timedelta(days=3),
@@ -108,15 +84,13 @@ def test_duplicar_lista_preserva_status_e_itens(db_session, client, session_fact
     assert {item.lista_id for item in itens_duplicados} == {duplicada["id"]}
 
 
-def test_nome_personalizado_respeitado_com_sufixo_em_conflito(db_session, client):
+def test_nome_personalizado_respeitado_com_sufixo_em_conflito(client, criar_lista):
     criar_lista(
-        db_session,
         nome="Quebra",
         finalizada=False,
         itens=[{"nome": "Item"}],
     )
     origem = criar_lista(
-        db_session,
         nome="Quebra",
         finalizada=True,
         finalizada_em=datetime.now(timezone.utc),
@@ -130,10 +104,9 @@ def test_nome_personalizado_respeitado_com_sufixo_em_conflito(db_session, client
     assert "cópia" in novo["nome"].lower()
 
 
-def test_historico_previas_limitadas_a_tres(db_session, client):
+def test_historico_previas_limitadas_a_tres(client, criar_lista):
     itens = [{"nome": f"Item {i}", "ordem": i} for i in range(5)]
     criar_lista(
-        db_session,
         nome="Mega lista",
         finalizada=True,
         finalizada_em=datetime.now(timezone.utc),
@@ -145,3 +118,220 @@ def test_historico_previas_limitadas_a_tres(db_session, client):
     preview = payload["data"][0]["preview_itens"]
     assert len(preview) == 3
     assert preview[0]["nome"] == "Item 0"
+
+
+def test_historico_modo_cursor_percorre_sem_repetir(client, criar_lista):
+    agora = datetime.now(timezone.utc)
+    for n in range(5):
+        criar_lista(
+            nome=f"Semana {n}",
+            finalizada=True,
+            finalizada_em=agora - timedelta(days=n),
+        )
+    # Mesmo instante de finalização: o desempate por criado_em/id mantém a ordem estável
+    for n in range(2):
+        criar_lista(nome=f"Empate {n}", finalizada=True, finalizada_em=agora - timedelta(days=6))
+
+    nomes = []
+    params = {"modo": "cursor", "limit": 2}
+    while True:
+        resp = client.get("/api/historico", params=params)
+        assert resp.status_code == 200
+        payload = resp.json()
+        assert payload["meta"]["total"] == 7
+        nomes.extend(l["nome"] for l in payload["data"])
+        proximo = payload["meta"]["next_cursor"]
+        if not proximo:
+            assert payload["meta"]["has_more"] is False
+            break
+        params = {"cursor": proximo, "limit": 2}
+    assert nomes == [f"Semana {n}" for n in range(5)] + ["Empate 1", "Empate 0"]
+
+
+def test_historico_modo_cursor_com_datas_legadas_sem_fracao(db_session, client, usuario, aplicar_migracao):
+    # Datas gravadas como texto sem fração de segundo (CURRENT_TIMESTAMP), com empates
+    ontem = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    for n in range(5):
+        db_session.execute(
+            text(
+                "INSERT INTO listas (usuario_id, nome, criado_em, finalizada, finalizada_em) "
+                "VALUES (:u, :nome, '2024-01-01 10:00:00', 1, :finalizada_em)"
+            ),
+            {"u": usuario.id, "nome": f"Antiga {n}", "finalizada_em": ontem},
+        )
+    db_session.commit()
+    aplicar_migracao("f1a6d3c8b205")
+
+    nomes = []
+    params = {"modo": "cursor", "limit": 2}
+    for _ in range(10):
+        payload = client.get("/api/historico", params=params).json()
+        nomes.extend(l["nome"] for l in payload["data"])
+        proximo = payload["meta"]["next_cursor"]
+        if not proximo:
+            break
+        params = {"cursor": proximo, "limit": 2}
+    assert proximo is None
+    assert nomes == [f"Antiga {n}" for n in reversed(range(5))]
+
+
+def test_historico_total_em_cache_invalidado_ao_finalizar_e_excluir(client, criar_lista):
+    criar_lista(nome="Antiga", finalizada=True, finalizada_em=datetime.now(timezone.utc))
+    aberta = criar_lista(nome="Aberta")
+
+    assert client.get("/api/historico").json()["meta"]["total"] == 1
+
+    assert client.post(f"/api/listas/{aberta.id}/finalizar").status_code == 200
+    assert client.get("/api/historico").json()["meta"]["total"] == 2
+
+    assert client.delete(f"/api/listas/{aberta.id}").status_code == 200
+    assert client.get("/api/historico").json()["meta"]["total"] == 1
+
+
+def test_historico_cursor_invalido(client):
+    resp = client.get("/api/historico", params={"cursor": "???"})
+    assert resp.status_code == 400
+
+
+def _nomes_busca(client, termo):
+    resp = client.get("/api/historico", params={"busca": termo})
+    assert resp.status_code == 200
+    return sorted(l["nome"] for l in resp.json()["data"])
+
+
+def test_historico_busca_por_trecho_e_por_nome_de_item(client, criar_lista):
+    agora = datetime.now(timezone.utc)
+    criar_lista(nome="Feira semanal", finalizada=True, finalizada_em=agora, itens=[{"nome": "Banana"}])
+    criar_lista(nome="Mercado", finalizada=True, finalizada_em=agora, itens=[{"nome": "Café torrado"}])
+    criar_lista(nome="Padaria", finalizada=True, finalizada_em=agora, itens=[{"nome": "Pão"}])
+
+    assert _nomes_busca(client, "eira") == ["Feira semanal"]
+    assert _nomes_busca(client, "café") == ["Mercado"]
+    assert _nomes_busca(client, "CAFÉ TOR") == ["Mercado"]
+    # Termos curtos não usam o índice trigram, mas continuam funcionando
+    assert _nomes_busca(client, "Pã") == ["Padaria"]
+    assert _nomes_busca(client, "%") == []
+
+
+def test_historico_busca_acompanha_renomeacao(client, criar_lista):
+    lista = criar_lista(nome="Rascunho", finalizada=True, finalizada_em=datetime.now(timezone.utc))
+    assert client.put(f"/api/listas/{lista.id}", json={"nome": "Churrasco"}).status_code == 200
+
+    assert _nomes_busca(client, "Rascunho") == []
+    assert _nomes_busca(client, "urras") == ["Churrasco"]
+
+
+def test_historico_total_da_busca_acompanha_nomes_de_listas_e_itens(client, criar_lista):
+    lista = criar_lista(nome="Rascunho", finalizada=True, finalizada_em=datetime.now(timezone.utc))
+    base = f"/api/listas/{lista.id}"
+
+    def total(termo):
+        return client.get("/api/historico", params={"busca": termo}).json()["meta"]["total"]
+
+    assert total("Churrasco") == 0
+    client.put(base, json={"nome": "Churrasco"})
+    assert total("Churrasco") == 1
+
+    assert total("Carvão") == 0
+    item = client.post(f"{base}/itens", json={"nome": "Carvão"}).json()
+    assert total("Carvão") == 1
+    client.put(f"{base}/itens/{item['id']}", json={"nome": "Sal grosso"})
+    assert (total("Carvão"), total("Sal grosso")) == (0, 1)
+    client.delete(f"{base}/itens/{item['id']}")
+    assert total("Sal grosso") == 0
+
+
+def test_historico_busca_backend_like(client, monkeypatch, criar_lista):
+    import main
+    from busca import obter_backend_busca
+
+    monkeypatch.setattr(main, "backend_busca", obter_backend_busca("sqlite", "like"))
+    criar_lista(nome="Viagem", finalizada=True, finalizada_em=datetime.now(timezone.utc), itens=[{"nome": "Café"}])
+    assert _nomes_busca(client, "caf") == ["Viagem"]
+    assert _nomes_busca(client, "iage") == ["Viagem"]
+
+
+def test_historico_previas_e_contagens_sem_consulta_por_lista(client, contar_consultas, criar_lista):
+    agora = datetime.now(timezone.utc)
+    for n in range(6):
+        itens = [{"nome": f"Item {i}", "comprado": i % 2 == 0} for i in range(20)]
+        criar_lista(nome=f"Lista {n}", finalizada=True, finalizada_em=agora - timedelta(hours=n), itens=itens)
+
+    client.get("/api/historico")  # aquece o cache do total
+    with contar_consultas() as consultas:
+        resp = client.get("/api/historico", params={"limit": 6})
+    payload = resp.json()
+    assert len(payload["data"]) == 6
+    for lista in payload["data"]:
+        assert lista["itens_count"] == 20
+        assert lista["itens_comprados"] == 10
+        assert [i["nome"] for i in lista["preview_itens"]] == ["Item 0", "Item 1", "Item 2"]
+    # Uma consulta para a página e outra para prévias + contagens
+    assert len(consultas) == 2
+
+
+def test_lista_to_dict_com_itens_usa_carregador_de_previas(db_session, criar_lista):
+    from main import lista_to_dict
+
+    lista = criar_lista(nome="Detalhe", itens=[{"nome": f"Item {i}", "ordem": 5 - i} for i in range(5)])
+    dados = lista_to_dict(lista, db_session, incluir_itens=True)
+    assert dados["itens_count"] == 5
+    assert [i["nome"] for i in dados["preview_itens"]] == ["Item 4", "Item 3", "Item 2"]
+
+
+def test_restaurar_repetidamente_gera_numeracao_sem_lacunas(client, contar_consultas, criar_lista):
+    origem = criar_lista(nome="Feira semanal", finalizada=True, finalizada_em=datetime.now(timezone.utc))
+    criar_lista(nome="Feira semanal (restaurada)")
+    for n in (2, 3, 5):
+        criar_lista(nome=f"Feira semanal (restaurada) {n}")
+    criar_lista(nome="Feira semanal (restaurada) extra")
+
+    with contar_consultas() as consultas:
+        resp = client.post(f"/api/historico/restaurar/{origem.id}")
+    assert resp.json()["nome"] == "Feira semanal (restaurada) 4"
+    assert len([c for c in consultas if "SELECT DISTINCT listas.nome" in c]) == 1
+    assert not [c for c in consultas if "WHERE listas.nome = " in c]
+
+    resp = client.post(f"/api/historico/restaurar/{origem.id}")
+    assert resp.json()["nome"] == "Feira semanal (restaurada) 6"
+
+
+def test_restauracoes_concorrentes_nao_repetem_nome(client, criar_lista):
+    from concurrent.futures import ThreadPoolExecutor
+
+    origem = criar_lista(
+        nome="Mercado",
+        finalizada=True,
+        finalizada_em=datetime.now(timezone.utc),
+        itens=[{"nome": "Arroz"}],
+    )
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        respostas = list(executor.map(lambda _: client.post(f"/api/historico/restaurar/{origem.id}"), range(6)))
+    assert all(r.status_code == 200 for r in respostas)
+    nomes = [r.json()["nome"] for r in respostas]
+    assert len(set(nomes)) == 6
+
+
+
+def test_trava_de_nomes_e_por_usuario(db_session):
+    import threading
+
+    from main import _trava_nome
+
+    def travar_em_outra_thread(usuario_id):
+        def travar():
+            with _trava_nome(db_session, usuario_id):
+                pass
+
+        thread = threading.Thread(target=travar)
+        thread.start()
+        thread.join(timeout=0.3)
+        return thread
+
+    with _trava_nome(db_session, 1):
+        # Outro usuário não espera; o mesmo usuário espera, qualquer que seja o nome que for gerar
+        assert not travar_em_outra_thread(2).is_alive()
+        mesmo_usuario = travar_em_outra_thread(1)
+        assert mesmo_usuario.is_alive()
+    mesmo_usuario.join(timeout=1)
+    assert not mesmo_usuario.is_alive()
@@ -0,0 +1,100 @@
+import re
+
+from sqlalchemy import event
+
+from main import Base, engine_async
+
+# "SCAN listas" sem índice: leitura da tabela inteira. Subconsultas (anon_1), tabelas FTS
+# (VIRTUAL TABLE) e "SCAN ... USING INDEX" não contam.
+TABELAS = set(Base.metadata.tables)
+_SCAN = re.compile(r"^SCAN (\w+)(?: |$)")
+
+
+def varreduras(engine, statement, parametros):
+    conexao = engine.raw_connection()
+    try:
+        plano = conexao.driver_connection.execute("EXPLAIN QUERY PLAN " + statement, parametros).fetchall()
+    finally:
+        conexao.close()
+    detalhes = [linha[3] for linha in plano]
+    ruins = []
+    for detalhe in detalhes:
+        achado = _SCAN.match(detalhe)
+        if achado and achado.group(1) in TABELAS and "USING" not in detalhe:
+            ruins.append(detalhe)
+    return ruins, detalhes
+
+
+def test_consultas_das_rotas_frequentes_usam_indices(client, db_session):
+    engine = db_session.get_bind()
+    capturadas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            capturadas.append((statement, parameters))
+
+    # Carga completa do /api/sync lê todas as listas por definição; só a incremental entra
+    token = client.get("/api/sync").json()["token"]
+    engines = [engine] + ([engine_async.sync_engine] if engine_async else [])
+    for alvo in engines:
+        event.listen(alvo, "before_cursor_execute", registrar)
+    try:
+        lista = client.post("/api/listas", json={"nome": "Mercado"}).json()
+        base = f"/api/listas/{lista['id']}"
+        for nome in ("Arroz", "Feijão", "Café"):
+            client.post(f"{base}/itens", json={"nome": nome})
+        ids = [i["id"] for i in client.get(f"{base}/itens").json()]
+        client.put(f"{base}/itens/{ids[0]}", json={"comprado": True})
+        client.put(f"{base}/itens/{ids[0]}/mover", json={"depois_de": ids[2]})
+        client.put(f"{base}/itens/ordenar", json={"ordem": ids})
+        client.post(f"{base}/itens/batch", json={"operacoes": [
+            {"op": "criar", "nome": "Leite"},
+            {"op": "alternar", "id": ids[1]},
+        ]})
+        client.get("/api/listas?limit=5")
+        client.get("/api/listas?limit=5&previa=true")
+        client.get("/api/listas?limit=5&finalizada=false&nome=Mer")
+        client.get(f"{base}/resumo")
+        client.post(f"{base}/finalizar")
+        client.get("/api/historico")
+        client.get("/api/historico?modo=cursor&limit=1")
+        client.get("/api/historico?busca=Caf")
+        client.get("/api/historico?periodo=7d&page=2")
+        client.get(f"/api/sync?since={token}")
+        client.post(f"/api/historico/duplicar/{lista['id']}")
+        client.post(f"/api/historico/restaurar/{lista['id']}")
+        client.delete(f"{base}/itens/{ids[2]}")
+    finally:
+        for alvo in engines:
+            event.remove(alvo, "before_cursor_execute", registrar)
+
+    assert capturadas
+    problemas = []
+    vistas = set()
+    for statement, parametros in capturadas:
+        if statement in vistas:
+            continue
+        vistas.add(statement)
+        ruins, detalhes = varreduras(engine, statement, parametros)
+        if ruins:
+            problemas.append(f"{' '.join(statement.split())}\n    {detalhes}")
+    assert not problemas, "\n".join(problemas)
+
+
+def test_itens_listas_e_historico_saem_na_ordem_do_indice(db_session):
+    planos = {}
+    for chave, statement in (
+        ("itens", "SELECT id FROM itens WHERE lista_id = ? ORDER BY ordem, criado_em, id"),
+        (
+            "historico",
+            "SELECT id FROM listas WHERE usuario_id = ? AND finalizada = 1 "
+            "ORDER BY finalizada_em DESC NULLS LAST, criado_em DESC, id DESC LIMIT 20",
+        ),
+        ("listas", "SELECT id FROM listas WHERE usuario_id = ? ORDER BY criado_em DESC, id DESC LIMIT 20"),
+    ):
+        planos[chave] = varreduras(db_session.get_bind(), statement, (1,))[1]
+    assert any("ix_itens_lista_ordem" in d for d in planos["itens"]), planos["itens"]
+    assert any("ix_listas_usuario_historico" in d for d in planos["historico"]), planos["historico"]
+    assert any("ix_listas_usuario_criado_em" in d for d in planos["listas"]), planos["listas"]
+    for detalhes in planos.values():
+        assert not any("TEMP B-TREE" in d for d in detalhes), detalhes
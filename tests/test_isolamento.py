@@ -0,0 +1,126 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from main import app
+from models import Usuario
+
+
+@pytest.fixture
+def outro(db_session, cabecalhos_de):
+    usuario = Usuario(nome="Outro", email="outro@example.com", senha_hash="-")
+    db_session.add(usuario)
+    db_session.commit()
+    return TestClient(app, headers=cabecalhos_de(usuario))
+
+
+def criar_com_itens(cliente, nome, itens=("Arroz", "Feijão")):
+    lista = cliente.post("/api/listas", json={"nome": nome}).json()
+    ids = [cliente.post(f"/api/listas/{lista['id']}/itens", json={"nome": n}).json()["id"] for n in itens]
+    return lista["id"], ids
+
+
+def test_rotas_exigem_token():
+    anonimo = TestClient(app)
+    for metodo, caminho in (
+        ("GET", "/api/listas"),
+        ("POST", "/api/listas"),
+        ("GET", "/api/listas/1/itens"),
+        ("GET", "/api/historico"),
+        ("GET", "/api/sync"),
+        ("GET", "/api/listas/1/exportar"),
+    ):
+        assert anonimo.request(metodo, caminho, json={"nome": "x"}).status_code == 401, caminho
+
+
+def test_usuario_nao_enxerga_nem_altera_listas_de_outro(client, outro):
+    lista_id, (arroz, feijao) = criar_com_itens(client, "Minha")
+    criar_com_itens(outro, "Dele")
+
+    assert [l["nome"] for l in client.get("/api/listas").json()] == ["Minha"]
+    assert [l["nome"] for l in outro.get("/api/listas").json()] == ["Dele"]
+
+    base = f"/api/listas/{lista_id}"
+    for metodo, caminho, corpo in (
+        ("GET", f"{base}/itens", None),
+        ("GET", f"{base}/resumo", None),
+        ("GET", f"{base}/exportar", None),
+        ("PUT", base, {"nome": "Tomada"}),
+        ("POST", f"{base}/itens", {"nome": "Intruso"}),
+        ("POST", f"{base}/itens/batch", {"operacoes": [{"op": "excluir", "id": arroz}]}),
+        ("PUT", f"{base}/itens/ordenar", {"ordem": [feijao, arroz]}),
+        ("PUT", f"{base}/itens/{arroz}", {"comprado": True}),
+        ("PUT", f"{base}/itens/{arroz}/mover", {"depois_de": feijao}),
+        ("DELETE", f"{base}/itens/{arroz}", None),
+        ("POST", f"{base}/finalizar", None),
+        ("DELETE", base, None),
+    ):
+        assert outro.request(metodo, caminho, json=corpo).status_code == 404, (metodo, caminho)
+
+    assert [i["nome"] for i in client.get(f"{base}/itens").json()] == ["Arroz", "Feijão"]
+    assert client.get(f"{base}/resumo").json() == {"id": lista_id, "itens": 2, "comprados": 0}
+
+
+def test_historico_e_clonagem_por_usuario(client, outro):
+    lista_id, _ = criar_com_itens(client, "Feira")
+    client.post(f"/api/listas/{lista_id}/finalizar")
+    outra_id, _ = criar_com_itens(outro, "Feira")
+    outro.post(f"/api/listas/{outra_id}/finalizar")
+    assert client.get("/api/historico").json()["meta"]["total"] == 1
+
+    # O total em cache é por usuário: um terceiro finalizado do outro não aparece aqui
+    terceira_id, _ = criar_com_itens(outro, "Padaria")
+    outro.post(f"/api/listas/{terceira_id}/finalizar")
+    assert outro.get("/api/historico").json()["meta"]["total"] == 2
+    assert [l["id"] for l in client.get("/api/historico").json()["data"]] == [lista_id]
+
+    assert outro.post(f"/api/historico/duplicar/{lista_id}").status_code == 404
+    assert outro.post(f"/api/historico/restaurar/{lista_id}").status_code == 404
+    # Os nomes das cópias só consideram as listas do próprio usuário
+    assert outro.post(f"/api/historico/duplicar/{outra_id}").json()["nome"] == "Feira (cópia)"
+    assert client.post(f"/api/historico/duplicar/{lista_id}").json()["nome"] == "Feira (cópia)"
+
+    exportado = client.get("/api/historico/exportar?formato=jsonl").text.splitlines()
+    assert {json.loads(linha)["lista_id"] for linha in exportado} == {lista_id}
+
+
+def test_sync_e_stream_por_usuario(client, outro, usuario, cabecalhos_de):
+    token = client.get("/api/sync").json()["token"]
+    lista_id, (arroz, _) = criar_com_itens(client, "Minha")
+    outra_id, (pao,) = criar_com_itens(outro, "Dele", itens=("Pão",))
+    outro.delete(f"/api/listas/{outra_id}/itens/{pao}")
+    outro.delete(f"/api/listas/{outra_id}")
+    client.delete(f"/api/listas/{lista_id}/itens/{arroz}")
+
+    dados = client.get(f"/api/sync?since={token}").json()
+    assert [l["id"] for l in dados["listas"]] == [lista_id]
+    assert {i["lista_id"] for i in dados["itens"]} == {lista_id}
+    assert dados["excluidos"] == {"listas": [], "itens": [arroz]}
+
+    with outro.websocket_connect(f"/api/listas/{lista_id}/stream") as ws:
+        with pytest.raises(WebSocketDisconnect) as erro:
+            ws.receive_json()
+    assert erro.value.code == 4404
+
+    with TestClient(app).websocket_connect(f"/api/listas/{lista_id}/stream") as ws:
+        with pytest.raises(WebSocketDisconnect) as erro:
+            ws.receive_json()
+    assert erro.value.code == 4401
+
+    # Navegadores não enviam headers no WebSocket: o token também vale na query string
+    token_acesso = cabecalhos_de(usuario)["Authorization"].split()[1]
+    with TestClient(app).websocket_connect(f"/api/listas/{lista_id}/stream?token={token_acesso}") as ws:
+        assert ws.receive_json() == {"tipo": "inscrito", "lista_id": lista_id}
+
+
+def test_importar_historico_cria_listas_do_usuario(client, outro):
+    corpo = '{"lista_id": 1, "lista": "Importada", "finalizada_em": "%s", "nome": "Sal"}\n' % (
+        datetime.now(timezone.utc).isoformat()
+    )
+    resp = client.post("/api/historico/importar?formato=jsonl", content=corpo.encode())
+    assert resp.json()["listas_criadas"] == 1
+    assert [l["nome"] for l in client.get("/api/historico").json()["data"]] == ["Importada"]
+    assert outro.get("/api/historico").json()["data"] == []
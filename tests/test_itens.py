@@ -0,0 +1,165 @@
+from main import ORDEM_PASSO
+from models import Item
+
+
+def itens_da_lista(session_factory, lista_id):
+    verificar = session_factory()
+    try:
+        return (
+            verificar.query(Item)
+            .filter(Item.lista_id == lista_id)
+            .order_by(Item.ordem.asc(), Item.id.asc())
+            .all()
+        )
+    finally:
+        verificar.close()
+
+
+def test_lote_aplica_operacoes_em_ordem(client, session_factory, contar_consultas, criar_lista):
+    lista = criar_lista(itens=["Arroz", "Feijão", "Sal"])
+    arroz, feijao, sal = itens_da_lista(session_factory, lista.id)
+
+    operacoes = [
+        {"op": "criar", "nome": "Café", "quantidade": 2},
+        {"op": "criar", "nome": "Leite"},
+        {"op": "alternar", "id": arroz.id},
+        {"op": "atualizar", "id": feijao.id, "nome": "Feijão preto", "quantidade": 3},
+        {"op": "alternar", "id": feijao.id},
+        {"op": "excluir", "id": sal.id},
+    ]
+    with contar_consultas() as consultas:
+        resp = client.post(f"/api/listas/{lista.id}/itens/batch", json={"operacoes": operacoes})
+    assert resp.status_code == 200
+    resultados = resp.json()["resultados"]
+    assert [r["op"] for r in resultados] == ["criar", "criar", "alternar", "atualizar", "alternar", "excluir"]
+    assert resultados[0]["item"]["nome"] == "Café"
+    assert resultados[1]["item"]["ordem"] - resultados[0]["item"]["ordem"] == ORDEM_PASSO
+    assert resultados[3]["item"]["comprado"] is False
+    assert resultados[4]["item"]["comprado"] is True
+    # lista + itens referenciados + max(ordem) + revisão + versão + update + lápides + delete + insert,
+    # independente do tamanho do lote
+    assert len(consultas) <= 9
+
+    finais = itens_da_lista(session_factory, lista.id)
+    assert [(i.nome, i.quantidade, i.comprado) for i in finais] == [
+        ("Arroz", 1, True),
+        ("Feijão preto", 3, True),
+        ("Café", 2, False),
+        ("Leite", 1, False),
+    ]
+
+
+def test_lote_com_erro_nao_aplica_nada(client, session_factory, criar_lista):
+    lista = criar_lista(itens=["Arroz"])
+    outra = criar_lista(nome="Outra", itens=["Pão"])
+    (arroz,) = itens_da_lista(session_factory, lista.id)
+    (pao,) = itens_da_lista(session_factory, outra.id)
+
+    operacoes = [
+        {"op": "criar", "nome": "Café"},
+        {"op": "excluir", "id": arroz.id},
+        {"op": "alternar", "id": arroz.id},
+        {"op": "alternar", "id": pao.id},
+        {"op": "criar", "nome": "  "},
+        {"op": "voar"},
+    ]
+    resp = client.post(f"/api/listas/{lista.id}/itens/batch", json={"operacoes": operacoes})
+    assert resp.status_code == 400
+    erros = resp.json()["detail"]["erros"]
+    assert [e["indice"] for e in erros] == [2, 3, 4, 5]
+    assert [i.nome for i in itens_da_lista(session_factory, lista.id)] == ["Arroz"]
+
+
+def test_lote_valida_payload(client, criar_lista):
+    lista = criar_lista()
+    assert client.post(f"/api/listas/{lista.id}/itens/batch", json={}).status_code == 400
+    assert client.post("/api/listas/999/itens/batch", json={"operacoes": [{"op": "criar", "nome": "X"}]}).status_code == 404
+
+
+def ordem_dos_nomes(session_factory, lista_id):
+    return [i.nome for i in itens_da_lista(session_factory, lista_id)]
+
+
+def test_reordenar_itens_usa_um_update(client, session_factory, contar_consultas, criar_lista):
+    lista = criar_lista(itens=["A", "B", "C", "D"])
+    a, b, c, d = itens_da_lista(session_factory, lista.id)
+
+    with contar_consultas() as consultas:
+        resp = client.put(f"/api/listas/{lista.id}/itens/ordenar", json={"ordem": [c.id, a.id]})
+    assert resp.status_code == 200
+    assert ordem_dos_nomes(session_factory, lista.id) == ["C", "A", "B", "D"]
+    assert len([q for q in consultas if q.lstrip().startswith("UPDATE itens")]) == 1
+
+
+def test_mover_item_atualiza_apenas_a_linha_movida(client, session_factory, contar_consultas, criar_lista):
+    lista = criar_lista()
+    ids = [client.post(f"/api/listas/{lista.id}/itens", json={"nome": n}).json()["id"] for n in "ABCDE"]
+
+    with contar_consultas() as consultas:
+        resp = client.put(f"/api/listas/{lista.id}/itens/{ids[4]}/mover", json={"depois_de": ids[0]})
+    assert resp.status_code == 200
+    assert ordem_dos_nomes(session_factory, lista.id) == ["A", "E", "B", "C", "D"]
+    updates = [q for q in consultas if q.lstrip().startswith("UPDATE itens")]
+    assert len(updates) == 1 and "CASE" not in updates[0]
+
+    client.put(f"/api/listas/{lista.id}/itens/{ids[2]}/mover", json={"depois_de": None})
+    assert ordem_dos_nomes(session_factory, lista.id) == ["C", "A", "E", "B", "D"]
+    client.put(f"/api/listas/{lista.id}/itens/{ids[2]}/mover", json={"antes_de": None})
+    assert ordem_dos_nomes(session_factory, lista.id) == ["A", "E", "B", "D", "C"]
+    client.put(f"/api/listas/{lista.id}/itens/{ids[3]}/mover", json={"antes_de": ids[0]})
+    assert ordem_dos_nomes(session_factory, lista.id) == ["D", "A", "E", "B", "C"]
+
+
+def test_mover_item_sem_lacuna_redistribui(client, session_factory, criar_lista):
+    # Itens antigos têm ordem contígua (0, 1, 2): não há valor entre vizinhos
+    lista = criar_lista(itens=["A", "B", "C"])
+    a, b, c = itens_da_lista(session_factory, lista.id)
+
+    resp = client.put(f"/api/listas/{lista.id}/itens/{c.id}/mover", json={"antes_de": b.id})
+    assert resp.status_code == 200
+    assert ordem_dos_nomes(session_factory, lista.id) == ["A", "C", "B"]
+    ordens = [i.ordem for i in itens_da_lista(session_factory, lista.id)]
+    assert ordens == [0, ORDEM_PASSO, 2 * ORDEM_PASSO]
+
+
+def test_mover_item_com_ordens_empatadas_fica_junto_da_referencia(db_session, client, session_factory, criar_lista):
+    # Itens de antes da coluna `ordem` ficaram todos com 0 (migração 3245d65ddab1)
+    lista = criar_lista()
+    for nome in "ABCD":
+        db_session.add(Item(lista_id=lista.id, nome=nome, ordem=0))
+    db_session.commit()
+    a, b, c, d = itens_da_lista(session_factory, lista.id)
+    base = f"/api/listas/{lista.id}/itens"
+
+    def nomes():
+        return [i["nome"] for i in client.get(base).json()]
+
+    assert client.put(f"{base}/{d.id}/mover", json={"depois_de": a.id}).status_code == 200
+    assert nomes() == ["A", "D", "B", "C"]
+    assert client.put(f"{base}/{a.id}/mover", json={"antes_de": c.id}).status_code == 200
+    assert nomes() == ["D", "B", "A", "C"]
+
+
+def test_mover_item_valida_referencia(client, session_factory, criar_lista):
+    lista = criar_lista(itens=["A", "B"])
+    a, b = itens_da_lista(session_factory, lista.id)
+    url = f"/api/listas/{lista.id}/itens/{a.id}/mover"
+    assert client.put(url, json={}).status_code == 400
+    assert client.put(url, json={"antes_de": a.id}).status_code == 400
+    assert client.put(url, json={"antes_de": 9999}).status_code == 400
+    assert client.put(f"/api/listas/{lista.id}/itens/9999/mover", json={"antes_de": b.id}).status_code == 404
+
+
+def test_listar_itens_serializa_como_item_to_dict(client, session_factory, contar_consultas, criar_lista):
+    from main import item_to_dict
+
+    lista = criar_lista(itens=["Arroz", "Feijão", "Café"])
+    esperado = [item_to_dict(i) for i in itens_da_lista(session_factory, lista.id)]
+
+    with contar_consultas() as consultas:
+        resp = client.get(f"/api/listas/{lista.id}/itens")
+    assert resp.status_code == 200
+    assert resp.json() == esperado
+    assert resp.headers["etag"]
+    # Versão da lista e um SELECT dos itens (só as colunas da resposta)
+    assert len(consultas) == 2
@@ -0,0 +1,126 @@
+from sqlalchemy import event, text
+
+from models import Item, Lista
+
+
+def test_listar_listas_retorna_contagens_em_uma_consulta(client, contar_consultas, criar_lista):
+    for n in range(5):
+        criar_lista(
+            f"Lista {n}",
+            itens=[{"nome": "Arroz", "comprado": True}, {"nome": "Feijão"}, {"nome": "Café"}],
+        )
+
+    with contar_consultas() as consultas:
+        resp = client.get("/api/listas")
+    assert resp.status_code == 200
+    dados = resp.json()
+    assert len(dados) == 5
+    assert all(l["itens_count"] == 3 for l in dados)
+    assert all(l["itens_comprados"] == 1 for l in dados)
+    assert all(l["preview_itens"] is None for l in dados)
+    # versão do conjunto (ETag) + a página com as contagens
+    assert len(consultas) == 2
+
+
+def test_listar_listas_com_previa_limita_tres_itens(client, criar_lista):
+    criar_lista("Grande", itens=[{"nome": f"Item {i}"} for i in range(6)])
+    criar_lista("Vazia")
+
+    resp = client.get("/api/listas", params={"previa": True})
+    assert resp.status_code == 200
+    por_nome = {l["nome"]: l for l in resp.json()}
+    assert [i["nome"] for i in por_nome["Grande"]["preview_itens"]] == ["Item 0", "Item 1", "Item 2"]
+    assert por_nome["Grande"]["itens_count"] == 6
+    assert por_nome["Vazia"]["preview_itens"] == []
+    assert por_nome["Vazia"]["itens_count"] == 0
+
+
+def test_listar_listas_paginacao_por_cursor_percorre_todas(client, criar_lista):
+    for n in range(7):
+        criar_lista(f"Lista {n}")
+
+    vistos = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/api/listas", params=params)
+        assert resp.status_code == 200
+        payload = resp.json()
+        assert len(payload["data"]) <= 3
+        vistos.extend(l["nome"] for l in payload["data"])
+        cursor = payload["meta"]["next_cursor"]
+        assert payload["meta"]["has_more"] is (cursor is not None)
+        if not cursor:
+            break
+    assert vistos == [f"Lista {n}" for n in reversed(range(7))]
+
+
+def test_listar_listas_cursor_com_datas_legadas_sem_fracao(db_session, client, usuario, aplicar_migracao, criar_lista):
+    # Linhas de antes do default em Python: CURRENT_TIMESTAMP, sem microssegundos, e empates
+    for n in range(5):
+        db_session.execute(
+            text("INSERT INTO listas (usuario_id, nome, criado_em) VALUES (:u, :nome, :criado_em)"),
+            {"u": usuario.id, "nome": f"Antiga {n}", "criado_em": f"2024-01-01 10:00:0{n // 2}"},
+        )
+    db_session.commit()
+    criar_lista("Nova")
+    aplicar_migracao("f1a6d3c8b205")
+
+    vistos = []
+    cursor = None
+    for _ in range(10):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        payload = client.get("/api/listas", params=params).json()
+        vistos.extend(l["nome"] for l in payload["data"])
+        cursor = payload["meta"]["next_cursor"]
+        if not cursor:
+            break
+    assert cursor is None
+    assert vistos == ["Nova", "Antiga 4", "Antiga 3", "Antiga 2", "Antiga 1", "Antiga 0"]
+    formatos = db_session.execute(text("SELECT DISTINCT length(criado_em) FROM listas")).scalars().all()
+    assert formatos == [26]
+
+
+def test_listar_listas_filtra_status_e_prefixo(client, criar_lista):
+    criar_lista("Feira sábado")
+    criar_lista("Feira domingo", finalizada=True)
+    criar_lista("Farmácia")
+    criar_lista("100% natural")
+
+    resp = client.get("/api/listas", params={"nome": "Feira", "finalizada": False})
+    assert [l["nome"] for l in resp.json()] == ["Feira sábado"]
+
+    resp = client.get("/api/listas", params={"finalizada": True, "limit": 10})
+    assert [l["nome"] for l in resp.json()["data"]] == ["Feira domingo"]
+
+    resp = client.get("/api/listas", params={"nome": "100%"})
+    assert [l["nome"] for l in resp.json()] == ["100% natural"]
+
+
+def test_listar_listas_cursor_invalido(client):
+    resp = client.get("/api/listas", params={"cursor": "nao-e-um-cursor"})
+    assert resp.status_code == 400
+
+
+def test_rotas_de_colecao_serializam_listas_sem_objetos_orm(client, criar_lista):
+    criar_lista("Aberta", itens=["Arroz"])
+    criar_lista("Fechada", itens=["Café"], finalizada=True)
+    carregados = []
+
+    def contar(alvo, contexto):
+        carregados.append(type(alvo).__name__)
+
+    for modelo in (Lista, Item):
+        event.listen(modelo, "load", contar)
+    try:
+        assert client.get("/api/listas", params={"previa": True}).status_code == 200
+        assert client.get("/api/listas", params={"limit": 1}).status_code == 200
+        historico = client.get("/api/historico").json()
+        assert client.get("/api/sync").status_code == 200
+    finally:
+        for modelo in (Lista, Item):
+            event.remove(modelo, "load", contar)
+    assert carregados == []
+    assert historico["data"][0]["preview_itens"][0]["nome"] == "Café"
@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from metricas import OrcamentoExcedido
+
+TOKEN_METRICAS = "segredo-do-prometheus"
+
+
+@pytest.fixture(autouse=True)
+def token_metricas(monkeypatch):
+    monkeypatch.setattr(main, "METRICAS_TOKEN", TOKEN_METRICAS)
+
+
+def ler_metricas(client):
+    return client.get("/api/metrics", headers={"Authorization": f"Bearer {TOKEN_METRICAS}"})
+
+
+def endpoint(caminho, metodo="GET"):
+    return next(r.endpoint for r in app.routes if getattr(r, "path", None) == caminho and metodo in r.methods)
+
+
+def test_metrics_expoe_latencia_e_consultas_por_rota(client, criar_lista):
+    lista_id = criar_lista(itens=["Arroz", "Feijão"]).id
+    assert client.get(f"/api/listas/{lista_id}/itens").status_code == 200
+    assert client.get(f"/api/listas/{lista_id}/itens").status_code == 200
+    assert client.get("/api/listas/999999/itens").status_code == 404
+
+    resp = ler_metricas(client)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    texto = resp.text
+    rotulos = 'metodo="GET",rota="/api/listas/{lista_id}/itens"'
+    assert f"app_requisicao_segundos_count{{{rotulos}}} 3" in texto
+    assert f'app_requisicao_segundos_bucket{{{rotulos},le="+Inf"}} 3' in texto
+    assert f"app_consultas_por_requisicao_count{{{rotulos}}} 3" in texto
+    assert f'app_respostas_total{{{rotulos},status="200"}} 2' in texto
+    assert f'app_respostas_total{{{rotulos},status="404"}} 1' in texto
+    assert f"app_consultas_segundos_total{{{rotulos}}}" in texto
+    assert "app_db_pool_checkouts_total" in texto
+    assert "app_senhas_rejeitadas_total 0" in texto
+
+
+def test_server_timing_informa_consultas(client, criar_lista):
+    lista_id = criar_lista(itens=["Arroz"]).id
+    resp = client.get(f"/api/listas/{lista_id}/itens")
+    assert 'desc="2 consultas"' in resp.headers["server-timing"]
+
+
+def test_orcamento_excedido_falha_em_modo_estrito(client, monkeypatch, criar_lista):
+    lista_id = criar_lista(itens=["Arroz"]).id
+    monkeypatch.setattr(endpoint("/api/listas/{lista_id}/itens"), "orcamento_consultas", 1)
+
+    with pytest.raises(OrcamentoExcedido, match="2 consultas"):
+        client.get(f"/api/listas/{lista_id}/itens")
+
+    resp = ler_metricas(client)
+    assert 'app_orcamento_consultas_excedido_total{metodo="GET",rota="/api/listas/{lista_id}/itens"} 1' in resp.text
+
+
+def test_orcamento_da_listagem_nao_depende_do_numero_de_listas(client, criar_lista):
+    for n in range(30):
+        criar_lista(nome=f"Lista {n}", itens=["a", "b", "c", "d"])
+    # Em modo estrito um N+1 aqui levantaria OrcamentoExcedido
+    assert len(client.get("/api/listas?previa=true").json()) == 30
+
+
+def test_metrics_exige_o_token_configurado(client):
+    # O client dos testes manda o JWT do usuário: não serve para as métricas
+    assert client.get("/api/metrics").status_code == 401
+    resp = client.get("/api/metrics", headers={"Authorization": "Bearer outro"})
+    assert resp.status_code == 401
+    assert resp.headers["www-authenticate"] == "Bearer"
+    assert ler_metricas(client).status_code == 200
+
+
+def test_metrics_sem_token_so_atende_a_propria_maquina(monkeypatch):
+    monkeypatch.setattr(main, "METRICAS_TOKEN", "")
+    assert TestClient(app).get("/api/metrics").status_code == 403
+    assert TestClient(app, client=("127.0.0.1", 50000)).get("/api/metrics").status_code == 200
@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+import main
+from banco import RodizioReplicas
+from models import Base, Lista, Usuario
+
+
+@pytest.fixture
+def outro(db_session):
+    usuario = Usuario(nome="Outro", email="outro@example.com", senha_hash="-")
+    db_session.add(usuario)
+    db_session.commit()
+    return usuario
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch, usuario, outro):
+    # Um segundo arquivo SQLite faz o papel da réplica, com conteúdo diferente do primário
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            Lista.__table__.insert(),
+            [
+                {"usuario_id": usuario.id, "nome": "Só na réplica", "finalizada": False},
+                {"usuario_id": outro.id, "nome": "Do outro, na réplica", "finalizada": False},
+            ],
+        )
+    engine.dispose()
+    rodizio = RodizioReplicas([url], com_async=main.DB_MODO == "async")
+    monkeypatch.setattr(main, "replicas", rodizio)
+    yield rodizio
+    rodizio.dispose()
+
+
+def _nomes(client, **kwargs):
+    return [l["nome"] for l in client.get("/api/listas", **kwargs).json()]
+
+
+def test_sem_replicas_leitura_usa_primario(client):
+    client.post("/api/listas", json={"nome": "Primário"})
+    assert _nomes(client) == ["Primário"]
+
+
+def test_leitura_vai_para_replica(client, replica):
+    assert _nomes(client) == ["Só na réplica"]
+    assert client.get("/api/historico").status_code == 200
+
+
+def test_leitura_apos_escrita_fica_no_primario(client, replica, outro, cabecalhos_de, monkeypatch):
+    assert client.post("/api/listas", json={"nome": "Recém-criada"}).status_code == 200
+    # Leitura atendida por "outro worker": nada do processo que atendeu a escrita sobrevive,
+    # só a marca que o cliente carrega
+    main.limpar_caches()
+    assert _nomes(client) == ["Recém-criada"]
+    # Outro cliente (sem a marca) continua na réplica
+    assert _nomes(TestClient(main.app, headers=cabecalhos_de(outro))) == ["Do outro, na réplica"]
+    monkeypatch.setattr(main, "REPLICA_JANELA_ESCRITA", 0)
+    assert _nomes(client) == ["Só na réplica"]
+
+
+def test_marca_de_escrita_no_header_vale_sem_cookie(client, replica, usuario, cabecalhos_de):
+    resp = client.post("/api/listas", json={"nome": "Recém-criada"})
+    marca = resp.headers["x-escrita-em"]
+    sem_cookies = TestClient(main.app, headers=cabecalhos_de(usuario))
+    assert _nomes(sem_cookies) == ["Só na réplica"]
+    assert _nomes(sem_cookies, headers={"X-Escrita-Em": marca}) == ["Recém-criada"]
+    assert _nomes(sem_cookies, headers={"X-Escrita-Em": "lixo"}) == ["Só na réplica"]
+
+
+def test_escrita_recusada_nao_prende_no_primario(client, replica):
+    assert client.post("/api/listas", json={"nome": ""}).status_code == 400
+    assert _nomes(client) == ["Só na réplica"]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from eventos import RESINCRONIZAR, BarramentoMemoria
+
+
+def test_stream_recebe_alteracoes_da_lista(client):
+    lista_id = client.post("/api/listas", json={"nome": "Mercado"}).json()["id"]
+    outra_id = client.post("/api/listas", json={"nome": "Outra"}).json()["id"]
+    with client.websocket_connect(f"/api/listas/{lista_id}/stream") as ws:
+        assert ws.receive_json() == {"tipo": "inscrito", "lista_id": lista_id}
+
+        client.post(f"/api/listas/{outra_id}/itens", json={"nome": "Ignorado"})
+        arroz = client.post(f"/api/listas/{lista_id}/itens", json={"nome": "Arroz"}).json()
+        mensagem = ws.receive_json()
+        assert mensagem["tipo"] == "item_criado"
+        assert mensagem["item"]["nome"] == "Arroz"
+        assert mensagem["revisao"] > 0
+
+        feijao = client.post(f"/api/listas/{lista_id}/itens", json={"nome": "Feijão"}).json()
+        assert ws.receive_json()["item"]["id"] == feijao["id"]
+
+        client.put(f"/api/listas/{lista_id}/itens/{arroz['id']}", json={"comprado": True})
+        mensagem = ws.receive_json()
+        assert (mensagem["tipo"], mensagem["item"]["comprado"]) == ("item_atualizado", True)
+
+        client.put(f"/api/listas/{lista_id}/itens/ordenar", json={"ordem": [feijao["id"], arroz["id"]]})
+        assert ws.receive_json()["ordem"] == [feijao["id"], arroz["id"]]
+
+        client.delete(f"/api/listas/{lista_id}/itens/{arroz['id']}")
+        assert ws.receive_json() == {
+            "tipo": "item_excluido",
+            "lista_id": lista_id,
+            "revisao": mensagem["revisao"] + 2,
+            "id": arroz["id"],
+        }
+
+        client.post(f"/api/listas/{lista_id}/finalizar")
+        mensagem = ws.receive_json()
+        assert (mensagem["tipo"], mensagem["finalizada"]) == ("lista_atualizada", True)
+
+
+def test_stream_de_lista_inexistente_e_recusado(client):
+    # O handshake é aceito e a recusa chega como código de fechamento, que o navegador enxerga
+    with client.websocket_connect("/api/listas/999/stream") as ws:
+        with pytest.raises(WebSocketDisconnect) as erro:
+            ws.receive_json()
+    assert erro.value.code == 4404
+
+
+def test_assinante_lento_recebe_resincronizar():
+    async def cenario():
+        barramento = BarramentoMemoria(tamanho_fila=2)
+        async with barramento.assinar("lista:1") as assinatura:
+            for n in range(5):
+                barramento.publicar("lista:1", {"n": n})
+            await asyncio.sleep(0)
+            recebidas = [await assinatura.proxima(timeout=1) for _ in range(3)]
+            assert await assinatura.proxima(timeout=0.01) is None
+        assert barramento.assinantes("lista:1") == 0
+        return recebidas
+
+    assert asyncio.run(cenario()) == [{"n": 0}, {"n": 1}, RESINCRONIZAR]
@@ -0,0 +1,182 @@
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select, update
+
+from exclusoes import expurgar_exclusoes
+from main import app
+from models import Exclusao, Item, Lista, Usuario, agora_utc
+from versoes import nova_revisao
+
+
+def criar(client, nome="Mercado", itens=("Arroz", "Feijão", "Sal")):
+    lista = client.post("/api/listas", json={"nome": nome}).json()
+    ids = [client.post(f"/api/listas/{lista['id']}/itens", json={"nome": n}).json()["id"] for n in itens]
+    return lista["id"], ids
+
+
+def sync(client, token=None):
+    resp = client.get("/api/sync", params={"since": token} if token else None)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_carga_completa_e_token_sem_alteracoes(client):
+    lista_id, ids = criar(client)
+    dados = sync(client)
+    assert dados["completo"] is True
+    assert [l["id"] for l in dados["listas"]] == [lista_id]
+    assert [i["id"] for i in dados["itens"]] == ids
+    vazio = sync(client, dados["token"])
+    assert vazio["completo"] is False
+    assert vazio["listas"] == [] and vazio["itens"] == []
+    assert vazio["excluidos"] == {"listas": [], "itens": []}
+    assert vazio["token"] == dados["token"]
+
+
+def test_sync_traz_apenas_o_que_mudou(client):
+    lista_id, (arroz, feijao, sal) = criar(client)
+    outra_id, _ = criar(client, "Farmácia", itens=("Remédio",))
+    token = sync(client)["token"]
+
+    client.put(f"/api/listas/{lista_id}/itens/{feijao}", json={"comprado": True})
+    dados = sync(client, token)
+    assert [i["id"] for i in dados["itens"]] == [feijao]
+    assert dados["itens"][0]["comprado"] is True
+    # A lista volta com as contagens novas; a outra lista não aparece
+    assert [(l["id"], l["itens_comprados"]) for l in dados["listas"]] == [(lista_id, 1)]
+
+    client.delete(f"/api/listas/{lista_id}/itens/{sal}")
+    client.delete(f"/api/listas/{outra_id}")
+    dados = sync(client, dados["token"])
+    assert dados["excluidos"] == {"listas": [outra_id], "itens": [sal]}
+    assert dados["itens"] == []
+
+
+def test_sync_cobre_lote_reordenacao_e_restauracao(client):
+    lista_id, (arroz, feijao, sal) = criar(client)
+    token = sync(client)["token"]
+
+    client.post(f"/api/listas/{lista_id}/itens/batch", json={"operacoes": [{"op": "criar", "nome": "Café"}, {"op": "excluir", "id": sal}]})
+    dados = sync(client, token)
+    assert [i["nome"] for i in dados["itens"]] == ["Café"]
+    assert dados["excluidos"]["itens"] == [sal]
+
+    client.put(f"/api/listas/{lista_id}/itens/ordenar", json={"ordem": [feijao, arroz]})
+    dados = sync(client, dados["token"])
+    assert {i["id"] for i in dados["itens"]} >= {arroz, feijao}
+
+    client.post(f"/api/listas/{lista_id}/finalizar")
+    restaurada = client.post(f"/api/historico/restaurar/{lista_id}").json()
+    dados = sync(client, dados["token"])
+    assert {l["id"] for l in dados["listas"]} == {lista_id, restaurada["id"]}
+    assert {i["lista_id"] for i in dados["itens"]} == {restaurada["id"]}
+
+
+def test_escritas_gravam_revisao_crescente(client, session_factory):
+    lista_id, _ = criar(client)
+    db = session_factory()
+    try:
+        antes = db.get(Lista, lista_id).revisao
+    finally:
+        db.close()
+    client.put(f"/api/listas/{lista_id}", json={"nome": "Feira"})
+    db = session_factory()
+    try:
+        depois = db.get(Lista, lista_id)
+        assert depois.revisao > antes
+        assert depois.atualizado_em is not None
+    finally:
+        db.close()
+
+
+def test_revisao_e_por_usuario(client, db_session, cabecalhos_de):
+    outro = Usuario(nome="Outro", email="outro@example.com", senha_hash="-")
+    db_session.add(outro)
+    db_session.commit()
+    cliente_outro = TestClient(app, headers=cabecalhos_de(outro))
+    criar(client)
+    token = sync(client)["token"]
+    etag = client.get("/api/listas").headers["etag"]
+
+    # Escritas de outro usuário não avançam o contador (nem esperam pelo lock) deste
+    criar(cliente_outro, "Dele")
+    assert sync(client)["token"] == token
+    assert client.get("/api/listas", headers={"If-None-Match": etag}).status_code == 304
+    assert [l["nome"] for l in sync(cliente_outro)["listas"]] == ["Dele"]
+
+
+def test_importacao_entra_no_sync(client):
+    lista_id, _ = criar(client)
+    token = sync(client)["token"]
+    resp = client.post(f"/api/listas/{lista_id}/importar", params={"formato": "csv"}, content="nome\nCafé\nLeite\n".encode())
+    assert resp.json()["itens_importados"] == 2
+    resp = client.post(
+        "/api/historico/importar",
+        params={"formato": "jsonl"},
+        content=b'{"lista_id": 9, "lista": "Antiga", "nome": "Sal"}\n',
+    )
+    assert resp.json()["listas_criadas"] == 1
+
+    dados = sync(client, token)
+    assert {l["nome"] for l in dados["listas"]} == {"Mercado", "Antiga"}
+    assert sorted(i["nome"] for i in dados["itens"]) == ["Café", "Leite", "Sal"]
+
+
+def test_revisao_da_transacao_nao_vaza_para_a_proxima_conexao(client, db_session, usuario):
+    criar(client)
+    # Sem nova_revisao a linha sai com 0, mesmo reaproveitando a conexão de uma requisição
+    with db_session.get_bind().begin() as conexao:
+        lista_id = conexao.execute(
+            insert(Lista.__table__).values(usuario_id=usuario.id, nome="Carga").returning(Lista.id)
+        ).scalar_one()
+        conexao.execute(insert(Item.__table__).values(lista_id=lista_id, nome="Linha"))
+    assert db_session.scalar(select(Lista.revisao).where(Lista.id == lista_id)) == 0
+    assert db_session.scalar(select(Item.revisao).where(Item.lista_id == lista_id)) == 0
+
+
+def test_nova_revisao_exige_dono_existente(db_session):
+    with pytest.raises(ValueError, match="não tem dono"):
+        nova_revisao(db_session, None)
+    with pytest.raises(ValueError, match="usuário 999 não existe"):
+        nova_revisao(db_session, 999)
+
+
+def test_token_invalido(client):
+    assert client.get("/api/sync", params={"since": "???"}).status_code == 400
+
+
+def test_expurgo_de_lapides_forca_carga_completa(client, db_session, usuario):
+    lista_id, (arroz, feijao, sal) = criar(client)
+    token = sync(client)["token"]
+    client.delete(f"/api/listas/{lista_id}/itens/{sal}")
+    recente = sync(client)["token"]
+    client.delete(f"/api/listas/{lista_id}/itens/{feijao}")
+
+    # A lápide do "Sal" passa do prazo; a do "Feijão" fica
+    db_session.execute(
+        update(Exclusao).where(Exclusao.registro_id == sal).values(excluido_em=agora_utc() - timedelta(days=91))
+    )
+    assert expurgar_exclusoes(db_session, dias=90) == 1
+    db_session.commit()
+    assert db_session.scalars(select(Exclusao.registro_id)).all() == [feijao]
+
+    # O token de antes do expurgo perdeu a exclusão do "Sal": volta tudo, como carga completa
+    dados = sync(client, token)
+    assert dados["completo"] is True
+    assert [i["id"] for i in dados["itens"]] == [arroz]
+    # O token de depois ainda recebe só a exclusão que ficou
+    dados = sync(client, recente)
+    assert dados["completo"] is False
+    assert dados["excluidos"] == {"listas": [], "itens": [feijao]}
+
+
+def test_expurgo_sem_lapides_antigas_nao_mexe_na_marca(client, db_session, usuario):
+    lista_id, (arroz, _, _) = criar(client)
+    token = sync(client)["token"]
+    client.delete(f"/api/listas/{lista_id}/itens/{arroz}")
+    assert expurgar_exclusoes(db_session, dias=90) == 0
+    db_session.commit()
+    assert db_session.scalar(select(Usuario.revisao_expurgada).where(Usuario.id == usuario.id)) == 0
+    assert sync(client, token)["excluidos"]["itens"] == [arroz]
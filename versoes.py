@@ -0,0 +1,116 @@
+# versoes.py - contador de versão das listas e validação de ETags (comentários em português)
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+
+from models import CHAVE_REVISAO, Exclusao, Lista, Usuario
+
+
+# Incrementa o contador do usuário uma vez por transação. Deve vir ANTES das escritas: as colunas
+# `revisao` leem a revisão guardada no `info` da conexão no próprio INSERT/UPDATE. O lock de
+# linha do UPDATE serializa só os escritores do mesmo usuário até o commit, então as revisões
+# dele ficam visíveis na ordem em que foram geradas e um token do /api/sync nunca "pula" uma
+# transação ainda não confirmada. Usuários diferentes não esperam uns pelos outros.
+# Uma transação que grava listas de vários usuários (reparo de contadores) chama de novo antes
+# das escritas de cada um, e as próximas linhas passam a receber a revisão dele.
+def nova_revisao(db: Session, usuario_id: int) -> int:
+    revisoes = db.info.setdefault(CHAVE_REVISAO, {})
+    revisao = revisoes.get(usuario_id)
+    if revisao is None:
+        # Listas sem dono (linhas antigas, cargas sem usuário) não têm contador para avançar
+        if usuario_id is None:
+            raise ValueError("nova_revisao: a lista não tem dono (usuario_id nulo)")
+        revisao = db.execute(
+            update(Usuario.__table__)
+            .where(Usuario.id == usuario_id)
+            .values(revisao_sync=Usuario.revisao_sync + 1)
+            .returning(Usuario.revisao_sync)
+        ).scalar()
+        if revisao is None:
+            raise ValueError(f"nova_revisao: usuário {usuario_id} não existe")
+        revisoes[usuario_id] = revisao
+    db.connection().info[CHAVE_REVISAO] = revisao
+    return revisao
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _esquecer_revisao(sessao: Session) -> None:
+    sessao.info.pop(CHAVE_REVISAO, None)
+
+
+# O `info` da conexão sobrevive à volta para o pool: a próxima transação não pode herdar a revisão
+@event.listens_for(Pool, "checkin")
+def _limpar_revisao_da_conexao(_conexao_dbapi, registro) -> None:
+    if registro is not None:
+        registro.info.pop(CHAVE_REVISAO, None)
+
+
+def revisao_atual(db: Session, usuario_id: int) -> int:
+    return db.scalar(select(Usuario.revisao_sync).where(Usuario.id == usuario_id)) or 0
+
+
+# (revisão atual, revisão expurgada) do usuário numa leitura só, para o /api/sync
+def revisoes_sync(db: Session, usuario_id: int) -> Tuple[int, int]:
+    linha = db.execute(
+        select(Usuario.revisao_sync, Usuario.revisao_expurgada).where(Usuario.id == usuario_id)
+    ).first()
+    return (0, 0) if linha is None else tuple(linha)
+
+
+# Deve ser chamada na mesma transação (e antes) de qualquer escrita em uma lista ou nos seus
+# itens; devolve a revisão da transação
+def tocar_listas(db: Session, usuario_id: int, ids: Iterable[int]) -> int:
+    revisao = nova_revisao(db, usuario_id)
+    ids = set(ids)
+    if ids:
+        db.execute(
+            update(Lista)
+            .where(Lista.id.in_(ids))
+            .values(versao=Lista.versao + 1)
+            .execution_options(synchronize_session=False)
+        )
+    return revisao
+
+
+def registrar_exclusoes(
+    db: Session, tabela: str, ids: Iterable[int], usuario_id: int, lista_id: Optional[int] = None
+) -> None:
+    nova_revisao(db, usuario_id)
+    linhas = [
+        {"tabela": tabela, "registro_id": registro_id, "lista_id": lista_id, "usuario_id": usuario_id}
+        for registro_id in ids
+    ]
+    if linhas:
+        db.execute(insert(Exclusao), linhas)
+
+
+# Validador da lista para ETags: "revisao.versao". O SQLite reaproveita o id da última lista
+# excluída, e a lista nova recomeçaria na mesma versão; a revisão só cresce, então separa as duas.
+def validador_lista(revisao: int, versao: int) -> str:
+    return f"{revisao}.{versao}"
+
+
+# None quando a lista não existe ou é de outro usuário
+def versao_lista(db: Session, lista_id: int, usuario_id: int) -> Optional[str]:
+    linha = db.execute(
+        select(Lista.revisao, Lista.versao).where(Lista.id == lista_id, Lista.usuario_id == usuario_id)
+    ).first()
+    return None if linha is None else validador_lista(*linha)
+
+
+# Versão do conjunto de listas do usuário: a revisão dele, que toda transação que escreve em
+# listas ou itens incrementa (inclusive exclusões). Uma linha lida pela chave primária, em vez
+# de percorrer todas as listas.
+def versao_colecao(db: Session, usuario_id: int) -> str:
+    return f"r{revisao_atual(db, usuario_id)}"
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match usa comparação fraca: W/"x" confere com "x"
+    if not if_none_match:
+        return False
+    candidatos = {c.strip().removeprefix("W/") for c in if_none_match.split(",")}
+    return "*" in candidatos or etag in candidatos
@@ -12,6 +12,7 @@ module.exports = {
       '/api': {
         target: 'http://127.0.0.1:8000',
         changeOrigin: true,
+        ws: true,
         rewrite: (path) => path.replace(/^\/api/, '/api'),
       },
     },